@@ -0,0 +1,111 @@
+"""Costo dei checkpoint per lo step loop e verifica della ripresa.
+
+Per ogni configurazione esegue la simulazione con un checkpoint ogni ``--ogni`` step e
+misura il tempo sottratto allo step loop (fotografia dello stato), confrontandolo con
+un checkpoint sincrono (pickle, compressione e scrittura nello step loop). Poi riprende
+dall'ultimo checkpoint in un nuovo interprete, prosegue fino alla fine e verifica che
+le metriche coincidano con quelle di una run senza interruzioni.
+
+Uso: python benchmarks/bench_checkpoint.py [--steps 3000] [--ogni 500]
+"""
+import argparse
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from checkpoint import FILE_STATO, Checkpointer, _Pickler  # noqa: E402
+from headless import build_model, fingerprint  # noqa: E402
+from layout import genera_layout  # noqa: E402
+
+CONFIGURAZIONI = {
+    "base": {},
+    "eventi": {"travel": "events", "order_time": 3, "num_loading_forkLift": 10, "num_unloading_forkLift": 10},
+    "cooperativo": {"cooperative": True, "num_loading_forkLift": 5, "num_unloading_forkLift": 5},
+    "4x5 blocchi": {"layout": (4, 5), "routing": "corridor", "order_time": 5,
+                    "num_loading_forkLift": 20, "num_unloading_forkLift": 20},
+    "10x20 blocchi": {"layout": (10, 20), "routing": "corridor", "order_time": 5,
+                      "num_loading_forkLift": 50, "num_unloading_forkLift": 50},
+}
+
+RIPRESA = ("import sys; sys.path.insert(0, {radice!r}); from checkpoint import Checkpointer; "
+           "from headless import fingerprint; c = Checkpointer.riprendi({cartella!r}); "
+           "c.model.run_for({steps!r} - c.model.steps); print(fingerprint(c.model))")
+
+
+def params_modello(params):
+    params = dict(params)
+    if "layout" in params:
+        params["layout"] = genera_layout(*params["layout"])
+    return params
+
+
+def checkpoint_sincrono(model, path):
+    """Checkpoint scritto tutto nello step loop, come riferimento"""
+    buffer = io.BytesIO()
+    _Pickler(buffer, model).dump(model)
+    with open(path, "wb") as f:
+        f.write(zlib.compress(buffer.getbuffer(), 1))
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def profile(params, steps, ogni, seed):
+    atteso = build_model(params_modello(params), seed)
+    atteso.run_for(steps)
+
+    with tempfile.TemporaryDirectory() as cartella:
+        # Riferimento: checkpoint sincroni agli stessi step
+        model = build_model(params_modello(params), seed)
+        sincrono = 0.0
+        for _ in range(steps // ogni):
+            model.run_for(ogni)
+            t0 = time.perf_counter()
+            checkpoint_sincrono(model, os.path.join(cartella, "sincrono.bin"))
+            sincrono = max(sincrono, time.perf_counter() - t0)
+
+        # Checkpoint in background; la run si interrompe a metà tra due checkpoint
+        model = build_model(params_modello(params), seed)
+        checkpointer = Checkpointer(model, os.path.join(cartella, "ckpt"), ogni)
+        t0 = time.perf_counter()
+        checkpointer.run_for(steps - ogni // 2)
+        durata = time.perf_counter() - t0
+        checkpointer.chiudi()
+        stato = os.path.getsize(os.path.join(cartella, "ckpt", FILE_STATO))
+
+        t0 = time.perf_counter()
+        radice = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+        ripreso = subprocess.run([sys.executable, "-c", RIPRESA.format(radice=radice, cartella=checkpointer.cartella,
+                                                                       steps=steps)],
+                                 check=True, capture_output=True, text=True).stdout.split()[-1]
+        ripresa = time.perf_counter() - t0
+    assert ripreso == fingerprint(atteso), "La ripresa deve dare le stesse metriche della run senza interruzioni"
+    return checkpointer, durata, sincrono, stato, ripresa
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--steps", type=int, default=3000)
+    parser.add_argument("--ogni", type=int, default=500)
+    parser.add_argument("--configurazioni", default=",".join(CONFIGURAZIONI),
+                        help="Configurazioni da misurare, separate da virgola")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{'configurazione':>15} {'checkpoint':>10} {'stato (KiB)':>12} {'sincrono (ms)':>14} "
+          f"{'stallo medio (ms)':>18} {'stallo max (ms)':>16} {'run (s)':>8} {'ripresa (s)':>12}")
+    for nome in args.configurazioni.split(","):
+        checkpointer, durata, sincrono, stato, ripresa = profile(CONFIGURAZIONI[nome], args.steps, args.ogni,
+                                                                 args.seed)
+        print(f"{nome:>15} {checkpointer.scritti:>10} {stato / 1024:>12.1f} {sincrono * 1e3:>14.1f} "
+              f"{checkpointer.stallo_totale / checkpointer.scritti * 1e3:>18.2f} "
+              f"{checkpointer.stallo_massimo * 1e3:>16.2f} {durata:>8.2f} {ripresa:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
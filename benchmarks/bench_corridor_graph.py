@@ -0,0 +1,56 @@
+"""Nodi espansi per query: A* cella per cella sul TrackGraph contro A* sul grafo dei corridoi.
+
+Uso: python benchmarks/bench_corridor_graph.py [--queries 200]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bench_track_graph import generate_tracks  # noqa: E402
+from corridor_graph import CorridorGraph  # noqa: E402
+from track_graph import TrackGraph  # noqa: E402
+
+
+def compare(name, tracks, queries):
+    graph = TrackGraph(tracks)
+    t0 = time.perf_counter()
+    corridors = CorridorGraph(graph)
+    build = time.perf_counter() - t0
+
+    rng = random.Random(0)
+    pairs = [(rng.choice(graph.nodes), rng.choice(graph.nodes)) for _ in range(queries)]
+
+    cell_expansions = 0
+    t0 = time.perf_counter()
+    for start, goal in pairs:
+        graph.find_path(start, goal)
+        cell_expansions += graph.last_expansions
+    cell_time = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for start, goal in pairs:
+        corridors.find_path(start, goal)
+    corridor_time = time.perf_counter() - t0
+
+    print(f"{name}: {len(graph)} nodi, {corridors.num_junctions} incroci, "
+          f"{len(corridors.corridors)} corridoi (costruzione {build:.2f} s)")
+    print(f"  A* celle:     {cell_expansions / queries:9.1f} espansioni/query {cell_time / queries * 1000:8.2f} ms/query")
+    print(f"  A* corridoi:  {corridors.total_expansions / queries:9.1f} espansioni/query "
+          f"{corridor_time / queries * 1000:8.2f} ms/query")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    for size in (30, 100, 300):
+        compare(f"Layout generato {size}x{size}", generate_tracks(size), args.queries)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""Tempo per step al crescere del numero di muletti, con il dispatcher centrale dei task.
+
+Per ogni flotta riporta il tempo medio per step, gli ordini completati e la quota di
+muletti fermi in standby a fine run: i muletti senza task non scandiscono più i dock.
+
+Uso: python benchmarks/bench_dispatcher.py [--steps 2000] [--fleets 2,10,25,50]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from forkLift import LoadingForkLift, UnloadingForkLift  # noqa: E402
+from headless import build_model  # noqa: E402
+
+
+def profile(n, steps, seed):
+    model = build_model({"num_loading": 5, "num_unloading": 5, "order_time": 2,
+                         "num_loading_forkLift": n, "num_unloading_forkLift": n}, seed)
+    t0 = time.perf_counter()
+    for _ in range(steps):
+        model.step()
+    us = (time.perf_counter() - t0) / steps * 1e6
+    forklifts = [*model.agents_by_type[UnloadingForkLift], *model.agents_by_type[LoadingForkLift]]
+    fermi = sum(f.state == "IDLE" for f in forklifts) / len(forklifts)
+    completati = model.ordini_carico_completati + model.ordini_scarico_completati
+    return us, completati, fermi
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--steps", type=int, default=2000)
+    parser.add_argument("--fleets", default="2,10,25,50", help="Muletti per tipo, separati da virgola")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{'muletti per tipo':>17} {'us/step':>10} {'ordini completati':>18} {'fermi':>7}")
+    for n in (int(v) for v in args.fleets.split(",")):
+        us, completati, fermi = profile(n, args.steps, args.seed)
+        print(f"{n:>17} {us:>10.1f} {completati:>18} {fermi:>7.0%}")
+
+
+if __name__ == "__main__":
+    main()
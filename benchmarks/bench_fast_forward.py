@@ -0,0 +1,60 @@
+"""Tempo di una run lunga con e senza fast_forward, al crescere dell'intervallo tra gli ordini.
+
+Con ordini rari i muletti finiscono il lavoro e restano fermi in standby fino al
+prossimo ordine: fast_forward salta questi step. Le due run devono dare le stesse
+metriche e lasciare il generatore casuale nello stesso stato.
+
+Uso: python benchmarks/bench_fast_forward.py [--steps 20000] [--order-times 25,100,300]
+"""
+import argparse
+import os
+import sys
+import time
+import types
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from headless import build_model, fingerprint  # noqa: E402
+
+PARAMS = {"num_loading_forkLift": 4, "num_unloading_forkLift": 4}
+
+
+def with_skip_counter(model):
+    """Conta gli step saltati da _avanti_veloce"""
+    model.step_saltati = 0
+    avanti_veloce = model._avanti_veloce
+
+    def conta(self, n):
+        self.step_saltati += n
+        avanti_veloce(n)
+
+    model._avanti_veloce = types.MethodType(conta, model)
+    return model
+
+
+def profile(order_time, fast_forward, steps, seed):
+    model = with_skip_counter(build_model(dict(PARAMS, order_time=order_time, fast_forward=fast_forward), seed))
+    t0 = time.perf_counter()
+    model.run_for(steps)
+    return time.perf_counter() - t0, model
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--steps", type=int, default=20000)
+    parser.add_argument("--order-times", default="25,100,300", help="Valori di order_time, separati da virgola")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{'order_time':>10} {'normale (s)':>12} {'fast_forward (s)':>17} {'step saltati':>13} {'speedup':>8}")
+    for order_time in (int(v) for v in args.order_times.split(",")):
+        normal_s, normal = profile(order_time, False, args.steps, args.seed)
+        fast_s, fast = profile(order_time, True, args.steps, args.seed)
+        assert fingerprint(normal) == fingerprint(fast), "fast_forward deve dare le stesse metriche"
+        assert normal.random.getstate() == fast.random.getstate(), "fast_forward deve consumare le stesse estrazioni"
+        print(f"{order_time:>10} {normal_s:>12.2f} {fast_s:>17.2f} {fast.step_saltati / args.steps:>13.0%} "
+              f"{normal_s / fast_s:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Ricerca del rack con spazio libero: ordinamento + scansione lineare contro l'indice per colore.
+
+Simula lo scarico di items su un inventario di 10k rack: ad ogni item si cerca il rack
+più a destra del colore richiesto con spazio libero e lo si riempie di un'unità.
+
+Uso: python benchmarks/bench_find_empty_rack.py [--racks 10000] [--items 2000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from rack import COLORI_RACK, RackStore  # noqa: E402
+
+
+def build_store(num_racks, seed=0):
+    """Inventario con rack disposti a righe, colori casuali e riempimento casuale"""
+    rng = random.Random(seed)
+    side = int(num_racks ** 0.5) + 1
+    positions = [(3 + (i % side), 4 + 2 * (i // side)) for i in range(num_racks)]
+    store = RackStore(positions, [rng.choice(COLORI_RACK) for _ in positions], capienza=15)
+    for pos in positions:
+        store[pos].set_occupazione_corrente(rng.choice((0, 7, 14, 15, 15)))
+    return store
+
+
+def find_empty_rack_sorted(shelves, color):
+    """Versione precedente: ordina tutti gli scaffali per x e scandisce linearmente"""
+    sorted_shelves = sorted(shelves.items(), key=lambda item: item[0][0], reverse=True)
+    for (x, y), rack in sorted_shelves:
+        if rack.get_colore() == color and rack.get_occupazione_corrente() < 15:
+            return (x, y)
+    return None
+
+
+def run(find, store, colors):
+    t0 = time.perf_counter()
+    chosen = []
+    for color in colors:
+        pos = find(store, color)
+        chosen.append(pos)
+        if pos is not None:
+            store[pos].aggiungi_items(1)
+    return time.perf_counter() - t0, chosen
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--racks", type=int, default=10000)
+    parser.add_argument("--items", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    colors = [rng.choice(COLORI_RACK) for _ in range(args.items)]
+
+    scan_time, scan_chosen = run(find_empty_rack_sorted, build_store(args.racks), colors)
+    index_time, index_chosen = run(RackStore.rack_con_spazio, build_store(args.racks), colors)
+
+    assert scan_chosen == index_chosen, "Le due ricerche devono scegliere gli stessi rack"
+    print(f"{args.racks} rack, {args.items} items scaricati")
+    print(f"  ordinamento + scansione: {scan_time / args.items * 1e6:10.1f} us/item")
+    print(f"  indice per colore:       {index_time / args.items * 1e6:10.1f} us/item "
+          f"({scan_time / index_time:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Tempo di avvio a freddo dell'esecuzione headless, confrontato con un obiettivo fisso.
+
+Ogni misura avvia un nuovo interprete che importa headless, costruisce il modello ed
+esegue un solo step; verifica anche che Solara e matplotlib non vengano importati.
+Esce con codice 1 se la mediana supera l'obiettivo.
+
+Uso: python benchmarks/bench_headless_startup.py [--runs 5] [--target 2.0]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# Obiettivo per la mediana del tempo di avvio a freddo, in secondi
+COLD_START_TARGET = 2.0
+
+PROBE = """
+import sys
+import headless
+headless.run(steps=1)
+vietati = sorted({m.split('.')[0] for m in sys.modules} & {'solara', 'matplotlib'})
+if vietati:
+    raise SystemExit('Moduli grafici importati: ' + ', '.join(vietati))
+"""
+
+
+def cold_start() -> float:
+    t0 = time.perf_counter()
+    subprocess.run([sys.executable, "-c", PROBE], cwd=ROOT, check=True)
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--target", type=float, default=COLD_START_TARGET)
+    args = parser.parse_args()
+
+    times = [cold_start() for _ in range(args.runs)]
+    median = statistics.median(times)
+    print(f"Avvio a freddo headless: mediana {median:.2f} s, min {min(times):.2f} s, "
+          f"max {max(times):.2f} s (obiettivo {args.target:.2f} s)")
+    if median > args.target:
+        print("Obiettivo superato")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
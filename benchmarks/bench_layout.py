@@ -0,0 +1,55 @@
+"""Generazione del layout, costruzione del modello e tempo per step al crescere del magazzino.
+
+Ogni blocco 10x10 contiene 50 rack: le griglie di blocchi predefinite danno 100, 1k,
+10k e 100k rack. Il modello usa il routing sui corridoi (le tabelle dei percorsi
+crescono col quadrato delle tracce) e prima della misura esegue alcuni step di
+riscaldamento.
+
+Uso: python benchmarks/bench_layout.py [--blocchi 1x2,4x5,10x20,40x50] [--steps 200]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from headless import build_model  # noqa: E402
+from layout import genera_layout  # noqa: E402
+
+PARAMS = {"routing": "corridor", "order_time": 5, "num_loading_forkLift": 10, "num_unloading_forkLift": 10}
+
+
+def profile(righe, colonne, steps, warmup, seed):
+    t0 = time.perf_counter()
+    layout = genera_layout(righe, colonne)
+    generazione = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    model = build_model(dict(PARAMS, layout=layout), seed)
+    costruzione = time.perf_counter() - t0
+
+    model.run_for(warmup)
+    t0 = time.perf_counter()
+    model.run_for(steps)
+    return layout, generazione, costruzione, (time.perf_counter() - t0) / steps * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--blocchi", default="1x2,4x5,10x20,40x50", help="Righe x colonne di blocchi, separate da virgola")
+    parser.add_argument("--steps", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{'blocchi':>8} {'rack':>7} {'griglia':>8} {'tracce':>7} {'layout (ms)':>12} {'modello (s)':>12} {'us/step':>9}")
+    for blocchi in args.blocchi.split(","):
+        righe, colonne = (int(v) for v in blocchi.split("x"))
+        layout, generazione, costruzione, us = profile(righe, colonne, args.steps, args.warmup, args.seed)
+        print(f"{blocchi:>8} {len(layout.rack_positions):>7} {f'{layout.width}x{layout.height}':>8} "
+              f"{len(layout.tracks):>7} {generazione * 1e3:>12.1f} {costruzione:>12.2f} {us:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
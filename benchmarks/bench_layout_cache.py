@@ -0,0 +1,62 @@
+"""Tempo di costruzione del modello con il layout compilato ad ogni modello, condiviso in
+memoria tra i modelli del processo e caricato dal file mappato in memoria.
+
+"ricompilato" passa ad ogni modello un nuovo LayoutCompilato dello stesso Layout, come
+prima del layout compilato: grafo e tabelle dei percorsi vengono ricalcolati ad ogni
+modello (passando il Layout stesso, i modelli condividono il suo layout compilato). "da file" carica il
+layout compilato dal file ad ogni modello, come il primo modello di un nuovo processo
+(ad esempio un worker di sweep.py) con la cache su disco.
+
+Uso: python benchmarks/bench_layout_cache.py [--models 20] [--blocchi 2x2,4x5]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from compiled_layout import LayoutCompilato  # noqa: E402
+from headless import build_model, fingerprint  # noqa: E402
+from layout import genera_layout  # noqa: E402
+
+
+def profile(crea_layout, n, seed):
+    """Millisecondi per modello e impronta dopo qualche step dell'ultimo modello"""
+    t0 = time.perf_counter()
+    for i in range(n):
+        model = build_model({"layout": crea_layout()}, seed + i)
+    ms = (time.perf_counter() - t0) / n * 1e3
+    model.run_for(200)
+    return ms, fingerprint(model)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--models", type=int, default=20)
+    parser.add_argument("--blocchi", default="2x2,4x5", help="Righe x colonne di blocchi, separate da virgola")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{'blocchi':>8} {'tracce':>7} {'file (KiB)':>11} {'ricompilato (ms)':>17} {'in memoria (ms)':>16} "
+          f"{'da file (ms)':>13}")
+    with tempfile.TemporaryDirectory() as cartella:
+        for blocchi in args.blocchi.split(","):
+            righe, colonne = (int(v) for v in blocchi.split("x"))
+            layout = genera_layout(righe, colonne)
+            condiviso = LayoutCompilato(layout)
+            condiviso.path_tables()
+            path = os.path.join(cartella, f"layout-{blocchi}.bin")
+            condiviso.salva(path)
+
+            ricompilato_ms, atteso = profile(lambda: LayoutCompilato(layout), args.models, args.seed)
+            memoria_ms, impronta_memoria = profile(lambda: condiviso, args.models, args.seed)
+            file_ms, impronta_file = profile(lambda: LayoutCompilato.carica(path), args.models, args.seed)
+            assert atteso == impronta_memoria == impronta_file, "Il layout compilato deve dare le stesse metriche"
+            print(f"{blocchi:>8} {len(layout.tracks):>7} {os.path.getsize(path) / 1024:>11.0f} "
+                  f"{ricompilato_ms:>17.1f} {memoria_ms:>16.1f} {file_ms:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Tempo per frame della mappa della dashboard: disegno completo ad ogni frame contro
+sfondo statico in cache con le sole etichette di occupazione aggiornate.
+
+Ogni frame è misurato come nella dashboard di Mesa: nuova Figure, post_process sugli
+assi e rendering PNG. Il disegno vecchio (un rettangolo e un testo per rack, una
+linea per corridoio e le zone di standby) è ricostruito qui, con gli stessi artisti
+di post_process_space prima della cache. Tra un frame e l'altro il modello avanza
+di alcuni step, così le occupazioni cambiano.
+
+Uso: python benchmarks/bench_map_render.py [--frames 30] [--steps-per-frame 5]
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from matplotlib import patches  # noqa: E402
+from matplotlib.figure import Figure  # noqa: E402
+
+from headless import build_model  # noqa: E402
+from warehouse_render import mappa_magazzino  # noqa: E402
+
+
+def post_process_vecchio(ax, model):
+    """Disegno della mappa da zero, come faceva post_process_space"""
+    shelves = model.shelves
+    for i, (x, y) in enumerate(shelves.positions):
+        ax.add_patch(patches.Rectangle((x - 0.45, y - 0.45), 0.92, 0.92, linewidth=1, edgecolor='black',
+                                       facecolor=shelves.colori[shelves.colore[i]], alpha=0.7, zorder=1))
+        ax.text(x, y, f"{shelves.occupazione[i]}", ha='center', va='center',
+                fontsize=5.3, fontweight='bold', color='black', zorder=2)
+
+    start_x, start_y, block_size, spacing = 3, 4, 10, 3
+    right, top = model.width - 2, model.height - 2
+    stile = dict(color='gray', alpha=0.6, zorder=0.5)
+    for y in ((start_y + block_size + spacing / 2) - 0.5, top, start_y - 3):
+        ax.plot([start_x - 2, right], [y, y], linewidth=2, **stile)
+    for dy in range(1, block_size, 2):
+        for y in (start_y + block_size + spacing + dy, start_y + dy):
+            ax.plot([start_x - 2, right], [y, y], linewidth=1, **stile)
+    for x in ((start_x + block_size + spacing / 2) - 0.5, start_x - 2, right):
+        ax.plot([x, x], [start_y - 3, top], linewidth=2, **stile)
+
+    for cx, cy in ((28, 28), (14, 1)):
+        ax.add_patch(patches.Rectangle((cx - 1.45, cy - 1.45), 0.92 * 3, 0.92 * 3, linewidth=1.5,
+                                       edgecolor='lightgray', facecolor='lightgray', alpha=0.7, zorder=1))
+
+
+def post_process_cache(ax, model):
+    mappa_magazzino(model).disegna(ax)
+
+
+def frame(model, post_process):
+    """Un frame come SpaceMatplotlib: Figure nuova, post_process e PNG"""
+    fig = Figure()
+    ax = fig.add_subplot()
+    ax.set_xlim(-0.5, model.width - 0.5)
+    ax.set_ylim(-0.5, model.height - 0.5)
+    ax.set_aspect("equal")
+    ax.set_xticks([])
+    ax.set_yticks([])
+    post_process(ax, model)
+    fig.savefig(io.BytesIO(), format="png", bbox_inches="tight")
+
+
+def profile(post_process, frames, steps_per_frame, seed):
+    model = build_model({}, seed)
+    frame(model, post_process)  # Il primo frame costruisce la cache
+    t0 = time.perf_counter()
+    for _ in range(frames):
+        model.run_for(steps_per_frame)
+        frame(model, post_process)
+    return (time.perf_counter() - t0) / frames * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--frames", type=int, default=30)
+    parser.add_argument("--steps-per-frame", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    mappa_magazzino(build_model({}, args.seed))
+    costruzione_ms = (time.perf_counter() - t0) * 1e3
+
+    vecchio_ms = profile(post_process_vecchio, args.frames, args.steps_per_frame, args.seed)
+    cache_ms = profile(post_process_cache, args.frames, args.steps_per_frame, args.seed)
+    print(f"{'disegno':>22} {'ms/frame':>10}")
+    print(f"{'completo':>22} {vecchio_ms:>10.1f}")
+    print(f"{'sfondo in cache':>22} {cache_ms:>10.1f}")
+    print(f"speedup {vecchio_ms / cache_ms:.2f}x, costruzione della cache (modello incluso) {costruzione_ms:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Memoria per step registrato: vecchio dizionario di liste contro MetricsRecorder colonnare.
+
+Verifica anche che l'esportazione in .npz ricarichi gli stessi valori. La crescita di
+BYTES_PER_STEP byte per step (a meno della capacità di riserva) è verificata in
+tests/test_metrics_recorder.py.
+
+Uso: python benchmarks/bench_metrics_recorder.py [--steps 100000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import numpy as np  # noqa: E402
+
+from metrics_recorder import BYTES_PER_STEP, COLORI_DISTRIBUZIONE, SCHEMA, MetricsRecorder  # noqa: E402
+
+
+def fake_row(step):
+    """Riga sintetica con valori plausibili, nell'ordine dello SCHEMA"""
+    colori = [(step * (k + 3)) % 700 for k in range(len(COLORI_DISTRIBUZIONE))]
+    return (step, step % 100 + 0.5, step // 7, step // 9, step % 3, step % 2,
+            step % 4, step % 5, step % 11, step % 13, step / 3, step / 7, *colori)
+
+
+def record_lists(steps):
+    """Il vecchio data_collector: una lista per metrica e un dizionario per step"""
+    data = {}
+    names = [name for name, _ in SCHEMA if not name.startswith("colore_")]
+    for step in range(steps):
+        row = fake_row(step)
+        for name, value in zip(names, row):
+            data.setdefault(name, []).append(value)
+        distribuzione = dict(zip(COLORI_DISTRIBUZIONE, row[len(names):]))
+        data.setdefault("distribuzione_colori", []).append(distribuzione)
+    return data
+
+
+def record_columns(steps):
+    recorder = MetricsRecorder()
+    for step in range(steps):
+        recorder.append(*fake_row(step))
+    return recorder
+
+
+def measure(build):
+    tracemalloc.start()
+    obj = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, current
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--steps", type=int, default=100000)
+    args = parser.parse_args()
+
+    _, list_bytes = measure(lambda: record_lists(args.steps))
+    recorder, column_bytes = measure(lambda: record_columns(args.steps))
+
+    print(f"{args.steps} step registrati")
+    print(f"  dizionario di liste: {list_bytes / 1e6:8.2f} MB ({list_bytes / args.steps:7.1f} byte/step)")
+    print(f"  MetricsRecorder:     {column_bytes / 1e6:8.2f} MB ({column_bytes / args.steps:7.1f} byte/step, "
+          f"{BYTES_PER_STEP} byte/step di dati)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "metriche.npz")
+        recorder.to_npz(path)
+        reloaded = MetricsRecorder.from_npz(path)
+        assert all(np.array_equal(recorder[name], reloaded[name]) for name in recorder.names)
+        assert recorder["distribuzione_colori"][-1] == reloaded["distribuzione_colori"][-1]
+        print(f"  .npz: {os.path.getsize(path) / 1e6:8.2f} MB su disco, ricaricato identico")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Memoria per ordine e allocazioni nel ciclo di dispatch: Order a dizionario contro Order compatto.
+
+La vecchia rappresentazione (dizionario {OrderColor: int} copiato ad ogni
+get_tutte_capacita) è ricostruita qui solo per il confronto.
+
+Uso: python benchmarks/bench_order.py [--orders 10000] [--calls 100000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from order import Order, OrderColor  # noqa: E402
+
+
+class DictOrder:
+    """Order come era prima: dizionario per colore e copia ad ogni lettura"""
+
+    def __init__(self, capacita_totale, rng):
+        self._capacita_totale = capacita_totale
+        colori = list(OrderColor)
+        divisione = {}
+        capacita_rimanente = capacita_totale
+        for i in range(4):
+            if capacita_rimanente > 1:
+                valore = rng.randint(0, capacita_rimanente - (4 - i))
+                divisione[colori[i]] = valore
+                capacita_rimanente -= valore
+            else:
+                divisione[colori[i]] = 0
+        divisione[colori[4]] = capacita_rimanente
+        self._capacita_per_colore = divisione
+        self.step_inizio = None
+        self.step_fine = None
+
+    def get_tutte_capacita(self):
+        return self._capacita_per_colore.copy()
+
+
+def memory_per_order(factory, n):
+    rng = random.Random(0)
+    tracemalloc.start()
+    orders = [factory(rng.randint(5, 10), rng) for _ in range(n)]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # Esclude la lista che contiene gli ordini
+    return (current - sys.getsizeof(orders)) / n
+
+
+def dispatch(order, calls, available):
+    """Il lavoro del dispatch: colori con quantità positiva e scelta di uno di essi"""
+    rng = random.Random(0)
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    for _ in range(calls):
+        rng.choice(available(order))
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed / calls * 1e9, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--orders", type=int, default=10000)
+    parser.add_argument("--calls", type=int, default=100000)
+    args = parser.parse_args()
+
+    old = memory_per_order(DictOrder, args.orders)
+    new = memory_per_order(Order, args.orders)
+    print(f"Memoria per ordine: dizionario {old:6.0f} byte, compatto {new:6.0f} byte ({old / new:.1f}x)")
+
+    rng = random.Random(1)
+    old_ns, old_peak = dispatch(DictOrder(8, rng), args.calls,
+                                lambda o: [c for c, q in o.get_tutte_capacita().items() if q > 0])
+    new_ns, new_peak = dispatch(Order(8, rng), args.calls, Order.colori_disponibili)
+    print(f"Dispatch: dizionario {old_ns:6.0f} ns/chiamata (picco {old_peak} byte), "
+          f"compatto {new_ns:6.0f} ns/chiamata (picco {new_peak} byte)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Tempo per step al crescere della coda degli ordini: dispatch FIFO con pool di dock liberi
+contro la vecchia scansione di tutta la coda (ricostruita qui per il confronto).
+
+Con un ordine per step e un solo dock per tipo le code crescono di circa un ordine per step.
+
+Uso: python benchmarks/bench_order_queue.py [--steps 4000] [--window 500]
+"""
+import argparse
+import os
+import sys
+import time
+import types
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from headless import build_model, fingerprint  # noqa: E402
+
+PARAMS = {"order_time": 1, "num_loading": 1, "num_unloading": 1,
+          "num_loading_forkLift": 2, "num_unloading_forkLift": 2}
+
+
+def scan_queue(queue, docks):
+    """Vecchio dispatch: copia della coda, tutti i dock per ogni ordine, remove per ordine assegnato"""
+    orders_to_remove = []
+    for order in list(queue):
+        for dock in docks:
+            if dock.receive_order(order):
+                orders_to_remove.append(order)
+                break
+    for order in orders_to_remove:
+        queue.remove(order)
+
+
+def with_scan(model):
+    model.process_loading_order_queue = types.MethodType(
+        lambda self: scan_queue(self.loading_order_queue, self.loading_docks), model)
+    model.process_unloading_order_queue = types.MethodType(
+        lambda self: scan_queue(self.unloading_order_queue, self.unloading_docks), model)
+    return model
+
+
+def profile(model, steps, window):
+    rows = []
+    for start in range(0, steps, window):
+        t0 = time.perf_counter()
+        for _ in range(window):
+            model.step()
+        rows.append((len(model.loading_order_queue) + len(model.unloading_order_queue),
+                     (time.perf_counter() - t0) / window * 1e6))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--steps", type=int, default=4000)
+    parser.add_argument("--window", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    pool = build_model(PARAMS, args.seed)
+    scan = with_scan(build_model(PARAMS, args.seed))
+    pool_rows = profile(pool, args.steps, args.window)
+    scan_rows = profile(scan, args.steps, args.window)
+    assert fingerprint(pool) == fingerprint(scan), "I due dispatch devono dare la stessa traiettoria"
+
+    print(f"{'ordini in coda':>15} {'pool (us/step)':>15} {'scansione (us/step)':>20}")
+    for (depth, pool_us), (_, scan_us) in zip(pool_rows, scan_rows):
+        print(f"{depth:>15} {pool_us:>15.1f} {scan_us:>20.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""Statistiche della cache dei percorsi al variare della dimensione massima, per dimensionarla.
+
+Uso: python benchmarks/bench_path_cache.py [--steps 1000] [--forklifts 10]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from headless import build_model  # noqa: E402
+
+
+def run(cache_size, steps, num_forklifts, routing, seed=42):
+    """Esegue il modello con il seed dato e ritorna le statistiche della cache"""
+    model = build_model({
+        "num_loading": 3,
+        "num_unloading": 3,
+        "dock_capacity": 10,
+        "order_time": 5,
+        "num_loading_forkLift": num_forklifts,
+        "num_unloading_forkLift": num_forklifts,
+        "routing": routing,
+        "path_cache_size": cache_size,
+    }, seed)
+    for _ in range(steps):
+        model.step()
+    return model.path_cache.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--steps", type=int, default=1000)
+    parser.add_argument("--forklifts", type=int, default=10)
+    parser.add_argument("--routing", default="astar")
+    args = parser.parse_args()
+
+    print(f"{'maxsize':>8} {'hit rate':>9} {'hits':>7} {'misses':>7} {'evictions':>10} {'risparmio (ms)':>15}")
+    for cache_size in (16, 64, 256, 1024):
+        stats = run(cache_size, args.steps, args.forklifts, args.routing)
+        print(f"{cache_size:>8} {stats['hit_rate']:>9.1%} {stats['hits']:>7} {stats['misses']:>7} "
+              f"{stats['evictions']:>10} {stats['time_saved'] * 1000:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Benchmark: step/s del modello con A* ad ogni richiesta contro le tabelle dei percorsi precalcolate.
+
+Uso: python benchmarks/bench_path_tables.py [--steps 300]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from headless import build_model  # noqa: E402
+
+
+def run(num_forklifts, steps, routing, compact=False, seed=42):
+    """Esegue il modello con num_forklifts muletti per tipo e ritorna (step/s, tempo di costruzione)"""
+    t0 = time.perf_counter()
+    model = build_model({
+        "num_loading": 5,
+        "num_unloading": 5,
+        "dock_capacity": 10,
+        "order_time": 5,
+        "num_loading_forkLift": num_forklifts,
+        "num_unloading_forkLift": num_forklifts,
+        "routing": routing,
+        "compact_path_tables": compact,
+    }, seed)
+    build = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for _ in range(steps):
+        model.step()
+    elapsed = time.perf_counter() - t0
+    return steps / elapsed, build
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--steps", type=int, default=300)
+    args = parser.parse_args()
+
+    # Il modello richiede almeno un muletto per tipo: i conteggi sono per tipo
+    print(f"{'muletti':>8} {'routing':>16} {'step/s':>10} {'costruzione (s)':>16}")
+    for num_forklifts in (1, 10, 50):
+        for routing, compact in (("astar", False), ("tables", False), ("tables", True)):
+            label = routing + (" (numpy)" if compact else "")
+            steps_per_sec, build = run(num_forklifts, args.steps, routing, compact)
+            print(f"{num_forklifts:>8} {label:>16} {steps_per_sec:>10.1f} {build:>16.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Tempo per frame dei grafici delle prestazioni al crescere della storia registrata:
+figura 4x2 ricreata con tutte le serie ad ogni frame contro figura persistente con
+serie ridotte a min/max e aggiornate solo con le righe nuove.
+
+La storia è sintetica (valori casuali a blocchi scritti nel registro delle metriche
+di un modello reale); tra un frame e l'altro si registrano ``--steps-per-frame`` righe nuove.
+Ogni frame termina con il rendering PNG, come nella dashboard. Il disegno vecchio è
+ricostruito qui come era in create_warehouse_plots; le sue figure vengono chiuse dopo
+la misura (la dashboard invece le lasciava aperte).
+
+Uso: python benchmarks/bench_plots.py [--lengths 1000,100000,1000000] [--frames 5]
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import numpy as np  # noqa: E402
+from matplotlib import pyplot as plt  # noqa: E402
+
+from headless import build_model  # noqa: E402
+from metrics_recorder import SCHEMA, MetricsRecorder  # noqa: E402
+from warehouse_plots import COLORI_TORTA, GRAFICI, grafici_magazzino  # noqa: E402
+
+BLOCCO = 50  # Righe con gli stessi valori nella storia sintetica
+
+
+def registra(recorder, rng, righe):
+    """Aggiunge righe sintetiche al registro, a blocchi di valori costanti"""
+    while righe > 0:
+        n = min(BLOCCO, righe)
+        valori = [float(rng.uniform(0, 100)) if np.dtype(dtype).kind == "f" else int(rng.integers(0, 10))
+                  for _, dtype in SCHEMA[1:]]
+        recorder.append_repeated(n, recorder.rows, *valori)
+        righe -= n
+
+
+def grafici_vecchi(model):
+    """Figura ricreata da zero con tutte le serie, come faceva create_warehouse_plots"""
+    rec = model.data_collector
+    fig, axes = plt.subplots(4, 2, figsize=(15, 20))
+    fig.suptitle('Analisi Prestazioni Warehouse', fontsize=16, fontweight='bold')
+    steps = rec['step']
+    derivate = {'dock_carico_occupati': [len(model.loading_docks) - liberi for liberi in rec['dock_carico_liberi']],
+                'dock_scarico_occupati': [len(model.unloading_docks) - liberi for liberi in rec['dock_scarico_liberi']]}
+    for i, (titolo, ylabel, colonne) in enumerate(GRAFICI):
+        ax = axes[i // 2, i % 2]
+        for colonna, colore, etichetta in colonne:
+            valori = derivate[colonna] if colonna in derivate else rec[colonna]
+            ax.plot(steps, valori, color=colore, linewidth=2, label=etichetta)
+        ax.set_title(titolo)
+        ax.set_xlabel('Step')
+        ax.set_ylabel(ylabel)
+        ax.grid(True, alpha=0.3)
+        ax.legend()
+    distribuzione = rec['distribuzione_colori'][-1]
+    colori = [colore for colore, count in distribuzione.items() if count > 0]
+    axes[3, 0].pie([distribuzione[c] for c in colori], labels=colori, autopct='%1.1f%%',
+                   colors=[COLORI_TORTA[c] for c in colori])
+    axes[3, 0].set_title("Distribuzione pacchi per colore (con spazio vuoto)")
+    axes[3, 1].axis('off')
+    plt.tight_layout()
+    return fig
+
+
+def grafici_nuovi(model):
+    return grafici_magazzino(model).fig
+
+
+def profile(crea_figura, lunghezza, frames, steps_per_frame, seed):
+    model = build_model({}, seed)
+    rng = np.random.default_rng(seed)
+    model.data_collector = MetricsRecorder()
+    registra(model.data_collector, rng, lunghezza)
+    crea_figura(model)  # Il primo frame costruisce la figura persistente
+    plt.close("all")
+    t0 = time.perf_counter()
+    for _ in range(frames):
+        registra(model.data_collector, rng, steps_per_frame)
+        crea_figura(model).savefig(io.BytesIO(), format="png")
+    ms = (time.perf_counter() - t0) / frames * 1e3
+    plt.close("all")
+    return ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lengths", default="1000,100000,1000000", help="Step registrati, separati da virgola")
+    parser.add_argument("--frames", type=int, default=5)
+    parser.add_argument("--steps-per-frame", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{'step registrati':>16} {'ricreata (ms/frame)':>20} {'incrementale (ms/frame)':>24} {'speedup':>8}")
+    for lunghezza in (int(v) for v in args.lengths.split(",")):
+        vecchio_ms = profile(grafici_vecchi, lunghezza, args.frames, args.steps_per_frame, args.seed)
+        nuovo_ms = profile(grafici_nuovi, lunghezza, args.frames, args.steps_per_frame, args.seed)
+        print(f"{lunghezza:>16} {vecchio_ms:>20.1f} {nuovo_ms:>24.1f} {vecchio_ms / nuovo_ms:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Tempo di selezione/prenotazione di un rack con merce al crescere del magazzino.
+
+Confronta la vecchia scansione dell'intero inventario con la coda per colore di RackStore.
+
+Uso: python benchmarks/bench_rack_reservations.py [--picks 2000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from rack import COLORI_RACK, RackStore  # noqa: E402
+
+
+def build_store(num_racks, seed=0):
+    """Inventario con metà dei rack vuoti; i rack pieni sono in fondo, come nel caso peggiore"""
+    rng = random.Random(seed)
+    positions = [(i % 1000, 2 * (i // 1000)) for i in range(num_racks)]
+    store = RackStore(positions, [rng.choice(COLORI_RACK) for _ in positions], capienza=15)
+    for pos in positions[num_racks // 2:]:
+        store[pos].set_occupazione_corrente(15)
+        store[pos].set_occupazione_temp(15)
+    store.ricostruisci_indici()
+    return store
+
+
+def find_rack_with_items_scan(shelves, color):
+    """Versione precedente: scansione dell'intero inventario ad ogni richiesta"""
+    for pos, rack in shelves.items():
+        if rack.get_colore() == color and rack.get_occupazione_corrente() > 0 and rack.get_occupazione_temp() > 0:
+            rack.set_occupazione_temp(rack.get_occupazione_temp() - 1)
+            return pos
+    return None
+
+
+def run(pick, store, colors):
+    t0 = time.perf_counter()
+    for color in colors:
+        pick(store, color)
+    return (time.perf_counter() - t0) / len(colors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--picks", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    colors = [rng.choice(COLORI_RACK) for _ in range(args.picks)]
+
+    print(f"{'rack':>8} {'scansione (us)':>15} {'coda (us)':>10} {'rilascio (us)':>14}")
+    for num_racks in (1000, 10000, 100000):
+        scan = run(find_rack_with_items_scan, build_store(num_racks), colors[:200])
+        store = build_store(num_racks)
+        queue = run(RackStore.prenota, store, colors)
+
+        reserved = [pos for pos in store.positions if store[pos].get_occupazione_temp() < 15
+                    and store[pos].get_occupazione_corrente() == 15][:args.picks]
+        t0 = time.perf_counter()
+        for pos in reserved:
+            store.rilascia(pos)
+        release = (time.perf_counter() - t0) / max(len(reserved), 1)
+        print(f"{num_racks:>8} {scan * 1e6:>15.1f} {queue * 1e6:>10.2f} {release * 1e6:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
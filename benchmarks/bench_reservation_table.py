@@ -0,0 +1,99 @@
+"""Costo di pianificazione per viaggio con i percorsi cooperativi, al crescere della flotta.
+
+Per ogni flotta esegue la simulazione con cooperative=True e riporta il tempo medio
+di una ricerca A* spazio-tempo, i nodi espansi, le ricerche senza percorso libero e
+quelle con partenza o destinazione fuori dalle tracce (entrambe ripiegano sul percorso
+minimo non prenotato) e le celle prenotate nella tabella a fine run, che restano
+limitate dall'orizzonte dei bucket.
+
+Conta anche i conflitti tra muletti che seguono esattamente il percorso prenotato:
+due muletti nella stessa cella (escluse partenze e destinazioni, che sono condivise) e
+scambi di cella tra due step. Con le prenotazioni entrambi devono restare a zero.
+
+Uso: python benchmarks/bench_reservation_table.py [--steps 2000] [--fleets 5,25,50,75]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from forkLift import ForkLift  # noqa: E402
+from headless import build_model  # noqa: E402
+
+PARAMS = {"num_loading": 5, "num_unloading": 5, "order_time": 2, "cooperative": True}
+
+
+def in_orario(model, forklifts):
+    """{muletto: (cella, partenza, destinazione)} dei muletti nella cella prenotata per questo step"""
+    table = model.reservation_table
+    index = table.graph.index
+    risultato = {}
+    for forklift in forklifts:
+        attiva = table._attive.get(forklift.unique_id)
+        if attiva is None:
+            continue
+        nodes, t0 = attiva
+        i = model.steps - t0
+        node = index.get(forklift.pos)
+        if 0 <= i < len(nodes) and node == nodes[i]:
+            risultato[forklift] = (node, nodes[0], nodes[-1])
+    return risultato
+
+
+def conta_conflitti(precedenti, attuali):
+    """Collisioni nella stessa cella e scambi di cella tra i muletti in orario in due step consecutivi"""
+    collisioni = scambi = 0
+    celle = {}
+    for forklift, (node, partenza, arrivo) in attuali.items():
+        altro = celle.setdefault(node, forklift)
+        if altro is not forklift and node not in (partenza, arrivo) + attuali[altro][1:]:
+            collisioni += 1
+    for forklift, (node, _, _) in attuali.items():
+        prima = precedenti.get(forklift)
+        if prima is None or prima[0] == node:
+            continue
+        for altro, (node_altro, _, _) in attuali.items():
+            if altro.unique_id > forklift.unique_id and node_altro == prima[0] \
+                    and precedenti.get(altro, (None,))[0] == node:
+                scambi += 1
+    return collisioni, scambi
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--steps", type=int, default=2000)
+    parser.add_argument("--fleets", default="5,25,50,75", help="Muletti per tipo, separati da virgola")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{'muletti':>8} {'viaggi':>7} {'us/viaggio':>11} {'espansioni':>11} {'senza percorso':>15} "
+          f"{'fuori tracce':>13} {'celle prenotate':>16} {'us/step':>8} {'collisioni':>11} {'scambi':>7}")
+    for n in (int(v) for v in args.fleets.split(",")):
+        model = build_model(dict(PARAMS, num_loading_forkLift=n, num_unloading_forkLift=n), args.seed)
+        t0 = time.perf_counter()
+        model.run_for(args.steps)
+        us_step = (time.perf_counter() - t0) / args.steps * 1e6
+
+        # Conflitti: stessa run, controllata step per step
+        controllato = build_model(dict(PARAMS, num_loading_forkLift=n, num_unloading_forkLift=n), args.seed)
+        forklifts = [agent for agent in controllato.agents if isinstance(agent, ForkLift)]
+        collisioni = scambi = 0
+        precedenti = {}
+        for _ in range(args.steps):
+            controllato.run_for(1)
+            attuali = in_orario(controllato, forklifts)
+            c, s = conta_conflitti(precedenti, attuali)
+            collisioni, scambi, precedenti = collisioni + c, scambi + s, attuali
+
+        table = model.reservation_table
+        plans = max(table.pianificazioni, 1)
+        print(f"{2 * n:>8} {table.pianificazioni:>7} {table.tempo_pianificazione / plans * 1e6:>11.1f} "
+              f"{table.espansioni / plans:>11.1f} {table.fallimenti / plans:>15.1%} "
+              f"{table.fuori_tracce / plans:>13.1%} {table.voci():>16} {us_step:>8.1f} "
+              f"{collisioni:>11} {scambi:>7}")
+
+
+if __name__ == "__main__":
+    main()
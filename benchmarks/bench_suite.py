@@ -0,0 +1,307 @@
+"""Suite di benchmark riproducibile del throughput della simulazione.
+
+Esegue una matrice di configurazioni attorno a una configurazione base, variando un
+asse alla volta: dimensione della griglia, numero di rack (layout generati, con il
+routing sui corridoi perché le tabelle dei percorsi crescono col quadrato delle tracce),
+numero di muletti (da 2 a 100), numero di dock e order_time. Ogni configurazione gira
+in un nuovo interprete con seed fisso (la base, che compare in tutti gli assi, viene
+misurata una volta sola) e misura:
+
+- step al secondo (mediana di almeno ``--ripetizioni`` esecuzioni, ripetute finché non
+  si misurano almeno ``--tempo-minimo`` secondi) e rumore, cioè la
+  differenza relativa tra la ripetizione più veloce e la più lenta;
+- tempo medio per step di ogni fase di WarehouseModel.step (ordini, dispatch, muletti,
+  metriche) e del simulatore fuori dagli step (arrivi dei muletti con travel="events");
+- picco di memoria del processo e crescita rispetto all'avvio;
+- impronta delle metriche, che deve essere la stessa in tutte le ripetizioni.
+
+I risultati vanno in un file JSON; compare li confronta con un baseline salvato, segnala
+le configurazioni con metriche diverse e i peggioramenti oltre la soglia, ed esce con
+codice 1 se ci sono peggioramenti. Un peggioramento conta solo se anche la ripetizione
+più veloce della nuova run è più lenta della più lenta del baseline: sulle macchine
+condivise il throughput di due run identiche può differire del 10-20%.
+
+Uso: python benchmarks/bench_suite.py run --output risultati.json [--steps 5000] [--assi muletti,dock]
+     python benchmarks/bench_suite.py compare baseline.json risultati.json [--soglia 0.1]
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+VERSIONE = 1
+
+# Configurazione base: le altre ne cambiano un asse alla volta
+BASE = {"width": 30, "height": 30, "num_unloading": 2, "num_loading": 2, "order_time": 5,
+        "num_unloading_forkLift": 5, "num_loading_forkLift": 5}
+
+# Asse -> [(etichetta, parametri che sostituiscono quelli della base)]. "layout" sono le
+# righe e colonne di blocchi passate a genera_layout (50 rack per blocco)
+ASSI = {
+    "griglia": [(f"{n}x{n}", {"width": n, "height": n}) for n in (30, 60, 120)],
+    "rack": [(str(righe * colonne * 50), {"layout": [righe, colonne], "routing": "corridor"})
+             for righe, colonne in ((1, 2), (2, 2), (4, 5), (10, 20))],
+    "muletti": [(str(n), {"num_unloading_forkLift": n // 2, "num_loading_forkLift": n - n // 2})
+                for n in (2, 10, 50, 100)],
+    "dock": [(str(2 * n), {"num_unloading": n, "num_loading": n}) for n in (1, 2, 4, 8)],
+    "order_time": [(str(n), {"order_time": n}) for n in (2, 5, 10, 40)],
+    "viaggi": [("events", {"travel": "events", "num_unloading_forkLift": 25, "num_loading_forkLift": 25})],
+}
+
+FASI = ("ordini", "dispatch", "muletti", "metriche", "simulatore")
+
+
+def configurazioni(assi):
+    """Configurazioni da misurare: [(nome, parametri)], la base una volta sola e per prima"""
+    risultato = [("base", dict(BASE))]
+    for asse in assi:
+        for etichetta, params in ASSI[asse]:
+            params = dict(BASE, **params)
+            if params != BASE:
+                risultato.append((f"{asse}={etichetta}", params))
+    return risultato
+
+
+# Misura di una configurazione, eseguita in un nuovo interprete
+def _picco_kib() -> int:
+    picco = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return picco // 1024 if sys.platform == "darwin" else picco  # Byte su macOS, KiB su Linux
+
+
+def _cronometra(tempi, fase, fn):
+    def cronometrata(*args, **kwargs):
+        t0 = time.perf_counter()
+        risultato = fn(*args, **kwargs)
+        tempi[fase] += time.perf_counter() - t0
+        return risultato
+    return cronometrata
+
+
+def strumenta(model):
+    """Cronometra le fasi dello step del modello; ritorna i tempi totali in secondi, aggiornati ad ogni step"""
+    from forkLift import LoadingForkLift, UnloadingForkLift
+
+    tempi = dict.fromkeys(("step", "dispatch", "muletti", "metriche"), 0.0)
+    # model.step resta quello confrontato dal simulatore: si cronometra lo step dell'utente
+    model._user_step = _cronometra(tempi, "step", model._user_step)
+    model.dispatcher.dispatch = _cronometra(tempi, "dispatch", model.dispatcher.dispatch)
+    model.collect_data = _cronometra(tempi, "metriche", model.collect_data)
+    for tipo in (UnloadingForkLift, LoadingForkLift):
+        agenti = model.agents_by_type[tipo]
+        agenti.shuffle_do = _cronometra(tempi, "muletti", agenti.shuffle_do)
+    return tempi
+
+
+def misura(params, steps, warmup, ripetizioni, tempo_minimo, seed):
+    from compiled_layout import LayoutCompilato
+    from headless import build_model, fingerprint
+    from layout import genera_layout
+
+    rss_iniziale = _picco_kib()
+    params = dict(params)
+    t0 = time.perf_counter()
+    if "layout" in params:
+        params["layout"] = LayoutCompilato(genera_layout(*params["layout"]))
+    model = build_model(params, seed)
+    costruzione = time.perf_counter() - t0
+
+    # Fasi: una esecuzione cronometrata dopo il riscaldamento
+    model.run_for(warmup)
+    tempi = strumenta(model)
+    t0 = time.perf_counter()
+    model.run_for(steps)
+    totale = time.perf_counter() - t0
+    fasi = {
+        "ordini": tempi["step"] - tempi["dispatch"] - tempi["muletti"] - tempi["metriche"],
+        "dispatch": tempi["dispatch"],
+        "muletti": tempi["muletti"],
+        "metriche": tempi["metriche"],
+        "simulatore": totale - tempi["step"],
+    }
+    impronta = fingerprint(model)
+    dimensioni = {"griglia": [model.width, model.height], "rack": len(model.shelves), "tracce": len(model.tracks),
+                  "muletti": model.num_unloading_forkLift + model.num_loading_forkLift,
+                  "dock": len(model.loading_docks) + len(model.unloading_docks)}
+    del model
+    gc.collect()
+
+    # Throughput: più esecuzioni senza cronometri, con lo stesso seed
+    durate = []
+    while len(durate) < ripetizioni or sum(durate) < tempo_minimo:
+        model = build_model(params, seed)
+        model.run_for(warmup)
+        t0 = time.perf_counter()
+        model.run_for(steps)
+        durata = time.perf_counter() - t0
+        if fingerprint(model) != impronta:
+            raise RuntimeError("Metriche diverse con lo stesso seed")
+        durate.append(durata)
+        del model
+        gc.collect()
+
+    picco = _picco_kib()
+    mediana = statistics.median(durate)
+    return dict(dimensioni, **{
+        "steps_al_secondo": steps / mediana,
+        "steps_al_secondo_min": steps / max(durate),
+        "steps_al_secondo_max": steps / min(durate),
+        "rumore": (max(durate) - min(durate)) / mediana,
+        "ripetizioni": len(durate),
+        "us_per_step": mediana / steps * 1e6,
+        "fasi_us_per_step": {fase: fasi[fase] / steps * 1e6 for fase in FASI},
+        "costruzione_s": costruzione,
+        "memoria_picco_mib": picco / 1024,
+        "memoria_crescita_mib": (picco - rss_iniziale) / 1024,
+        "impronta": impronta,
+    })
+
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, check=True,
+                              capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _ambiente():
+    import mesa
+    import numpy
+    return {
+        "python": platform.python_version(),
+        "mesa": mesa.__version__,
+        "numpy": numpy.__version__,
+        "piattaforma": platform.platform(),
+        "cpu": os.cpu_count(),
+        "commit": _commit(),
+    }
+
+
+def esegui(args):
+    nomi_assi = args.assi.split(",") if args.assi else list(ASSI)
+    sconosciuti = [asse for asse in nomi_assi if asse not in ASSI]
+    if sconosciuti:
+        raise SystemExit(f"Assi sconosciuti: {', '.join(sconosciuti)} (disponibili: {', '.join(ASSI)})")
+
+    risultati = []
+    print(f"{'configurazione':>20} {'step/s':>9} {'rumore':>7} {'us/step':>9} "
+          + " ".join(f"{fase + ' (us)':>15}" for fase in FASI) + f" {'memoria (MiB)':>14}")
+    t_inizio = time.perf_counter()
+    for nome, params in configurazioni(nomi_assi):
+        richiesta = json.dumps({"params": params, "steps": args.steps, "warmup": args.warmup,
+                                "ripetizioni": args.ripetizioni, "tempo_minimo": args.tempo_minimo,
+                                "seed": args.seed})
+        uscita = subprocess.run([sys.executable, os.path.abspath(__file__), "misura", richiesta], cwd=ROOT,
+                                check=True, capture_output=True, text=True).stdout
+        risultato = dict(nome=nome, params=params, **json.loads(uscita.splitlines()[-1]))
+        risultati.append(risultato)
+        fasi = risultato["fasi_us_per_step"]
+        print(f"{nome:>20} {risultato['steps_al_secondo']:>9.0f} {risultato['rumore']:>7.1%} "
+              f"{risultato['us_per_step']:>9.1f} "
+              + " ".join(f"{fasi[fase]:>15.1f}" for fase in FASI) + f" {risultato['memoria_crescita_mib']:>14.1f}")
+
+    documento = {
+        "versione": VERSIONE,
+        "creato": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "ambiente": _ambiente(),
+        "parametri": {"steps": args.steps, "warmup": args.warmup, "ripetizioni": args.ripetizioni,
+                      "tempo_minimo": args.tempo_minimo, "seed": args.seed, "base": BASE},
+        "risultati": risultati,
+    }
+    with open(args.output, "w") as f:
+        json.dump(documento, f, indent=2)
+    print(f"{len(risultati)} configurazioni in {time.perf_counter() - t_inizio:.0f} s, risultati in {args.output}")
+
+
+def confronta(args):
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.attuale) as f:
+        attuale = json.load(f)
+    if baseline["parametri"]["steps"] != attuale["parametri"]["steps"] \
+            or baseline["parametri"]["seed"] != attuale["parametri"]["seed"]:
+        print("Attenzione: steps o seed diversi tra baseline e risultati, le impronte non sono confrontabili")
+
+    precedenti = {r["nome"]: r for r in baseline["risultati"]}
+    peggiorati = 0
+    print(f"{'configurazione':>20} {'baseline (step/s)':>18} {'attuale (step/s)':>17} {'variazione':>11} "
+          f"{'memoria (MiB)':>14} {'esito':>16}")
+    for risultato in attuale["risultati"]:
+        nome = risultato["nome"]
+        precedente = precedenti.get(nome)
+        if precedente is None:
+            print(f"{nome:>20} {'-':>18} {risultato['steps_al_secondo']:>17.0f} {'-':>11} "
+                  f"{risultato['memoria_crescita_mib']:>14.1f} {'nuova':>16}")
+            continue
+        variazione = risultato["steps_al_secondo"] / precedente["steps_al_secondo"] - 1
+        memoria = risultato["memoria_crescita_mib"] - precedente["memoria_crescita_mib"]
+        esiti = []
+        # Conta solo se gli intervalli delle ripetizioni non si sovrappongono
+        if variazione < -args.soglia and risultato["steps_al_secondo_max"] < precedente["steps_al_secondo_min"]:
+            esiti.append("PEGGIORATO")
+            peggiorati += 1
+        elif variazione > args.soglia and risultato["steps_al_secondo_min"] > precedente["steps_al_secondo_max"]:
+            esiti.append("migliorato")
+        elif abs(variazione) > args.soglia:
+            esiti.append("rumore")
+        if risultato["impronta"] != precedente["impronta"]:
+            esiti.append("metriche diverse")
+        print(f"{nome:>20} {precedente['steps_al_secondo']:>18.0f} {risultato['steps_al_secondo']:>17.0f} "
+              f"{variazione:>+11.1%} {memoria:>+14.1f} {', '.join(esiti) or 'invariato':>16}")
+        if args.fasi and esiti:
+            for fase in FASI:
+                prima, dopo = precedente["fasi_us_per_step"][fase], risultato["fasi_us_per_step"][fase]
+                print(f"{'':>20} {fase:>18} {prima:>14.1f} us {dopo:>14.1f} us")
+
+    if peggiorati:
+        print(f"{peggiorati} configurazioni peggiorate oltre il {args.soglia:.0%}")
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    comandi = parser.add_subparsers(dest="comando", required=True)
+
+    run = comandi.add_parser("run", help="Esegue la suite e salva i risultati in JSON")
+    run.add_argument("--output", default="benchmark.json")
+    run.add_argument("--steps", type=int, default=5000)
+    run.add_argument("--warmup", type=int, default=200)
+    run.add_argument("--ripetizioni", type=int, default=5)
+    run.add_argument("--tempo-minimo", type=float, default=2.0,
+                     help="Secondi misurati per configurazione: le più veloci fanno più ripetizioni")
+    run.add_argument("--seed", type=int, default=1)
+    run.add_argument("--assi", default=None, help=f"Assi da misurare, separati da virgola ({', '.join(ASSI)})")
+
+    compare = comandi.add_parser("compare", help="Confronta i risultati con un baseline salvato")
+    compare.add_argument("baseline")
+    compare.add_argument("attuale")
+    compare.add_argument("--soglia", type=float, default=0.1, help="Variazione relativa degli step/s tollerata")
+    compare.add_argument("--fasi", action="store_true", help="Mostra le fasi delle configurazioni cambiate")
+
+    # Sottocomando interno: misura una configurazione e stampa il risultato in JSON
+    misura_cmd = comandi.add_parser("misura", help="Uso interno: misura una configurazione data in JSON")
+    misura_cmd.add_argument("richiesta")
+
+    args = parser.parse_args()
+    if args.comando == "run":
+        esegui(args)
+    elif args.comando == "compare":
+        confronta(args)
+    else:
+        richiesta = json.loads(args.richiesta)
+        print(json.dumps(misura(richiesta["params"], richiesta["steps"], richiesta["warmup"],
+                                richiesta["ripetizioni"], richiesta["tempo_minimo"], richiesta["seed"])))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""Scalabilità dello sweep parallelo al crescere del numero di worker.
+
+Esegue lo stesso insieme di simulazioni con 1, 2, 4, ... worker fino al numero di core
+e riporta speedup ed efficienza rispetto al singolo worker.
+
+Uso: python benchmarks/bench_sweep_scaling.py [--runs 32] [--steps 500]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from sweep import expand_grid, sweep  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=32, help="Repliche per l'unico insieme di parametri")
+    parser.add_argument("--steps", type=int, default=500)
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    counts = [1]
+    while counts[-1] * 2 <= cores:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != cores:
+        counts.append(cores)
+
+    param_sets = expand_grid({"num_loading_forkLift": [3], "num_unloading_forkLift": [3]})
+    base = None
+    print(f"{args.runs} simulazioni da {args.steps} step, {cores} core")
+    for workers in counts:
+        t0 = time.perf_counter()
+        rows = sweep(param_sets, args.runs, args.steps, workers=workers)
+        elapsed = time.perf_counter() - t0
+        assert not any("errore" in row for row in rows)
+        base = base or elapsed
+        speedup = base / elapsed
+        print(f"  {workers:3d} worker: {elapsed:7.2f} s, speedup {speedup:5.2f}x, efficienza {speedup / workers:6.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Costo del tracciamento: modello senza tracer, con buffer circolare e con file binario.
+
+Uso: python benchmarks/bench_tracing.py [--steps 3000] [--seed 1]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from headless import build_model, fingerprint  # noqa: E402
+from tracing import BinaryFileSink, Livello, RingBuffer, Tracer  # noqa: E402
+
+PARAMS = {"num_loading_forkLift": 3, "num_unloading_forkLift": 3, "num_loading": 2, "num_unloading": 2}
+
+
+def timed(steps, seed, tracer):
+    model = build_model(PARAMS, seed, tracer)
+    t0 = time.perf_counter()
+    for _ in range(steps):
+        model.step()
+    elapsed = time.perf_counter() - t0
+    if tracer is not None:
+        tracer.close()
+    return model, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--steps", type=int, default=3000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    base, base_time = timed(args.steps, args.seed, None)
+    print(f"Senza tracer:          {base_time / args.steps * 1e6:8.1f} us/step")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, make_sink in (("buffer circolare", RingBuffer),
+                                ("file binario", lambda: BinaryFileSink(os.path.join(tmp, "eventi.bin")))):
+            tracer = Tracer(make_sink(), Livello.DEBUG)
+            model, elapsed = timed(args.steps, args.seed, tracer)
+            # Il tracciamento non deve cambiare la traiettoria
+            assert fingerprint(model) == fingerprint(base)
+            print(f"Debug, {name + ':':<17}{elapsed / args.steps * 1e6:8.1f} us/step "
+                  f"({tracer.sink.written} eventi, {elapsed / base_time - 1:+.1%})")
+
+
+if __name__ == "__main__":
+    main()
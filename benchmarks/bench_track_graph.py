@@ -0,0 +1,78 @@
+"""Confronto memoria/velocità tra A* su tuple e set (get_neighbors) e A* sul grafo CSR compilato.
+
+Il layout 300x300 è generato con corsie orizzontali ogni 2 righe, corridoi trasversali
+ogni 12 colonne e un anello perimetrale.
+
+Uso: python benchmarks/bench_track_graph.py [--size 300] [--queries 200]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from pathfindingA import find_path  # noqa: E402
+from track_graph import TrackGraph  # noqa: E402
+
+
+def generate_tracks(size):
+    """Insieme di tracce di un magazzino size x size a corsie parallele"""
+    tracks = set()
+    for y in range(1, size - 1):
+        for x in range(1, size - 1):
+            if y % 2 == 1 or x % 12 == 1 or x == size - 2 or y == size - 2:
+                tracks.add((x, y))
+    return tracks
+
+
+def measure(build):
+    """Ritorna (oggetto, byte allocati, picco di byte, secondi) per la costruzione"""
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    obj = build()
+    elapsed = time.perf_counter() - t0
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, current, peak, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=300)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    tracks, set_bytes, _, set_time = measure(lambda: generate_tracks(args.size))
+    graph, graph_bytes, graph_peak, graph_time = measure(lambda: TrackGraph(tracks))
+    model = SimpleNamespace(width=args.size, height=args.size, tracks=tracks,
+                            is_track_position=tracks.__contains__)
+
+    print(f"Layout {args.size}x{args.size}: {len(tracks)} nodi, {len(graph.neighbors)} archi orientati")
+    print(f"  set di tuple:          {set_bytes / 1e6:8.2f} MB ({set_time:.2f} s)")
+    print(f"  grafo CSR (totale):    {graph_bytes / 1e6:8.2f} MB ({graph_time:.2f} s, picco {graph_peak / 1e6:.2f} MB)")
+    print(f"    di cui vettori CSR:  {graph.memory_bytes() / 1e6:8.2f} MB, il resto è la mappa posizione -> id")
+
+    rng = random.Random(0)
+    nodes = graph.nodes
+    queries = [(rng.choice(nodes), rng.choice(nodes)) for _ in range(args.queries)]
+
+    t0 = time.perf_counter()
+    tuple_paths = [find_path(model, s, g) for s, g in queries]
+    tuple_time = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    csr_paths = [graph.find_path(s, g) for s, g in queries]
+    csr_time = time.perf_counter() - t0
+
+    assert tuple_paths == csr_paths, "I due A* devono restituire gli stessi percorsi"
+    print(f"A* su tuple/set: {tuple_time / args.queries * 1000:8.2f} ms/query")
+    print(f"A* su CSR:       {csr_time / args.queries * 1000:8.2f} ms/query "
+          f"({tuple_time / csr_time:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Tempo per step con i viaggi una cella per step (travel="steps") e con un solo evento
+di arrivo per viaggio nel simulatore (travel="events"), al crescere della flotta.
+
+Il layout 30x30 ha i corridoi più lunghi costruibili dal modello: i viaggi tra dock,
+rack e punti di standby attraversano il magazzino. Prima della misura il modello
+esegue alcuni step di riscaldamento, così le tabelle dei percorsi sono già calcolate.
+Le due modalità devono dare le stesse metriche.
+
+Uso: python benchmarks/bench_travel_events.py [--steps 2000] [--fleets 5,20,50]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from headless import build_model, fingerprint  # noqa: E402
+
+PARAMS = {"num_loading": 5, "num_unloading": 5, "order_time": 2}
+
+
+def profile(n, travel, steps, warmup, seed):
+    model = build_model(dict(PARAMS, num_loading_forkLift=n, num_unloading_forkLift=n, travel=travel), seed)
+    model.run_for(warmup)
+    t0 = time.perf_counter()
+    model.run_for(steps)
+    return (time.perf_counter() - t0) / steps * 1e6, fingerprint(model)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--steps", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=500)
+    parser.add_argument("--fleets", default="5,20,50", help="Muletti per tipo, separati da virgola")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{'muletti per tipo':>17} {'steps (us/step)':>16} {'events (us/step)':>17} {'speedup':>8}")
+    for n in (int(v) for v in args.fleets.split(",")):
+        steps_us, steps_fp = profile(n, "steps", args.steps, args.warmup, args.seed)
+        events_us, events_fp = profile(n, "events", args.steps, args.warmup, args.seed)
+        assert steps_fp == events_fp, "Le due modalità di viaggio devono dare le stesse metriche"
+        print(f"{n:>17} {steps_us:>16.1f} {events_us:>17.1f} {steps_us / events_us:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,375 @@
+"""Checkpoint periodici della simulazione e ripresa identica a una run senza interruzioni.
+
+Un checkpoint è una cartella con tre file:
+
+- ``layout.bin``: il layout compilato (vedi compiled_layout), scritto una sola volta;
+- ``metriche.bin``: le righe del registro delle metriche, in blocchi aggiunti in coda:
+  ogni checkpoint scrive solo le righe registrate dopo il precedente;
+- ``stato.bin``: tutto il resto dello stato del modello (rack con le occupazioni
+  temporanee, dock con ordini e divisioni temporanee, code degli ordini, dispatcher,
+  muletti con stati, percorsi e destinazioni, contatori, generatore casuale ed eventi
+  del simulatore), serializzato con pickle e compresso con zlib.
+
+Nello step loop si paga solo la fotografia dello stato (pickle in memoria e copia delle
+righe nuove delle metriche); compressione e scrittura avvengono in un thread in
+background. stato.bin viene sostituito in modo atomico e ricorda quanti byte di
+metriche.bin gli appartengono, quindi dopo un'interruzione si riparte dall'ultimo
+checkpoint completo.
+"""
+import gc
+import io
+import itertools
+import json
+import os
+import pickle
+import queue
+import struct
+import tempfile
+import threading
+import time
+import weakref
+import zlib
+from typing import Dict, Optional
+
+import numpy as np
+from mesa.experimental.devs.eventlist import SimulationEvent
+
+from compiled_layout import LayoutCompilato
+from metrics_recorder import SCHEMA, MetricsRecorder
+from rack import RackStore
+from tracing import Tracer
+
+MAGIC = b"WHCHECKP"
+VERSIONE = 3  # 2: quantità degli ordini impacchettate in un intero, 3: inventario compatto
+# Intestazione a dimensione fissa di stato.bin: magic, versione, lunghezza del JSON che segue
+INTESTAZIONE = struct.Struct("<8sII")
+# Intestazione di un blocco di metriche.bin: prima riga e numero di righe, seguite dalle colonne
+BLOCCO = struct.Struct("<QQ")
+
+FILE_LAYOUT = "layout.bin"
+FILE_METRICHE = "metriche.bin"
+FILE_STATO = "stato.bin"
+
+
+def _nessun_bersaglio():
+    return None
+
+
+def _esterno(nome: str):
+    """Segnaposto degli oggetti esterni allo stato: l'unpickler lo sostituisce con l'oggetto"""
+    raise pickle.UnpicklingError(f"Oggetto esterno {nome} fuori da un checkpoint")
+
+
+def _inventario(layout, stato: dict):
+    """Inventario ricostruito con le posizioni dei rack del layout"""
+    return RackStore.da_stato(layout.rack_positions, stato)
+
+
+def _griglia(cls, stato: dict, celle: list):
+    """Griglia ricostruita dalle sole celle occupate"""
+    grid = cls.__new__(cls)
+    grid.__dict__.update(stato)
+    grid._grid = [[grid.default_val() for _ in range(grid.height)] for _ in range(grid.width)]
+    for (x, y), contenuto in celle:
+        grid._grid[x][y] = contenuto
+    return grid
+
+
+class _Pickler(pickle.Pickler):
+    """Pickler dello stato del modello.
+
+    Il layout compilato, il registro delle metriche e il tracer non fanno parte dello
+    stato: al loro posto viene scritto il nome. Dell'inventario si salva lo stato senza le
+    posizioni dei rack, che vengono dal layout, della griglia solo le celle occupate
+    dagli agenti, e i riferimenti deboli (le callback degli eventi del
+    simulatore) vengono ricreati dall'oggetto a cui puntano.
+    """
+
+    def __init__(self, file, model):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self._model = model
+        self._esterni = _esterni(model)
+
+    def reducer_override(self, obj):
+        # Chiamato solo per gli oggetti che non sono tipi predefiniti (int, tuple, list, ...)
+        nome = self._esterni.get(id(obj))
+        if nome is not None:
+            return _esterno, (nome,)
+        if obj is self._model.shelves and obj.positions is self._model.layout.rack_positions:
+            return _inventario, (self._model.layout, obj.stato())
+        if obj is self._model.grid:
+            stato = obj.__dict__.copy()
+            del stato["_grid"]
+            occupate = {agent.pos for agent in self._model.agents if agent.pos is not None}
+            return _griglia, (type(obj), stato, [(pos, obj._grid[pos[0]][pos[1]]) for pos in sorted(occupate)])
+        if isinstance(obj, weakref.ref):
+            target = obj()
+            if target is None:
+                # Callback di un oggetto già eliminato: l'evento resta e non fa nulla, come prima
+                return _nessun_bersaglio, ()
+            return type(obj), (target,)
+        return NotImplemented
+
+
+class _Unpickler(pickle.Unpickler):
+    def __init__(self, file, esterni: Dict[str, object]):
+        super().__init__(file)
+        self._esterni = esterni
+
+    def find_class(self, module, name):
+        if module == __name__ and name == "_esterno":
+            return self._esterni.__getitem__
+        return super().find_class(module, name)
+
+
+def _esterni(model) -> Dict[int, str]:
+    """Oggetti del modello salvati per nome: id dell'oggetto -> nome"""
+    compilato = model.layout_compilato
+    esterni = {
+        id(compilato): "layout_compilato",
+        id(compilato.layout): "layout",
+        id(compilato.track_graph): "track_graph",
+        id(model.data_collector): "metriche",
+    }
+    if model.path_tables is not None:
+        esterni[id(model.path_tables)] = "path_tables"
+    if model.tracer is not None:
+        esterni[id(model.tracer)] = "tracer"
+    return esterni
+
+
+def _scrivi_atomico(path: str, *parti: bytes):
+    """Scrive il file con un file temporaneo nella stessa cartella e un rename"""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix=".checkpoint-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for parte in parti:
+                f.write(parte)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _leggi_intestazione(f) -> dict:
+    """Legge l'intestazione di stato.bin lasciando il file sui dati compressi"""
+    magic, versione, lunghezza = INTESTAZIONE.unpack(f.read(INTESTAZIONE.size))
+    if magic != MAGIC:
+        raise ValueError(f"{f.name} non è un checkpoint")
+    if versione != VERSIONE:
+        raise ValueError(f"Versione del checkpoint non supportata: {versione}")
+    return json.loads(f.read(lunghezza))
+
+
+def leggi_intestazione(cartella: str) -> dict:
+    """Intestazione dell'ultimo checkpoint completo della cartella (step, righe delle metriche, ...)"""
+    with open(os.path.join(cartella, FILE_STATO), "rb") as f:
+        return _leggi_intestazione(f)
+
+
+def _leggi_metriche(path: str, offset: int, righe: int, chunk_size: int) -> MetricsRecorder:
+    """Registro delle metriche dai blocchi di metriche.bin fino a offset"""
+    colonne = {name: np.empty(righe, dtype=dtype) for name, dtype in SCHEMA}
+    with open(path, "rb") as f:
+        dati = f.read(offset)
+    pos = 0
+    while pos < offset:
+        prima, n = BLOCCO.unpack_from(dati, pos)
+        pos += BLOCCO.size
+        for colonna in colonne.values():
+            colonna[prima:prima + n] = np.frombuffer(dati, dtype=colonna.dtype, count=n, offset=pos)
+            pos += n * colonna.dtype.itemsize
+    return MetricsRecorder.from_columns(colonne, chunk_size)
+
+
+def carica_checkpoint(cartella: str, tracer: Optional[Tracer] = None):
+    """Modello nello stato dell'ultimo checkpoint completo della cartella.
+
+    Il tracer non fa parte del checkpoint: quello dato (o None) sostituisce quello del
+    modello salvato.
+    """
+    with open(os.path.join(cartella, FILE_STATO), "rb") as f:
+        intestazione = _leggi_intestazione(f)
+        stato = zlib.decompress(f.read())
+    compilato = LayoutCompilato.carica(os.path.join(cartella, FILE_LAYOUT))
+    metriche = _leggi_metriche(os.path.join(cartella, FILE_METRICHE), intestazione["offset_metriche"],
+                               intestazione["righe"], intestazione["chunk_size"])
+    esterni = {
+        "layout_compilato": compilato,
+        "layout": compilato.layout,
+        "track_graph": compilato.track_graph,
+        "metriche": metriche,
+        "tracer": tracer,
+    }
+    if intestazione["path_tables"] is not None:
+        esterni["path_tables"] = compilato.path_tables(intestazione["path_tables"])
+
+    model = _Unpickler(io.BytesIO(stato), esterni).load()
+    model.tracer = tracer
+    if tracer is not None:
+        tracer.model = model
+
+    # A parità di tempo e priorità il simulatore ordina gli eventi per id: i nuovi eventi
+    # devono seguire quelli ripristinati, come nella run senza interruzioni
+    SimulationEvent._ids = itertools.count(max(next(SimulationEvent._ids), intestazione["prossimo_evento"]))
+    return model
+
+
+class Checkpointer:
+    """Scrive un checkpoint del modello nella cartella ogni ``ogni`` step.
+
+    run_for() esegue gli step come model.run_for, fermandosi sui multipli di ``ogni`` per
+    il checkpoint; salva() si può chiamare anche direttamente tra due run_for. Le scritture
+    sono eseguite in ordine da un thread dedicato: salva() si blocca solo se ce ne sono
+    già ``in_attesa`` da completare. chiudi() attende l'ultima scrittura. Dopo un errore
+    di scrittura i checkpoint successivi non vengono scritti e salva() lo rilancia.
+    ``stallo_totale`` e ``stallo_massimo`` misurano (in secondi) il tempo sottratto allo step loop.
+    """
+
+    def __init__(self, model, cartella: str, ogni: int = 1000, compressione: int = 1, in_attesa: int = 2):
+        if ogni <= 0:
+            raise ValueError("L'intervallo tra i checkpoint deve essere positivo")
+        os.makedirs(cartella, exist_ok=True)
+        self.model = model
+        self.cartella = cartella
+        self.ogni = ogni
+        self.compressione = compressione
+        self._righe_salvate = 0  # Righe delle metriche già passate al thread di scrittura
+        self._offset = 0  # Byte di metriche.bin che appartengono all'ultimo checkpoint (solo per il thread)
+        self._layout_scritto = False
+        self._coda: "queue.Queue" = queue.Queue(maxsize=in_attesa)
+        self._thread: Optional[threading.Thread] = None
+        self._errore: Optional[BaseException] = None
+
+        self.scritti = 0
+        self.ultimo_step: Optional[int] = None
+        self.stallo_totale = 0.0
+        self.stallo_massimo = 0.0
+
+    @classmethod
+    def riprendi(cls, cartella: str, ogni: int = 1000, compressione: int = 1,
+                 tracer: Optional[Tracer] = None) -> "Checkpointer":
+        """Checkpointer sul modello ripreso dall'ultimo checkpoint della cartella, che continua
+        ad aggiungere i checkpoint successivi agli stessi file"""
+        intestazione = leggi_intestazione(cartella)
+        checkpointer = cls(carica_checkpoint(cartella, tracer), cartella, ogni, compressione)
+        checkpointer._righe_salvate = intestazione["righe"]
+        checkpointer._offset = intestazione["offset_metriche"]
+        checkpointer._layout_scritto = True
+        checkpointer.ultimo_step = intestazione["step"]
+        return checkpointer
+
+    def run_for(self, steps: int):
+        """Esegue gli step indicati con un checkpoint ad ogni multiplo di ``ogni``"""
+        model = self.model
+        fine = model.steps + steps
+        while model.steps < fine:
+            prossimo = (model.steps // self.ogni + 1) * self.ogni
+            model.run_for(min(prossimo, fine) - model.steps)
+            if model.steps % self.ogni == 0:
+                self.salva()
+
+    def salva(self):
+        """Fotografa lo stato del modello e lo passa al thread di scrittura"""
+        if self._errore is not None:
+            raise self._errore
+        t0 = time.perf_counter()
+        model = self.model
+        prima, righe = self._righe_salvate, model.data_collector.rows
+        nuove = [colonna[prima:righe].copy() for colonna in model.data_collector.columns().values()]
+
+        # Durante la fotografia il garbage collector non serve: il pickle non crea cicli
+        gc_attivo = gc.isenabled()
+        gc.disable()
+        try:
+            buffer = io.BytesIO()
+            _Pickler(buffer, model).dump(model)
+        finally:
+            if gc_attivo:
+                gc.enable()
+        intestazione = {
+            "step": model.steps,
+            "tempo": model.simulator.time,
+            "righe": righe,
+            "chunk_size": model.data_collector.chunk_size,
+            "path_tables": model.path_tables.compact if model.path_tables is not None else None,
+            # Consuma un id: i nuovi eventi restano comunque ordinati dopo quelli esistenti
+            "prossimo_evento": next(SimulationEvent._ids),
+        }
+        layout = None if self._layout_scritto else model.layout_compilato
+        self._layout_scritto = True
+        self._righe_salvate = righe
+
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._scrittore, name="checkpoint", daemon=True)
+            self._thread.start()
+        self._coda.put((buffer.getbuffer(), nuove, prima, intestazione, layout))
+        self.ultimo_step = model.steps
+        stallo = time.perf_counter() - t0
+        self.stallo_totale += stallo
+        self.stallo_massimo = max(self.stallo_massimo, stallo)
+
+    def _scrittore(self):
+        while True:
+            lavoro = self._coda.get()
+            if lavoro is None:
+                self._coda.task_done()
+                return
+            if self._errore is None:
+                try:
+                    self._scrivi(*lavoro)
+                except BaseException as exc:
+                    self._errore = exc
+            self._coda.task_done()
+
+    def _scrivi(self, stato, nuove, prima: int, intestazione: dict, layout: Optional[LayoutCompilato]):
+        path_stato = os.path.join(self.cartella, FILE_STATO)
+        if layout is not None:
+            # Prima scrittura in questa cartella: il checkpoint precedente non vale più
+            if os.path.exists(path_stato):
+                os.unlink(path_stato)
+            layout.salva(os.path.join(self.cartella, FILE_LAYOUT))
+
+        path_metriche = os.path.join(self.cartella, FILE_METRICHE)
+        with open(path_metriche, "r+b" if os.path.exists(path_metriche) else "wb") as f:
+            f.seek(self._offset)
+            f.write(BLOCCO.pack(prima, intestazione["righe"] - prima))
+            for colonna in nuove:
+                f.write(colonna.tobytes())
+            # Scarta le righe di checkpoint non completati
+            f.truncate()
+            f.flush()
+            os.fsync(f.fileno())
+            offset = f.tell()
+
+        intestazione["offset_metriche"] = offset
+        dati = zlib.compress(stato, self.compressione)
+        header = json.dumps(intestazione).encode()
+        _scrivi_atomico(path_stato, INTESTAZIONE.pack(MAGIC, VERSIONE, len(header)), header, dati)
+        self._offset = offset
+        self.scritti += 1
+
+    def attendi(self):
+        """Aspetta che tutti i checkpoint passati al thread siano scritti; rilancia l'eventuale errore"""
+        self._coda.join()
+        if self._errore is not None:
+            raise self._errore
+
+    def chiudi(self):
+        """Attende l'ultima scrittura e ferma il thread di scrittura"""
+        if self._thread is not None:
+            self._coda.put(None)
+            self._thread.join()
+            self._thread = None
+        self.attendi()
+
+    def stats(self) -> dict:
+        """Statistiche dei checkpoint scritti e del tempo sottratto allo step loop"""
+        return {
+            "scritti": self.scritti,
+            "ultimo_step": self.ultimo_step,
+            "stallo_totale": self.stallo_totale,
+            "stallo_massimo": self.stallo_massimo,
+        }
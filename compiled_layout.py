@@ -0,0 +1,214 @@
+"""Layout compilato: tutto ciò che dipende solo dal layout, calcolato una volta e condiviso.
+
+Contiene il layout (rack e colori, tracce, dock, standby), il grafo delle tracce, la
+traccia di accesso di ogni dock e, quando servono, le tabelle dei percorsi. I modelli
+lo usano in sola lettura, quindi la stessa istanza serve tutti i modelli di un processo:
+compila() restituisce sempre lo stesso layout compilato per la stessa istanza di Layout.
+
+Le tabelle dei percorsi occupano memoria quadratica nel numero di tracce (circa 2,4 GB
+già con 17k tracce): oltre ``MAX_TRACCE_TABELLE`` tracce path_tables() le rifiuta e
+va usato il routing sui corridoi.
+
+Il file su disco ha un'intestazione JSON seguita dagli array, allineati a 64 byte:
+carica() mappa il file in memoria, quindi le tabelle dei percorsi vengono lette solo
+nelle righe usate e processi diversi condividono le stesse pagine.
+"""
+import hashlib
+import json
+import os
+import struct
+import tempfile
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from layout import Layout, Posizione, genera_layout
+from path_tables import PathTables
+from track_graph import TrackGraph
+
+MAGIC = b"WHLAYOUT"
+VERSIONE = 2  # 2: corridoi generati sopra ogni riga di rack
+ALLINEAMENTO = 64
+# Intestazione a dimensione fissa: magic, versione, lunghezza del JSON che segue
+INTESTAZIONE = struct.Struct("<8sII")
+# Tracce oltre le quali le tabelle dei percorsi non vengono calcolate (circa 200 MB in liste)
+MAX_TRACCE_TABELLE = 5000
+
+# Layout generati già compilati in questo processo, per parametri di generazione
+_compilati: Dict[Tuple, "LayoutCompilato"] = {}
+
+
+def _allinea(n: int) -> int:
+    return -(-n // ALLINEAMENTO) * ALLINEAMENTO
+
+
+def _traccia_adiacente(tracks, pos: Posizione) -> Optional[Posizione]:
+    """Prima traccia adiacente nell'ordine usato dai muletti, None se non ce ne sono"""
+    x, y = pos
+    for dx, dy in ((0, 1), (0, -1), (1, 0), (-1, 0)):
+        if (x + dx, y + dy) in tracks:
+            return (x + dx, y + dy)
+    return None
+
+
+class LayoutCompilato:
+    """Layout con il grafo delle tracce, gli accessi ai dock e le tabelle dei percorsi"""
+
+    def __init__(self, layout: Layout, track_graph: Optional[TrackGraph] = None,
+                 tabelle: Optional[Tuple[np.ndarray, np.ndarray]] = None):
+        self.layout = layout
+        self.track_graph = track_graph if track_graph is not None else TrackGraph(layout.tracks)
+        self.accesso_dock: Dict[Posizione, Optional[Posizione]] = {
+            pos: _traccia_adiacente(layout.tracks, pos) for pos in layout.dock_scarico + layout.dock_carico}
+        self._tabelle = tabelle  # Next-hop e distanze come array, None finché non servono
+        self._liste = None  # Le stesse tabelle come liste, per i modelli con compact=False
+        if layout._compilato is None:
+            layout._compilato = self
+
+    @property
+    def ha_tabelle(self) -> bool:
+        return self._tabelle is not None
+
+    def path_tables(self, compact: bool = False) -> PathTables:
+        """Tabelle dei percorsi del layout: le BFS vengono eseguite solo la prima volta.
+
+        Solleva ValueError se il layout ha più di MAX_TRACCE_TABELLE tracce.
+        """
+        if self._tabelle is None:
+            if len(self.track_graph) > MAX_TRACCE_TABELLE:
+                raise ValueError(f"Tabelle dei percorsi troppo grandi per {len(self.track_graph)} tracce "
+                                 f"(massimo {MAX_TRACCE_TABELLE}): usa routing='corridor'")
+            tabelle = PathTables(self.track_graph, compact=True).come_array()
+            for tabella in tabelle:
+                tabella.flags.writeable = False
+            self._tabelle = tabelle
+        if compact:
+            return PathTables.da_tabelle(self.track_graph, *self._tabelle, compact=True)
+        if self._liste is None:
+            self._liste = tuple(tabella.tolist() for tabella in self._tabelle)
+        return PathTables.da_tabelle(self.track_graph, *self._liste)
+
+    # File
+    def _array(self) -> Dict[str, np.ndarray]:
+        layout, graph = self.layout, self.track_graph
+        colori = sorted(set(layout.rack_colors))
+        codici = {colore: i for i, colore in enumerate(colori)}
+        arrays = {
+            "rack_x": np.array([x for x, _ in layout.rack_positions], dtype=np.int32),
+            "rack_y": np.array([y for _, y in layout.rack_positions], dtype=np.int32),
+            "rack_colore": np.array([codici[c] for c in layout.rack_colors], dtype=np.int8),
+            "xs": np.frombuffer(graph.xs, dtype=np.int32),
+            "ys": np.frombuffer(graph.ys, dtype=np.int32),
+            "offsets": np.frombuffer(graph.offsets, dtype=np.int32),
+            "neighbors": np.frombuffer(graph.neighbors, dtype=np.int32),
+        }
+        if self._tabelle is not None:
+            arrays["next"], arrays["dist"] = self._tabelle
+        return arrays
+
+    def salva(self, path: str):
+        """Scrive il layout compilato (con le tabelle, se già calcolate) in modo atomico"""
+        layout = self.layout
+        colori = sorted(set(layout.rack_colors))
+        arrays = self._array()
+        indice, offset = {}, 0
+        for name, array in arrays.items():
+            indice[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+            offset = _allinea(offset + array.nbytes)
+        header = json.dumps({
+            "width": layout.width,
+            "height": layout.height,
+            "colori": colori,
+            "dock_scarico": layout.dock_scarico,
+            "dock_carico": layout.dock_carico,
+            "standby_scarico": layout.standby_scarico,
+            "standby_carico": layout.standby_carico,
+            "array": indice,
+        }).encode()
+
+        # File temporaneo nella stessa cartella e rename: chi legge vede il file vecchio o quello completo
+        cartella = os.path.dirname(os.path.abspath(path))
+        fd, tmp = tempfile.mkstemp(dir=cartella, prefix=".layout-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(INTESTAZIONE.pack(MAGIC, VERSIONE, len(header)))
+                f.write(header)
+                inizio = _allinea(INTESTAZIONE.size + len(header))
+                for name, array in arrays.items():
+                    f.seek(inizio + indice[name]["offset"])
+                    f.write(np.ascontiguousarray(array).tobytes())
+                f.truncate(inizio + offset)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    @classmethod
+    def carica(cls, path: str) -> "LayoutCompilato":
+        """Layout compilato da un file scritto con salva(); gli array sono mappati in sola lettura"""
+        with open(path, "rb") as f:
+            magic, versione, lunghezza = INTESTAZIONE.unpack(f.read(INTESTAZIONE.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path} non è un layout compilato")
+            if versione != VERSIONE:
+                raise ValueError(f"Versione del layout compilato non supportata: {versione}")
+            header = json.loads(f.read(lunghezza))
+        inizio = _allinea(INTESTAZIONE.size + lunghezza)
+        mappa = np.memmap(path, dtype=np.uint8, mode="r")
+        arrays = {}
+        for name, meta in header["array"].items():
+            dtype = np.dtype(meta["dtype"])
+            start = inizio + meta["offset"]
+            count = int(np.prod(meta["shape"]))
+            arrays[name] = mappa[start:start + count * dtype.itemsize].view(dtype).reshape(meta["shape"])
+
+        graph = TrackGraph.da_array(arrays["xs"], arrays["ys"], arrays["offsets"], arrays["neighbors"])
+        colori = header["colori"]
+        layout = Layout(
+            header["width"], header["height"],
+            rack_positions=list(zip(arrays["rack_x"].tolist(), arrays["rack_y"].tolist())),
+            rack_colors=[colori[c] for c in arrays["rack_colore"].tolist()],
+            tracks=graph.nodes,
+            dock_scarico=[tuple(pos) for pos in header["dock_scarico"]],
+            dock_carico=[tuple(pos) for pos in header["dock_carico"]],
+            standby_scarico=tuple(header["standby_scarico"]),
+            standby_carico=tuple(header["standby_carico"]),
+        )
+        tabelle = (arrays["next"], arrays["dist"]) if "next" in arrays else None
+        return cls(layout, graph, tabelle)
+
+
+def compila(layout: Layout) -> LayoutCompilato:
+    """Layout compilato dell'istanza layout, creato solo la prima volta"""
+    if isinstance(layout, LayoutCompilato):
+        return layout
+    if layout._compilato is None:
+        LayoutCompilato(layout)
+    return layout._compilato
+
+
+def layout_compilato(cartella_cache: Optional[str] = None, tabelle: bool = False, **parametri) -> LayoutCompilato:
+    """Layout di genera_layout(**parametri), compilato una sola volta per processo.
+
+    Con ``cartella_cache`` il layout compilato viene salvato in un file (con le tabelle dei
+    percorsi se ``tabelle``) e gli altri processi lo caricano invece di ricalcolarlo.
+    """
+    chiave = tuple(sorted(parametri.items()))
+    compilato = _compilati.get(chiave)
+    if compilato is None:
+        if cartella_cache is None:
+            compilato = LayoutCompilato(genera_layout(**parametri))
+        else:
+            nome = hashlib.sha1(json.dumps([VERSIONE, chiave]).encode()).hexdigest()[:16]
+            path = os.path.join(cartella_cache, f"layout-{nome}.bin")
+            if os.path.exists(path):
+                compilato = LayoutCompilato.carica(path)
+            else:
+                compilato = LayoutCompilato(genera_layout(**parametri))
+            if not os.path.exists(path) or (tabelle and not compilato.ha_tabelle):
+                if tabelle:
+                    compilato.path_tables()
+                os.makedirs(cartella_cache, exist_ok=True)
+                compilato.salva(path)
+        _compilati[chiave] = compilato
+    return compilato
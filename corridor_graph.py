@@ -0,0 +1,199 @@
+import heapq
+from array import array
+from typing import List, Optional, Tuple
+
+from track_graph import TrackGraph
+
+_START = -2  # Predecessore fittizio dei nodi raggiunti direttamente dalla partenza
+_GOAL = -1  # Nodo fittizio della destinazione
+
+
+class CorridorGraph:
+    """Grafo di routing compresso: ogni corridoio diventa un arco pesato tra due incroci.
+
+    Gli incroci sono i nodi del TrackGraph con grado diverso da 2; le catene di nodi di
+    grado 2 tra due incroci formano i corridoi. La ricerca A* lavora solo sugli incroci
+    e il percorso trovato viene poi espanso cella per cella, nel formato usato da
+    move_along_path. ``last_expansions`` e ``total_expansions`` contano i nodi espansi.
+    """
+
+    def __init__(self, graph: TrackGraph):
+        self.graph = graph
+        n = len(graph)
+
+        self.is_junction = bytearray(1 if graph.degree(i) != 2 else 0 for i in range(n))
+        self.corridors: List[array] = []  # Catene di id dall'incrocio iniziale a quello finale
+        self.corridor_of = array("i", [-1]) * n  # Corridoio dei nodi interni
+        self.offset_in = array("i", [0]) * n  # Posizione dei nodi interni nella catena
+        self.edges = {}  # incrocio -> [(incrocio, peso, corridoio, in_avanti)]
+
+        used = set()
+        for i in range(n):
+            if self.is_junction[i]:
+                self._walk_corridors(i, used)
+        # Anelli composti solo da nodi di grado 2: uno dei nodi diventa incrocio
+        for i in range(n):
+            if not self.is_junction[i] and self.corridor_of[i] == -1:
+                self.is_junction[i] = 1
+                self._walk_corridors(i, used)
+
+        self.last_expansions = 0
+        self.total_expansions = 0
+        self.queries = 0
+
+    # Pickle (checkpoint): i corridoi si ricostruiscono dal grafo, si salvano solo i contatori
+    def __getstate__(self):
+        return {"graph": self.graph, "last_expansions": self.last_expansions,
+                "total_expansions": self.total_expansions, "queries": self.queries}
+
+    def __setstate__(self, state):
+        self.__init__(state.pop("graph"))
+        self.__dict__.update(state)
+
+    def _walk_corridors(self, junction: int, used: set):
+        """Segue ogni corridoio che parte dall'incrocio fino all'incrocio successivo"""
+        graph = self.graph
+        self.edges.setdefault(junction, [])
+        for first in graph.adjacent(junction):
+            if (junction, first) in used:
+                continue
+            chain = array("i", [junction])
+            prev, current = junction, first
+            while not self.is_junction[current]:
+                chain.append(current)
+                a, b = graph.adjacent(current)
+                prev, current = current, (b if a == prev else a)
+            chain.append(current)
+            used.add((junction, first))
+            used.add((current, prev))
+
+            c = len(self.corridors)
+            self.corridors.append(chain)
+            for offset in range(1, len(chain) - 1):
+                self.corridor_of[chain[offset]] = c
+                self.offset_in[chain[offset]] = offset
+
+            weight = len(chain) - 1
+            self.edges[junction].append((current, weight, c, True))
+            self.edges.setdefault(current, []).append((junction, weight, c, False))
+
+    @property
+    def num_junctions(self) -> int:
+        return len(self.edges)
+
+    def _anchors(self, node: int):
+        """Incroci da cui si entra/esce dal nodo: [(incrocio, costo, corridoio, incrocio_iniziale)]"""
+        if self.is_junction[node]:
+            return [(node, 0, -1, True)]
+        c = self.corridor_of[node]
+        chain = self.corridors[c]
+        p = self.offset_in[node]
+        return [(chain[0], p, c, True), (chain[-1], len(chain) - 1 - p, c, False)]
+
+    def _search(self, start: int, goal: int) -> Optional[List[int]]:
+        """A* sul grafo degli incroci con partenza e arrivo anche a metà corridoio"""
+        xs, ys = self.graph.xs, self.graph.ys
+        gx, gy = xs[goal], ys[goal]
+        expansions = 0
+
+        targets = {}
+        for j, cost, c, at_head in self._anchors(goal):
+            if j not in targets or cost < targets[j][0]:
+                targets[j] = (cost, c, at_head)
+
+        open_set = []
+        best = {}
+        came_from = {}
+        for j, cost, c, at_head in self._anchors(start):
+            if cost < best.get(j, cost + 1):
+                best[j] = cost
+                came_from[j] = (_START, c, at_head)
+                heapq.heappush(open_set, (cost + abs(xs[j] - gx) + abs(ys[j] - gy), cost, j, 0))
+
+        # Partenza e arrivo sullo stesso corridoio: percorso diretto senza incroci
+        if not self.is_junction[start] and self.corridor_of[start] == self.corridor_of[goal] \
+                and not self.is_junction[goal]:
+            direct = abs(self.offset_in[start] - self.offset_in[goal])
+            heapq.heappush(open_set, (direct, direct, _GOAL, _START))
+
+        while open_set:
+            _, g_cost, node, via = heapq.heappop(open_set)
+            expansions += 1
+
+            if node == _GOAL:
+                self.last_expansions = expansions
+                return self._expand(start, goal, via, came_from, targets)
+
+            if g_cost > best[node]:
+                continue
+
+            if node in targets:
+                total = g_cost + targets[node][0]
+                heapq.heappush(open_set, (total, total, _GOAL, node))
+
+            for neighbor, weight, c, forward in self.edges[node]:
+                tentative_g_score = g_cost + weight
+                if tentative_g_score < best.get(neighbor, tentative_g_score + 1):
+                    best[neighbor] = tentative_g_score
+                    came_from[neighbor] = (node, c, forward)
+                    f = tentative_g_score + abs(xs[neighbor] - gx) + abs(ys[neighbor] - gy)
+                    heapq.heappush(open_set, (f, tentative_g_score, neighbor, 0))
+
+        self.last_expansions = expansions
+        return None
+
+    def _expand(self, start: int, goal: int, last_junction: int, came_from: dict, targets: dict) -> List[int]:
+        """Espande la sequenza di incroci nel percorso cella per cella"""
+        if last_junction == _START:
+            chain = self.corridors[self.corridor_of[start]]
+            ps, pg = self.offset_in[start], self.offset_in[goal]
+            step = 1 if pg >= ps else -1
+            return list(chain[ps:pg + step:step])
+
+        # Tratti tra incroci, dall'ultimo al primo
+        hops = []
+        junction = last_junction
+        while True:
+            prev, c, forward = came_from[junction]
+            if prev == _START:
+                break
+            hops.append((c, forward))
+            junction = prev
+
+        # Tratto iniziale: dalla partenza al primo incrocio
+        if start == junction:
+            path = [start]
+        else:
+            chain = self.corridors[c]
+            p = self.offset_in[start]
+            path = list(chain[p::-1]) if forward else list(chain[p:])
+
+        for c, forward in reversed(hops):
+            chain = self.corridors[c]
+            path.extend(chain[1:] if forward else reversed(chain[:-1]))
+
+        # Tratto finale: dall'ultimo incrocio alla destinazione
+        if goal != last_junction:
+            _, c, at_head = targets[last_junction]
+            chain = self.corridors[c]
+            p = self.offset_in[goal]
+            path.extend(chain[1:p + 1] if at_head else reversed(chain[p:-1]))
+        return path
+
+    def find_path(self, start: Tuple[int, int], goal: Tuple[int, int]) -> Optional[List[Tuple[int, int]]]:
+        """Percorso minimo cella per cella tra due posizioni; start deve essere un nodo del grafo"""
+        self.queries += 1
+        if start == goal:
+            self.last_expansions = 0
+            return [start]
+        index = self.graph.index
+        g = index.get(goal)
+        if g is None:
+            self.last_expansions = 0
+            return None
+        path = self._search(index[start], g)
+        self.total_expansions += self.last_expansions
+        if path is None:
+            return None
+        nodes = self.graph.nodes
+        return [nodes[i] for i in path]
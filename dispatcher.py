@@ -0,0 +1,122 @@
+import heapq
+from collections import deque
+from typing import List
+
+from order import COLORI_ORDINE, INDICE_COLORE, Order, OrderColor
+from tracing import CARICO
+
+
+class TaskDispatcher:
+    """Smista il lavoro dei dock ai muletti liberi.
+
+    Ogni ordine ricevuto da un dock viene scomposto in task unitari (dock, colore),
+    uno per item della sua divisione_temp, numerati in ordine di arrivo; l'ordine dei
+    colori all'interno di un ordine è estratto con model.random. I task di carico
+    stanno in un heap per colore, così un colore senza merce a magazzino non blocca
+    gli altri; quelli di scarico in un unico heap.
+
+    I muletti liberi restano in una coda FIFO e vengono avvisati solo quando c'è un
+    task da assegnare: un muletto fermo in standby non fa nulla nel suo step.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self._seq = 0
+        self._carico: List[list] = [[] for _ in COLORI_ORDINE]  # heap per colore di (seq, dock, ordine)
+        self._scarico: list = []  # heap di (seq, indice colore, dock, ordine)
+        self._liberi_carico = deque()
+        self._liberi_scarico = deque()
+
+    # Registrazione dei task e dei muletti liberi
+    def nuovo_ordine(self, dock, carico: bool):
+        """Crea i task unitari per l'ordine appena ricevuto dal dock"""
+        ordine = dock.divisione_temp
+        unita = [i for i, qty in enumerate(ordine.vista_capacita().values()) for _ in range(qty)]
+        self.model.random.shuffle(unita)
+        for i in unita:
+            self._aggiungi(self._seq, i, dock, ordine, carico)
+            self._seq += 1
+
+    def _aggiungi(self, seq: int, i: int, dock, ordine: Order, carico: bool):
+        if carico:
+            heapq.heappush(self._carico[i], (seq, dock, ordine))
+        else:
+            heapq.heappush(self._scarico, (seq, i, dock, ordine))
+
+    def ripristina(self, seq: int, dock, colore: OrderColor, carico: bool):
+        """Rimette in coda, con la sua priorità originale, un task non portato a termine"""
+        self._aggiungi(seq, INDICE_COLORE[colore], dock, dock.divisione_temp, carico)
+
+    def libero(self, forklift):
+        """Registra un muletto che ha finito il suo task"""
+        if not forklift.in_attesa:
+            forklift.in_attesa = True
+            carico = forklift.flusso == CARICO
+            (self._liberi_carico if carico else self._liberi_scarico).append(forklift)
+
+    @property
+    def task_in_attesa(self) -> int:
+        return len(self._scarico) + sum(len(heap) for heap in self._carico)
+
+    def vuoto(self) -> bool:
+        """True se non resta nessun task valido da assegnare (scarta quelli non più validi in testa)"""
+        while self._scarico and not self._valido(self._scarico[0][2], self._scarico[0][3],
+                                                 COLORI_ORDINE[self._scarico[0][1]]):
+            heapq.heappop(self._scarico)
+        for i, heap in enumerate(self._carico):
+            while heap and not self._valido(heap[0][1], heap[0][2], COLORI_ORDINE[i]):
+                heapq.heappop(heap)
+        return not self._scarico and not any(self._carico)
+
+    @staticmethod
+    def _valido(dock, ordine: Order, colore: OrderColor) -> bool:
+        # L'ordine del task deve essere ancora quello del dock e avere ancora il colore da prenotare
+        return dock.divisione_temp is ordine and ordine.get_capacita_per_colore(colore) > 0
+
+    # Assegnazione
+    def dispatch(self):
+        """Assegna i task in attesa ai muletti liberi, in ordine di arrivo"""
+        if self._liberi_scarico and self._scarico:
+            self._dispatch_scarico()
+        if self._liberi_carico:
+            self._dispatch_carico()
+
+    def _dispatch_scarico(self):
+        heap, liberi = self._scarico, self._liberi_scarico
+        while liberi and heap:
+            seq, i, dock, ordine = heapq.heappop(heap)
+            colore = COLORI_ORDINE[i]
+            if not self._valido(dock, ordine, colore):
+                continue
+            forklift = liberi[0]
+            if not forklift.assegna_task(seq, dock, colore):
+                heapq.heappush(heap, (seq, i, dock, ordine))
+                return
+            liberi.popleft()
+            forklift.in_attesa = False
+
+    def _dispatch_carico(self):
+        liberi, shelves = self._liberi_carico, self.model.shelves
+        bloccati = set()  # Colori senza merce prenotabile in questo giro
+        while liberi:
+            # Task più vecchio tra le teste degli heap dei colori non bloccati
+            migliore = None
+            for i, heap in enumerate(self._carico):
+                if i in bloccati:
+                    continue
+                while heap and not self._valido(heap[0][1], heap[0][2], COLORI_ORDINE[i]):
+                    heapq.heappop(heap)
+                if heap and (migliore is None or heap[0][0] < self._carico[migliore][0][0]):
+                    migliore = i
+            if migliore is None:
+                return
+
+            colore = COLORI_ORDINE[migliore]
+            rack_pos = shelves.prenota(colore.value)
+            if rack_pos is None:
+                bloccati.add(migliore)
+                continue
+            seq, dock, _ = heapq.heappop(self._carico[migliore])
+            forklift = liberi.popleft()
+            forklift.in_attesa = False
+            forklift.assegna_task(seq, dock, colore, rack_pos)
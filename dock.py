@@ -1,8 +1,10 @@
 # forkLift.py
+import heapq
+from typing import Optional
 
 from mesa.discrete_space import FixedAgent
 
-from order import Order
+from tracing import CARICO, SCARICO, Evento
 
 
 class Dock(FixedAgent):
@@ -14,9 +16,52 @@ class Dock(FixedAgent):
             free = True,
     ):
         super().__init__(model)
+        self._free = False
         self.free = free
         self.current_order = None
 
+    @property
+    def free(self):
+        return self._free
+
+    @free.setter
+    def free(self, value):
+        # Tiene aggiornato il contatore dei dock liberi del modello
+        if value != self._free:
+            self.model.agenti_liberi[type(self)] += 1 if value else -1
+            if value:
+                self.model.dock_liberi[type(self)].libera(self)
+        self._free = value
+
+
+class DockPool:
+    """Dock liberi di un tipo, restituiti nell'ordine di creazione come nelle liste del modello.
+
+    I dock che tornano liberi vengono inseriti in un heap di indici; le voci dei dock
+    nel frattempo occupati vengono scartate in modo pigro da prendi().
+    """
+
+    def __init__(self):
+        self._docks = []
+        self._indice = {}
+        self._heap = []
+
+    def libera(self, dock: Dock):
+        i = self._indice.get(dock)
+        if i is None:
+            i = self._indice[dock] = len(self._docks)
+            self._docks.append(dock)
+        heapq.heappush(self._heap, i)
+
+    def prendi(self) -> Optional[Dock]:
+        """Primo dock libero, None se sono tutti occupati"""
+        heap = self._heap
+        while heap:
+            dock = self._docks[heapq.heappop(heap)]
+            if dock.free:
+                return dock
+        return None
+
 
 class UnloadingDock(Dock):
 
@@ -34,9 +79,8 @@ class UnloadingDock(Dock):
     def receive_order(self, order):
         if self.free:
             self.current_order = order
-            self.divisione_temp = Order(order.get_capacita_totale())
-            for colore, qty in order.get_tutte_capacita().items():
-                self.divisione_temp.set_capacita_per_colore(colore, qty)
+            self.divisione_temp = order.copia()
+            self.model.dispatcher.nuovo_ordine(self, carico=False)
             self.free = False
             self.current_order.step_inizio = self.model.steps
             return True
@@ -49,10 +93,13 @@ class UnloadingDock(Dock):
         durata = self.current_order.step_fine - self.current_order.step_inizio
 
         self.model.ordini_scarico_durata_processamento.append(durata)
+        self.model.ordini_scarico_durata_totale += durata
         self.model.ordini_scarico_completati += 1
         self.current_order = None
         self.free = True
         self._order_completed = True  # Aggiungi questo flag
+        if self.model.tracer is not None:
+            self.model.tracer.emit(Evento.ORDER_COMPLETED, self, self.pos, valore=durata, flusso=SCARICO)
 
 
         return completed_order
@@ -74,10 +121,8 @@ class LoadingDock(Dock):
         if self.free:
             self.current_order = order
             # Crea una copia dell'ordine per le prenotazioni
-            self.divisione_temp = Order(order.get_capacita_totale())
-            # Copia le capacità per colore
-            for colore, qty in order.get_tutte_capacita().items():
-                self.divisione_temp.set_capacita_per_colore(colore, qty)
+            self.divisione_temp = order.copia()
+            self.model.dispatcher.nuovo_ordine(self, carico=True)
 
             self.free = False
             self.current_order.step_inizio = self.model.steps
@@ -91,8 +136,11 @@ class LoadingDock(Dock):
         self.current_order.step_fine = self.model.steps
         durata = self.current_order.step_fine - self.current_order.step_inizio
         self.model.ordini_carico_durata_processamento.append(durata)
+        self.model.ordini_carico_durata_totale += durata
         self.model.ordini_carico_completati += 1
         self.current_order = None
         self.free = True
         self._order_completed = True  # Aggiungi questo flag
+        if self.model.tracer is not None:
+            self.model.tracer.emit(Evento.ORDER_COMPLETED, self, self.pos, valore=durata, flusso=CARICO)
         return completed_order
\ No newline at end of file
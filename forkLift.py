@@ -1,9 +1,10 @@
 # forkLift.py
-from random import choice
 from mesa.discrete_space import CellAgent
-from pathfindingA import find_path
+from mesa.experimental.devs import Priority
 from typing import Tuple, Optional
 
+from tracing import CARICO, SCARICO, Evento
+
 class ForkLift(CellAgent):
     def __init__(
             self,
@@ -11,16 +12,104 @@ class ForkLift(CellAgent):
             free = True,
     ):
         super().__init__(model)
-        self.current_path = [] #Percorso attuale
+        self.current_path = [] #Percorso attuale (sequenza condivisa, non va modificata)
+        self.path_index = 0 #Indice della posizione corrente nel percorso
+        self.in_viaggio = False #True mentre aspetta l'evento di arrivo (travel="events")
+        self._partenza = None #(tempo, indice nel percorso) alla partenza del viaggio
+        self._evento_arrivo = None
         self.current_order = None #Posizione obiettivo
         self.target_position = None #Pacco corrente
+        self._free = False
         self.free = free
+        self.task_seq = None #Numero del task assegnato dal dispatcher
+        self.in_attesa = False #True se è nella coda dei muletti liberi del dispatcher
+        self.model.dispatcher.libero(self)
+
+    @property
+    def free(self):
+        return self._free
+
+    @free.setter
+    def free(self, value):
+        # Tiene aggiornato il contatore dei muletti liberi del modello
+        if value != self._free:
+            self.model.agenti_liberi[type(self)] += 1 if value else -1
+        self._free = value
 
     def set_target(self, target_pos: Tuple[int, int]):
         """Imposta una nuova destinazione e calcola il percorso"""
         self.target_position = target_pos
-        self.current_path = find_path(self.model, self.pos, target_pos)
+        if self.model.reservation_table is not None:
+            self.current_path = self.model.find_path_cooperativo(self, self.pos, target_pos)
+        else:
+            self.current_path = self.model.find_path(self.pos, target_pos)
+        self.path_index = 0
 
+    def move_along_path(self):
+        """Muoviti lungo il percorso calcolato"""
+        if self.in_viaggio:
+            return
+        if not self.current_path or len(self.current_path) - self.path_index <= 1:
+            self.on_arrival()
+            return
+        if self.model.viaggi_a_eventi:
+            self._parti()
+            return
+
+        # Prendi il prossimo passo nel percorso
+        self.path_index += 1
+        next_pos = self.current_path[self.path_index]
+        # Muoviti semplicemente senza controlli di collisione
+        self.model.grid.move_agent(self, next_pos)
+        # Se hai raggiunto la destinazione
+        if self.pos == self.target_position:
+            self.on_arrival()
+
+    def _parti(self):
+        """Pianifica l'arrivo nel simulatore invece di muoversi una cella per step.
+
+        L'evento cade nello stesso step in cui arriverebbe muovendosi una cella alla
+        volta (la prima mossa è in questo step) e dopo model.step: la posizione sulla
+        griglia viene aggiornata solo all'arrivo o se il viaggio viene interrotto.
+        """
+        simulator = self.model.simulator
+        mosse = len(self.current_path) - 1 - self.path_index
+        self._partenza = (simulator.time, self.path_index)
+        self._evento_arrivo = simulator.schedule_event_absolute(
+            self._arrivo, simulator.time + mosse - 1, priority=Priority.LOW)
+        self.in_viaggio = True
+
+    def _arrivo(self):
+        self.in_viaggio = False
+        self._evento_arrivo = None
+        self.path_index = len(self.current_path) - 1
+        self.model.grid.move_agent(self, self.current_path[self.path_index])
+        if self.pos == self.target_position:
+            self.on_arrival()
+
+    def interrompi_viaggio(self):
+        """Ferma il viaggio in corso nella cella raggiunta finora (chiamato prima degli step dei muletti)"""
+        if not self.in_viaggio:
+            return
+        simulator = self.model.simulator
+        tempo, indice = self._partenza
+        simulator.cancel_event(self._evento_arrivo)
+        self.in_viaggio = False
+        self._evento_arrivo = None
+        self.path_index = min(indice + simulator.time - tempo, len(self.current_path) - 1)
+        self.model.grid.move_agent(self, self.current_path[self.path_index])
+
+    def vai_in_standby(self):
+        """Senza task: raggiunge il punto di standby e lì resta fermo"""
+        if self.pos != self.standby_position:
+            self.set_target(self.standby_position)
+            self.state = "GOING_TO_STANDBY"
+
+    def fine_task(self):
+        """Torna libero e si mette in coda dal dispatcher per il prossimo task"""
+        self.task_seq = None
+        self.state = "IDLE"
+        self.model.dispatcher.libero(self)
 
     def find_closest_track_to_rack(self, rack_pos: Tuple[int, int]) -> Optional[Tuple[int, int]]:
         """Trova la traccia più vicina a un rack"""
@@ -30,16 +119,19 @@ class ForkLift(CellAgent):
 
 
 class UnloadingForkLift(ForkLift):
+    flusso = SCARICO
+
     def __init__(self, model, free=True):
-        super().__init__(model, free)
         self.state = "IDLE"  # Stati: IDLE, GOING_TO_DOCK, LOADING, GOING_TO_RACK, UNLOADING
+        self.standby_position = model.layout.standby_scarico
+        super().__init__(model, free)
         self.carried_items = 0
         self.current_dock = None
         self.target_rack = None
 
     def step(self):
         if self.state == "IDLE":
-            self.look_for_dock_with_order()
+            self.vai_in_standby()
 
         elif self.state == "GOING_TO_DOCK":
             self.move_along_path()
@@ -56,71 +148,33 @@ class UnloadingForkLift(ForkLift):
             self.move_along_path()
 
 
-    def look_for_dock_with_order(self):
-        """Cerca il primo dock con un ordine da scaricare"""
-        has_work = False
-
-        for dock in self.model.unloading_docks:
-
-            if dock.current_order is not None and dock.divisione_temp is not None:
-                # Controlla se l'ordine è realmente completato guardando ENTRAMBI
-                ordine_completato = dock.current_order.get_capacita_totale() == 0
-                divisione_temp_completata = dock.divisione_temp.get_capacita_totale() == 0
-
-                # Procedi solo se entrambi hanno ancora items
-                if not ordine_completato and not divisione_temp_completata:
-                    # Cerca un rack con items per l'ordine usando divisione_temp
-                    ordine_temp = dock.divisione_temp
-
-                    # Trova un colore disponibile nell'ordine temporaneo
-                    colori_richiesti = [colore for colore, qty in ordine_temp.get_tutte_capacita().items() if qty > 0]
-
-                    if colori_richiesti:
-                        # Scegli un colore casuale tra quelli richiesti
-                        colore_scelto = choice(colori_richiesti)
-                        dock_track = self.find_closest_track_to_dock(dock.pos)
-
-                        if dock_track:
-                            has_work = True
-                            self.current_dock = dock
-                            self.current_color = colore_scelto
-
-                            # Decrementa dalla divisione_temp per prenotare l'item
-                            quantita_corrente = ordine_temp.get_capacita_per_colore(colore_scelto)
-                            ordine_temp.set_capacita_per_colore(colore_scelto, quantita_corrente - 1)
-
-                            print(f"[RESERVATION] Prenotato 1 unità di {colore_scelto.value.upper()} da divisione_temp")
-
-                            if self.pos == dock_track:
-                                # Già davanti al rack → passa direttamente a LOADING
-                                self.state = "LOADING"
-                            else:
-                                # Muoviti verso il rack
-                                self.set_target(dock_track)
-                                self.state = "GOING_TO_DOCK"
-                            break
-        # Se non c'è lavoro da fare, vai al punto standby
-        if not has_work:
-            standby_pos = (28, 28)
-            if self.pos != standby_pos:
-                self.set_target(standby_pos)
-                self.state = "GOING_TO_STANDBY"
-            # Se è già al punto standby, rimane IDLE senza muoversi
+    def assegna_task(self, seq, dock, colore_scelto, rack_pos=None) -> bool:
+        """Prende in carico il task (dock, colore) assegnato dal dispatcher"""
+        self.interrompi_viaggio()
+        dock_track = self.find_closest_track_to_dock(dock.pos)
+        if not dock_track:
+            return False
 
-    def move_along_path(self):
-        """Muoviti lungo il percorso calcolato"""
-        if not self.current_path or len(self.current_path) <= 1:
-            self.on_arrival()
-            return
+        self.task_seq = seq
+        self.current_dock = dock
+        self.current_color = colore_scelto
 
-        # Prendi il prossimo passo nel percorso
-        next_pos = self.current_path[1]
-        # Muoviti semplicemente senza controlli di collisione
-        self.model.grid.move_agent(self, next_pos)
-        self.current_path.pop(0)
-        # Se hai raggiunto la destinazione
-        if self.pos == self.target_position:
-            self.on_arrival()
+        # Decrementa dalla divisione_temp per prenotare l'item
+        ordine_temp = dock.divisione_temp
+        quantita_corrente = ordine_temp.get_capacita_per_colore(colore_scelto)
+        ordine_temp.set_capacita_per_colore(colore_scelto, quantita_corrente - 1)
+
+        if self.model.tracer is not None:
+            self.model.tracer.emit(Evento.RESERVATION, self, dock.pos, colore_scelto, 1, SCARICO)
+
+        if self.pos == dock_track:
+            # Già davanti al dock → passa direttamente a LOADING
+            self.state = "LOADING"
+        else:
+            # Muoviti verso il dock
+            self.set_target(dock_track)
+            self.state = "GOING_TO_DOCK"
+        return True
 
     def on_arrival(self):
         """Chiamata quando il muletto raggiunge la destinazione"""
@@ -133,29 +187,23 @@ class UnloadingForkLift(ForkLift):
             self.state = "IDLE"
 
     def find_closest_track_to_dock(self, dock_pos):
-        """Trova la traccia più vicina a un dock"""
-        x, y = dock_pos
-        # Controlla le posizioni adiacenti al dock
-        for dx, dy in [(0, 1), (0, -1), (1, 0), (-1, 0)]:
-            adjacent_pos = (x + dx, y + dy)
-            if self.model.is_track_position(adjacent_pos):
-                return adjacent_pos
-        return None
+        """Trova la traccia più vicina a un dock (precalcolata nel layout compilato)"""
+        return self.model.layout_compilato.accesso_dock.get(dock_pos)
 
     def load_items_from_dock(self):
         """Carica un solo elemento (di un colore casuale disponibile) dall'ordine del dock"""
         ordine = self.current_dock.current_order
         # Trova tutti i colori con almeno 1 unità disponibile
-        colori_disponibili = [colore for colore, qty in ordine.get_tutte_capacita().items() if qty > 0]
+        colori_disponibili = ordine.colori_disponibili()
 
         if not colori_disponibili:
             # Ordine completato
             self.current_dock.current_order = None
-            self.state = "IDLE"
+            self.fine_task()
             return
 
         # Scegli un colore casuale tra quelli disponibili
-        colore_scelto = choice(colori_disponibili)
+        colore_scelto = self.random.choice(colori_disponibili)
         colore = colore_scelto.value
         empty_rack_pos = self.find_empty_rack(colore)
         if empty_rack_pos is None:
@@ -165,6 +213,8 @@ class UnloadingForkLift(ForkLift):
         quantita_corrente = ordine.get_capacita_per_colore(colore_scelto)
         # Decrementa di 1 la quantità per quel colore
         ordine.set_capacita_per_colore(colore_scelto, quantita_corrente - 1)
+        if self.model.tracer is not None:
+            self.model.tracer.emit(Evento.PICK, self, self.current_dock.pos, colore_scelto, 1, SCARICO)
         self.set_target(empty_rack_pos)
         # Passa alla fase successiva
         self.free = False
@@ -174,47 +224,47 @@ class UnloadingForkLift(ForkLift):
 
     def find_empty_rack(self, color: str):
         """Trova un rack con spazio disponibile per il colore dato, partendo da quello più a destra"""
-        # Ordina gli scaffali per coordinata x decrescente (da destra a sinistra)
-        sorted_shelves = sorted(self.model.shelves.items(), key=lambda item: item[0][0], reverse=True)
-
-        for (x, y), rack in sorted_shelves:
-            rack_color = rack.get_colore()  # supponiamo restituisca una stringa
-            if rack_color == color and rack.get_occupazione_corrente() < 15:
-                return (x, y + 1)
-        return None
+        # L'inventario mantiene per ogni colore i rack con spazio, ordinati da destra a sinistra
+        rack_pos = self.model.shelves.rack_con_spazio(color)
+        if rack_pos is None:
+            return None
+        x, y = rack_pos
+        return (x, y + 1)
 
     def unload_items_to_rack(self):
         """Scarica gli items nel rack"""
         rack_pos = self.target_position
-        print(f"[LOADING] POSIZOINE {rack_pos}")
         self.target_position = None
         posizione = (rack_pos[0], rack_pos[1] - 1)
         if posizione:
             rack = self.model.shelves[posizione]
-            print(f"RACKK {posizione}")
             # Aggiungi gli items al rack
             rack.aggiungi_items(1)
+            if self.model.tracer is not None:
+                self.model.tracer.emit(Evento.DROP, self, posizione, rack.get_colore(), 1, SCARICO)
             self.free = True
             self.carried_items = 0
             self.target_rack = None
             self.current_dock = None
-            self.state = "IDLE"
+            self.fine_task()
 
 
 
 class LoadingForkLift(ForkLift):
+    flusso = CARICO
+
     def __init__(self, model, free=True):
-        super().__init__(model, free)
         self.state = "IDLE"  # Stati: IDLE, GOING_TO_RACK, LOADING, GOING_TO_DOCK, UNLOADING
+        self.standby_position = model.layout.standby_carico
+        super().__init__(model, free)
         self.carried_items = 0
         self.current_dock = None
         self.target_rack = None
         self.current_color = None  # Colore dell'item trasportato
-        self.standby_position = (14, 1)
 
     def step(self):
         if self.state == "IDLE":
-            self.look_for_dock_with_order()
+            self.vai_in_standby()
 
         elif self.state == "GOING_TO_DOCK":
             self.move_along_path()
@@ -231,68 +281,32 @@ class LoadingForkLift(ForkLift):
         elif self.state == "GOING_TO_STANDBY":
             self.move_along_path()
 
-    def look_for_dock_with_order(self):
-        """Cerca il primo dock con un ordine da caricare"""
-        has_work = False
-
-        for dock in self.model.loading_docks:
-            # Verifica che ci sia sia un ordine che una divisione_temp
-            if dock.current_order is not None and dock.divisione_temp is not None:
-                # Controlla se l'ordine è realmente completato guardando ENTRAMBI
-                ordine_completato = dock.current_order.get_capacita_totale() == 0
-                divisione_temp_completata = dock.divisione_temp.get_capacita_totale() == 0
-
-                # Procedi solo se entrambi hanno ancora items
-                if not ordine_completato and not divisione_temp_completata:
-                    # Cerca un rack con items per l'ordine usando divisione_temp
-                    ordine_temp = dock.divisione_temp
-
-                    # Trova un colore disponibile nell'ordine temporaneo
-                    colori_richiesti = [colore for colore, qty in ordine_temp.get_tutte_capacita().items() if qty > 0]
-
-                    if colori_richiesti:
-                        # Scegli un colore casuale tra quelli richiesti
-                        colore_scelto = choice(colori_richiesti)
-                        rack_pos = self.find_rack_with_items(colore_scelto.value)
-
-                        if rack_pos:
-                            has_work = True
-                            self.current_dock = dock
-                            self.current_color = colore_scelto
-                            # Decrementa dalla divisione_temp per prenotare l'item
-                            quantita_corrente = ordine_temp.get_capacita_per_colore(colore_scelto)
-                            ordine_temp.set_capacita_per_colore(colore_scelto, quantita_corrente - 1)
-                            print(f"[RESERVATION] Prenotato 1 unità di {colore_scelto.value.upper()} da divisione_temp")
-
-                            if self.pos == rack_pos:
-                                # Già davanti al rack → passa direttamente a LOADING
-                                self.state = "LOADING"
-                            else:
-                                # Muoviti verso il rack
-                                self.set_target(rack_pos)
-                                self.state = "GOING_TO_RACK"
-                            break
-        # Se non c'è lavoro da fare, vai al punto standby
-        if not has_work:
-            if self.pos != self.standby_position:
-                self.set_target(self.standby_position)
-                self.state = "GOING_TO_STANDBY"
-            # Se è già al punto standby, rimane IDLE senza muoversi
-
-    def move_along_path(self):
-        """Muoviti lungo il percorso calcolato"""
-        if not self.current_path or len(self.current_path) <= 1:
-            self.on_arrival()
-            return
-
-        # Prendi il prossimo passo nel percorso
-        next_pos = self.current_path[1]
-        # Muoviti semplicemente senza controlli di collisione
-        self.model.grid.move_agent(self, next_pos)
-        self.current_path.pop(0)
-        # Se hai raggiunto la destinazione
-        if self.pos == self.target_position:
-            self.on_arrival()
+    def assegna_task(self, seq, dock, colore_scelto, rack_pos) -> bool:
+        """Prende in carico il task (dock, colore) con il rack già prenotato dal dispatcher"""
+        self.interrompi_viaggio()
+        self.task_seq = seq
+        self.current_dock = dock
+        self.current_color = colore_scelto
+        self.target_rack = rack_pos
+
+        # Decrementa dalla divisione_temp per prenotare l'item
+        ordine_temp = dock.divisione_temp
+        quantita_corrente = ordine_temp.get_capacita_per_colore(colore_scelto)
+        ordine_temp.set_capacita_per_colore(colore_scelto, quantita_corrente - 1)
+        if self.model.tracer is not None:
+            self.model.tracer.emit(Evento.RESERVATION, self, rack_pos, colore_scelto, 1, CARICO)
+
+        # Traccia adiacente al rack prenotato
+        x, y = rack_pos
+        rack_track = (x, y + 1)
+        if self.pos == rack_track:
+            # Già davanti al rack → passa direttamente a LOADING
+            self.state = "LOADING"
+        else:
+            # Muoviti verso il rack
+            self.set_target(rack_track)
+            self.state = "GOING_TO_RACK"
+        return True
 
     def on_arrival(self):
         """Chiamata quando il muletto raggiunge la destinazione"""
@@ -319,7 +333,10 @@ class LoadingForkLift(ForkLift):
                 # Rimuovi 1 item dal rack
                 if rack.rimuovi_items(1):
                     self.carried_items = 1
-                    print(f"[LOADING] Caricato 1 unità di {self.current_color.value.upper()} dal rack {rack_pos}")
+                    # L'item prenotato è stato prelevato: la prenotazione è consumata
+                    self.target_rack = None
+                    if self.model.tracer is not None:
+                        self.model.tracer.emit(Evento.PICK, self, rack_pos, self.current_color, 1, CARICO)
                     self.free = False
                     # Muoviti verso il dock
                     dock_track = self.find_closest_track_to_dock(self.current_dock.pos)
@@ -328,28 +345,40 @@ class LoadingForkLift(ForkLift):
                         self.set_target(dock_track)
                         self.state = "GOING_TO_DOCK"
                     else:
-                        print("[ERROR] Impossibile trovare traccia per il dock")
+                        self._trace_error(rack_pos)
                         self._restore_item_and_go_standby()
                 else:
-                    print("[ERROR] Impossibile rimuovere item dal rack")
+                    self._trace_error(rack_pos)
                     self._restore_item_and_go_standby()
             else:
-                print(f"[ERROR] Rack non ha items del colore richiesto: {self.current_color.value}")
+                self._trace_error(rack_pos)
                 self._restore_item_and_go_standby()
         else:
-            print(f"[ERROR] Nessun rack trovato in posizione {rack_pos}")
+            self._trace_error(rack_pos)
             self._restore_item_and_go_standby()
 
+    def _trace_error(self, pos):
+        """Registra un'operazione di carico/scarico fallita"""
+        if self.model.tracer is not None:
+            self.model.tracer.emit(Evento.ERROR, self, pos, self.current_color, flusso=CARICO)
+
     def _restore_item_and_go_standby(self):
         """Metodo helper per ripristinare l'item e andare al punto standby"""
-        # Riaggiunge l'item alla divisione_temp
+        # Riaggiunge l'item alla divisione_temp e rimette in coda il task
         if self.current_dock and self.current_dock.divisione_temp and self.current_color:
             ordine_temp = self.current_dock.divisione_temp
             quantita_corrente = ordine_temp.get_capacita_per_colore(self.current_color)
             ordine_temp.set_capacita_per_colore(self.current_color, quantita_corrente + 1)
+            if self.task_seq is not None:
+                self.model.dispatcher.ripristina(self.task_seq, self.current_dock, self.current_color, True)
+
+        # Rilascia la prenotazione sul rack se l'item non è stato prelevato
+        if self.target_rack is not None:
+            self.model.shelves.rilascia(self.target_rack)
 
-        # Reset dello stato e vai al punto standby
+        # Reset dello stato e vai al punto standby, disponibile per un nuovo task
         self.reset_state()
+        self.fine_task()
         self.set_target(self.standby_position)
         self.state = "GOING_TO_STANDBY"
 
@@ -363,9 +392,9 @@ class LoadingForkLift(ForkLift):
             ordine.set_capacita_per_colore(self.current_color, quantita_corrente - 1)
 
             self.carried_items = 0
-            print(f"[UNLOADING] Scaricato 1 unità di {self.current_color.value.upper()} al dock {self.current_dock.pos}")
-            print(f"[UNLOADING] Capacità rimanente per {self.current_color.value.upper()}: {quantita_corrente}")
-            print(f"[UNLOADING] Capacità totale rimanente: {ordine.get_capacita_totale()}")
+            if self.model.tracer is not None:
+                self.model.tracer.emit(Evento.DROP, self, self.current_dock.pos, self.current_color,
+                                       ordine.get_capacita_totale(), CARICO)
             self.free = True
             # Controlla se l'ordine è completato usando SOLO l'ordine originale
             if ordine.get_capacita_totale() == 0:
@@ -373,35 +402,19 @@ class LoadingForkLift(ForkLift):
                 self.current_dock.current_order = None
                 self.current_dock.free = True
                 self.reset_state()
-                self.state = "IDLE"
+                self.fine_task()
             else:
-                # Continua con l'ordine - cerca il prossimo item
+                # Continua con l'ordine - il dispatcher assegna il prossimo item
                 self.reset_state()
-                self.state = "IDLE"
+                self.fine_task()
         else:
-            print("[ERROR] Nessun item da scaricare o dock non valido")
+            self._trace_error(self.pos)
             self.reset_state()
-            self.state = "IDLE"
+            self.fine_task()
 
     def find_closest_track_to_dock(self, dock_pos):
-        """Trova la traccia più vicina a un dock"""
-        x, y = dock_pos
-        # Controlla le posizioni adiacenti al dock
-        for dx, dy in [(0, 1), (0, -1), (1, 0), (-1, 0)]:
-            adjacent_pos = (x + dx, y + dy)
-            if self.model.is_track_position(adjacent_pos):
-                return adjacent_pos
-        return None
-
-    def find_rack_with_items(self, color: str):
-        """Trova un rack con items del colore specificato"""
-        for (x, y), rack in self.model.shelves.items():
-            if rack.get_colore() == color and rack.get_occupazione_corrente() > 0 and rack.get_occupazione_temp() > 0:
-                # Decrementa l'occupazione_temp del rack
-                rack.set_occupazione_temp(rack.get_occupazione_temp() - 1)
-                # Restituisce la posizione della traccia adiacente al rack
-                return (x, y + 1)
-        return None
+        """Trova la traccia più vicina a un dock (precalcolata nel layout compilato)"""
+        return self.model.layout_compilato.accesso_dock.get(dock_pos)
 
     def reset_state(self):
         """Resetta lo stato del muletto"""
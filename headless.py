@@ -0,0 +1,204 @@
+"""Esecuzione della simulazione senza interfaccia grafica.
+
+Importa solo i moduli del modello (niente Solara né matplotlib): costruisce un
+WarehouseModel con i parametri dati, esegue gli step in un ciclo stretto e salva le
+metriche raccolte in formato .npz, .csv o .parquet in base all'estensione del file.
+
+Uso: python headless.py --steps 1000 --seed 42 --output metriche.npz [--order_time 20 ...]
+     python headless.py --steps 1000 --seed 42 --check-determinism
+     python headless.py --steps 1000 --trace eventi.bin --trace-level debug
+     python headless.py --steps 100000 --seed 42 --checkpoint ckpt --checkpoint-every 5000 [--resume]
+"""
+import argparse
+import hashlib
+import os
+import subprocess
+import sys
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from mesa.experimental.devs import ABMSimulator
+
+from checkpoint import FILE_STATO, Checkpointer, leggi_intestazione
+from tracing import BinaryFileSink, Livello, Tracer
+from warehouse_model import WarehouseModel
+
+# Parametri del modello configurabili da riga di comando (gli stessi di model_params in main.py)
+PARAMETRI = (
+    ("width", int),
+    ("height", int),
+    ("num_unloading", int),
+    ("num_loading", int),
+    ("dock_capacity", int),
+    ("order_time", int),
+    ("num_unloading_forkLift", int),
+    ("num_loading_forkLift", int),
+    ("initial_warehouse_filling", int),
+    ("routing", str),
+    ("travel", str),
+)
+
+ESPORTAZIONI = {
+    ".npz": "to_npz",
+    ".csv": "to_csv",
+    ".parquet": "to_parquet",
+}
+
+
+def build_model(params: Optional[Dict[str, Any]] = None, seed: Optional[int] = None,
+                tracer: Optional[Tracer] = None) -> WarehouseModel:
+    """Crea il modello con i parametri dati, riproducibile se seed non è None"""
+    return WarehouseModel(simulator=ABMSimulator(), seed=seed, tracer=tracer, **(params or {}))
+
+
+def fingerprint(model: WarehouseModel) -> str:
+    """Impronta SHA-1 di tutte le metriche registrate, per confrontare due traiettorie"""
+    digest = hashlib.sha1()
+    for name, column in model.data_collector.columns().items():
+        digest.update(name.encode())
+        digest.update(column.tobytes())
+    return digest.hexdigest()
+
+
+def check_determinism(params: Optional[Dict[str, Any]] = None, steps: int = 1000,
+                      seed: int = 0) -> Tuple[str, str, str]:
+    """Impronte delle metriche di tre esecuzioni con lo stesso seed, che devono coincidere.
+
+    Esegue due modelli con lo stesso seed alternandone gli step nello stesso processo
+    (non devono influenzarsi a vicenda) e un terzo in un nuovo interprete con un diverso
+    PYTHONHASHSEED; ritorna le impronte dei due modelli locali e di quello remoto.
+    """
+    models = [build_model(params, seed), build_model(params, seed)]
+    for _ in range(steps):
+        for model in models:
+            model.run_for(1)
+    local = [fingerprint(model) for model in models]
+
+    probe = (f"import headless; print(headless.fingerprint("
+             f"headless.run({params!r}, {steps!r}, {seed!r})))")
+    env = dict(os.environ, PYTHONHASHSEED="12345")
+    remote = subprocess.run([sys.executable, "-c", probe], cwd=os.path.dirname(os.path.abspath(__file__)),
+                            env=env, check=True, capture_output=True, text=True).stdout.split()[-1]
+
+    return local[0], local[1], remote
+
+
+def _esportazione(output: str) -> str:
+    """Metodo di MetricsRecorder da usare per il file di output"""
+    ext = os.path.splitext(output)[1].lower()
+    if ext not in ESPORTAZIONI:
+        raise ValueError(f"Formato di esportazione non supportato: {ext or output}")
+    return ESPORTAZIONI[ext]
+
+
+def save_metrics(model: WarehouseModel, output: str):
+    """Salva le metriche del modello nel formato indicato dall'estensione del file"""
+    getattr(model.data_collector, _esportazione(output))(output)
+
+
+def run(params: Optional[Dict[str, Any]] = None, steps: int = 1000, seed: Optional[int] = None,
+        output: Optional[str] = None, tracer: Optional[Tracer] = None, checkpoint: Optional[str] = None,
+        checkpoint_every: int = 1000, resume: bool = False) -> WarehouseModel:
+    """Esegue la simulazione per il numero di step indicato e ritorna il modello finale.
+
+    Con ``checkpoint`` scrive un checkpoint nella cartella ogni ``checkpoint_every`` step;
+    con ``resume`` riprende dall'ultimo checkpoint della cartella (params e seed vengono
+    ignorati) e prosegue fino a ``steps`` step in totale.
+    """
+    if output is not None:
+        _esportazione(output)  # Formato non valido: errore prima di simulare
+    if checkpoint is None:
+        if resume:
+            raise ValueError("Per riprendere serve la cartella del checkpoint")
+        model = build_model(params, seed, tracer)
+        # Il simulatore esegue gli step e, con travel="events", gli arrivi dei muletti
+        model.run_for(steps)
+    else:
+        if resume:
+            checkpointer = Checkpointer.riprendi(checkpoint, checkpoint_every, tracer=tracer)
+        else:
+            checkpointer = Checkpointer(build_model(params, seed, tracer), checkpoint, checkpoint_every)
+        model = checkpointer.model
+        try:
+            checkpointer.run_for(max(steps - model.steps, 0))
+        finally:
+            checkpointer.chiudi()
+    if output is not None:
+        save_metrics(model, output)
+    return model
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--steps", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--output", default=None, help="File .npz, .csv o .parquet per le metriche")
+    parser.add_argument("--trace", default=None, help="File binario in cui registrare gli eventi")
+    parser.add_argument("--trace-level", choices=[livello.name.lower() for livello in Livello], default="info")
+    parser.add_argument("--trace-print", action="store_true", help="Stampa gli eventi registrati")
+    parser.add_argument("--fast-forward", action="store_true",
+                        help="Salta gli step senza lavoro fino al prossimo ordine")
+    parser.add_argument("--cooperative", action="store_true",
+                        help="Percorsi senza collisioni con la tabella delle prenotazioni spazio-tempo")
+    parser.add_argument("--layout-cache", default=None,
+                        help="Cartella in cui salvare e da cui caricare il layout compilato")
+    parser.add_argument("--checkpoint", default=None, help="Cartella in cui scrivere i checkpoint")
+    parser.add_argument("--checkpoint-every", type=int, default=1000, help="Step tra due checkpoint")
+    parser.add_argument("--resume", action="store_true",
+                        help="Riprende dall'ultimo checkpoint fino a --steps step in totale")
+    parser.add_argument("--check-determinism", action="store_true",
+                        help="Verifica che lo stesso seed riproduca la stessa traiettoria")
+    for name, kind in PARAMETRI:
+        parser.add_argument(f"--{name}", type=kind, default=None)
+    args = parser.parse_args(argv)
+    if args.resume and args.checkpoint is None:
+        parser.error("--resume richiede --checkpoint")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    params = {name: getattr(args, name) for name, _ in PARAMETRI if getattr(args, name) is not None}
+    if args.fast_forward:
+        params["fast_forward"] = True
+    if args.cooperative:
+        params["cooperative"] = True
+    if args.layout_cache is not None:
+        params["layout_cache"] = args.layout_cache
+
+    if args.check_determinism:
+        seed = args.seed if args.seed is not None else 0
+        primo, secondo, remoto = check_determinism(params, args.steps, seed)
+        print(f"Impronte: {primo} {secondo} (stesso processo), {remoto} (nuovo processo)")
+        if not primo == secondo == remoto:
+            print("Traiettorie diverse con lo stesso seed")
+            sys.exit(1)
+        print("Traiettorie identiche")
+        return
+
+    tracer = None
+    if args.trace is not None or args.trace_print:
+        sink = BinaryFileSink(args.trace) if args.trace is not None else None
+        tracer = Tracer(sink, Livello[args.trace_level.upper()], stampa=args.trace_print)
+
+    t0 = time.perf_counter()
+    try:
+        model = run(params, args.steps, args.seed, args.output, tracer, args.checkpoint, args.checkpoint_every,
+                    args.resume)
+    finally:
+        if tracer is not None:
+            tracer.close()
+    elapsed = time.perf_counter() - t0
+
+    print(f"{args.steps} step in {elapsed:.2f} s: {model.ordini_carico_completati} ordini di carico e "
+          f"{model.ordini_scarico_completati} ordini di scarico completati")
+    if args.output is not None:
+        print(f"Metriche salvate in {args.output}")
+    if args.trace is not None:
+        print(f"{tracer.sink.written} eventi registrati in {args.trace}")
+    if args.checkpoint is not None and os.path.exists(os.path.join(args.checkpoint, FILE_STATO)):
+        print(f"Ultimo checkpoint in {args.checkpoint} allo step {leggi_intestazione(args.checkpoint)['step']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""Generatore parametrico del layout del magazzino.
+
+Il layout è una griglia di blocchi di rack separati da corridoi larghi ``spacing``
+celle. In ogni blocco i rack occupano una riga sì e una no: le righe libere sono i
+corridoi interni da cui i muletti raggiungono la cella sopra ogni rack. Attorno ai
+blocchi corre un anello di tracce, sul cui bordo esterno stanno i dock.
+
+Ogni riga di rack ha sopra di sé un corridoio, che contiene la cella di accesso
+(x, y + 1) di ogni suo rack. Con i parametri predefiniti e ``corridoi_storici=True``
+il generatore riproduce invece esattamente il layout storico 30x30 (quattro blocchi
+10x10, dock di scarico a destra e di carico in basso, standby in (28, 28) e (14, 1)),
+comprese le sue particolarità: i corridoi interni sono spostati di due celle verso il
+basso rispetto ai rack, quindi la cella di accesso dell'ultima riga di rack di ogni
+blocco non è una traccia.
+"""
+from typing import Iterable, List, Optional, Tuple
+
+from order import COLORI_ORDINE
+
+Posizione = Tuple[int, int]
+
+# Colori delle righe di rack di un blocco, dal basso verso l'alto: si alternano per riga di blocchi
+# (per colonna se c'è una sola riga di blocchi, così compaiono comunque tutti i colori)
+SCHEMI_COLORI = (
+    ("orange", "orange", "yellow", "yellow", "blue"),
+    ("blue", "red", "red", "green", "green"),
+)
+
+LATI = ("destra", "sinistra", "alto", "basso")
+
+
+class Layout:
+    """Layout completo: dimensioni, rack con i loro colori, tracce, dock e punti di standby.
+
+    Le posizioni dei rack sono nell'ordine di creazione dell'inventario (blocchi dall'alto
+    verso il basso e da sinistra a destra, dentro ogni blocco per colonne), che determina
+    gli indici dei rack e il riempimento casuale iniziale.
+    """
+
+    def __init__(self, width: int, height: int, rack_positions: List[Posizione], rack_colors: List[str],
+                 tracks: Iterable[Posizione], dock_scarico: List[Posizione], dock_carico: List[Posizione],
+                 standby_scarico: Posizione, standby_carico: Posizione):
+        self.width = width
+        self.height = height
+        self.rack_positions = rack_positions
+        self.rack_colors = rack_colors
+        self.tracks = frozenset(tracks)  # Condivisibile tra modelli: non va modificato
+        self.dock_scarico = dock_scarico
+        self.dock_carico = dock_carico
+        self.standby_scarico = standby_scarico
+        self.standby_carico = standby_carico
+        self._compilato = None  # LayoutCompilato condiviso dai modelli (vedi compiled_layout.compila)
+
+    def __repr__(self) -> str:
+        return (f"Layout({self.width}x{self.height}, {len(self.rack_positions)} rack, {len(self.tracks)} tracce, "
+                f"{len(self.dock_scarico)}+{len(self.dock_carico)} dock)")
+
+
+def _posizioni_dock(lato: str, n: int, width: int, height: int, centrati: bool) -> List[Posizione]:
+    """Celle di n dock lungo il bordo dato: centrati o a partire dalla seconda cella"""
+    if lato not in LATI:
+        raise ValueError(f"Lato dei dock sconosciuto: {lato}")
+    lunghezza = height if lato in ("destra", "sinistra") else width
+    inizio = lunghezza // 2 - n // 2 if centrati else 1
+    celle = [inizio + i for i in range(n) if 0 <= inizio + i < lunghezza]
+    if lato == "destra":
+        return [(width - 1, c) for c in celle]
+    if lato == "sinistra":
+        return [(0, c) for c in celle]
+    if lato == "alto":
+        return [(c, height - 1) for c in celle]
+    return [(c, 0) for c in celle]
+
+
+def genera_layout(righe_blocchi: int = 2, colonne_blocchi: int = 2, block_size: int = 10, spacing: int = 3,
+                  start_x: int = 3, start_y: int = 4, width: Optional[int] = None, height: Optional[int] = None,
+                  num_unloading: int = 2, num_loading: int = 2,
+                  lato_scarico: str = "destra", lato_carico: str = "basso",
+                  corridoi_storici: bool = False) -> Layout:
+    """Layout di righe_blocchi x colonne_blocchi blocchi di block_size x block_size celle.
+
+    width e height predefiniti lasciano attorno ai blocchi il margine del layout storico
+    (30x30 con i valori predefiniti); con dimensioni minori i rack fuori griglia vengono
+    scartati. I dock di scarico sono centrati sul loro lato, quelli di carico partono
+    dalla seconda cella del loro. ``corridoi_storici`` sposta i corridoi interni come nel
+    layout storico (solo per compatibilità: alcuni rack restano senza cella di accesso).
+
+    Solleva ValueError se manca un colore degli ordini (blocchi troppo bassi per tutte le
+    righe colorate) o se un rack non ha la cella di accesso su una traccia.
+    """
+    if righe_blocchi < 1 or colonne_blocchi < 1 or block_size < 2:
+        raise ValueError("Servono almeno un blocco e blocchi di almeno 2 celle")
+    if start_x < 2 or start_y < 3:
+        raise ValueError("I blocchi devono lasciare spazio ai corridoi esterni (start_x >= 2, start_y >= 3)")
+    passo = block_size + spacing
+    if width is None:
+        width = start_x + colonne_blocchi * passo - spacing + 4
+    if height is None:
+        height = start_y + righe_blocchi * passo - spacing + 3
+
+    # Rack: righe di blocchi dall'alto, blocchi da sinistra, colonne del blocco, righe pari
+    righe_rack = range(0, block_size, 2)
+    rack_positions, rack_colors = [], []
+    for riga in reversed(range(righe_blocchi)):
+        origin_y = start_y + riga * passo
+        for colonna in range(colonne_blocchi):
+            schema = SCHEMI_COLORI[(riga if righe_blocchi > 1 else colonna) % len(SCHEMI_COLORI)]
+            colori = [schema[dy * len(schema) // block_size] for dy in righe_rack]
+            origin_x = start_x + colonna * passo
+            for x in range(origin_x, min(origin_x + block_size, width)):
+                for dy, colore in zip(righe_rack, colori):
+                    if origin_y + dy < height:
+                        rack_positions.append((x, origin_y + dy))
+                        rack_colors.append(colore)
+
+    # Tracce: anello esterno, corridoi tra i blocchi e corridoi interni dei blocchi
+    x_sinistra, x_destra = start_x - 2, width - 2
+    y_basso, y_alto = start_y - 3, height - 2
+    corridoi_y = {y_basso, y_alto}
+    corridoi_x = [x_sinistra, x_destra]
+    for riga in range(righe_blocchi):
+        origin_y = start_y + riga * passo
+        if corridoi_storici:
+            corridoi_y.update(origin_y + dy - 2 for dy in range(1, block_size, 2))
+        else:
+            corridoi_y.update(origin_y + dy + 1 for dy in righe_rack)
+        if riga + 1 < righe_blocchi:
+            corridoi_y.add(int(origin_y + passo - spacing / 2))
+    for colonna in range(colonne_blocchi - 1):
+        corridoi_x.append(int(start_x + (colonna + 1) * passo - spacing / 2))
+
+    tracks = set()
+    colonne_celle = range(x_sinistra, x_destra + 1)
+    for y in corridoi_y:
+        if 0 <= y < height:
+            tracks.update((x, y) for x in colonne_celle)
+    for x in corridoi_x:
+        tracks.update((x, y) for y in range(y_basso, y_alto + 1))
+
+    mancanti = [c.value for c in COLORI_ORDINE if c.value not in set(rack_colors)]
+    if mancanti:
+        raise ValueError(f"Nessun rack dei colori {', '.join(mancanti)}: servono almeno due blocchi "
+                         f"e blocchi più alti (block_size={block_size})")
+    if not corridoi_storici:
+        senza_accesso = sum((x, y + 1) not in tracks for x, y in rack_positions)
+        if senza_accesso:
+            raise ValueError(f"{senza_accesso} rack senza cella di accesso su una traccia: "
+                             f"la griglia {width}x{height} è troppo piccola per i blocchi")
+
+    standby_carico = (sorted(corridoi_x)[len(corridoi_x) // 2], y_basso)
+    return Layout(
+        width, height, rack_positions, rack_colors, tracks,
+        dock_scarico=_posizioni_dock(lato_scarico, num_unloading, width, height, centrati=True),
+        dock_carico=_posizioni_dock(lato_carico, num_loading, width, height, centrati=False),
+        standby_scarico=(x_destra, y_alto),
+        standby_carico=standby_carico,
+    )
@@ -1,9 +1,10 @@
 import solara
-from matplotlib import patches, pyplot as plt
 
 
 from dock import Dock, UnloadingDock, LoadingDock
 from forkLift import ForkLift, UnloadingForkLift, LoadingForkLift
+from warehouse_plots import grafici_magazzino
+from warehouse_render import mappa_magazzino
 from warehouse_model import WarehouseModel
 from mesa.experimental.devs import ABMSimulator
 from mesa.visualization import (
@@ -66,7 +67,7 @@ def warehouse_status_component(model):
         if dock.current_order is not None:
             # Dock occupato - mostra i colori dell'ordine
             colors_info = []
-            for color, quantity in dock.current_order.get_tutte_capacita().items():
+            for color, quantity in dock.current_order.vista_capacita().items():
                 if quantity > 0:  # Mostra solo i colori con quantità > 0
                     colors_info.append(f"{color.value.capitalize()}: {quantity}")
 
@@ -84,7 +85,7 @@ def warehouse_status_component(model):
         if dock.current_order is not None:
             # Dock occupato - mostra i colori dell'ordine
             colors_info = []
-            for color, quantity in dock.current_order.get_tutte_capacita().items():
+            for color, quantity in dock.current_order.vista_capacita().items():
                 if quantity > 0:  # Mostra solo i colori con quantità > 0
                     colors_info.append(f"{color.value.capitalize()}: {quantity}")
 
@@ -173,223 +174,10 @@ def post_process_space(ax):
     elif hasattr(ax, '_model'):
         model_to_use = ax._model
 
-    block_size = 10
-    spacing = 3
-    start_x = 3
-    start_y = 4
-
-    # Primo blocco
-    origin_x, origin_y = start_x, start_y + block_size + spacing
-    for dx in range(block_size):
-        for dy in range(0, block_size, 2):
-            x = origin_x + dx
-            y = origin_y + dy
-
-            if dy < 2:
-                color = "blue"
-            elif dy < 6:
-                color = "red"
-            else:
-                color = "green"
-
-            if x < 30 and y < 30:
-                rect = patches.Rectangle((x - 0.45, y - 0.45), 0.92, 0.92,
-                                         linewidth=1, edgecolor='black',
-                                         facecolor=color, alpha=0.7, zorder=1)
-                ax.add_patch(rect)
-
-                # Ottieni l'occupazione dal modello
-                occupazione = 0
-                if model_to_use and (x, y) in model_to_use.shelves:
-                    rack = model_to_use.shelves[(x, y)]
-                    occupazione = rack.get_occupazione_corrente()
-
-                display_text = f"{occupazione}"
-
-                ax.text(x, y, display_text,
-                        ha='center', va='center',
-                        fontsize=5.3, fontweight='bold',
-                        color='black', zorder=2)
-
-    # Secondo blocco
-    origin_x, origin_y = start_x + block_size + spacing, start_y + block_size + spacing
-    for dx in range(block_size):
-        for dy in range(0, block_size, 2):
-            x = origin_x + dx
-            y = origin_y + dy
-
-            if dy < 2:
-                color = "blue"
-            elif dy < 6:
-                color = "red"
-            else:
-                color = "green"
-
-            if x < 30 and y < 30:
-                rect = patches.Rectangle((x - 0.45, y - 0.45), 0.92, 0.92,
-                                         linewidth=1, edgecolor='black',
-                                         facecolor=color, alpha=0.7, zorder=1)
-                ax.add_patch(rect)
-
-                occupazione = 0
-                if model_to_use and (x, y) in model_to_use.shelves:
-                    rack = model_to_use.shelves[(x, y)]
-                    occupazione = rack.get_occupazione_corrente()
-
-                display_text = f"{occupazione}"
-
-                ax.text(x, y, display_text,
-                        ha='center', va='center',
-                        fontsize=5.3, fontweight='bold',
-                        color='black', zorder=2)
-
-    # Terzo blocco
-    origin_x, origin_y = start_x, start_y
-    for dx in range(block_size):
-        for dy in range(0, block_size, 2):
-            x = origin_x + dx
-            y = origin_y + dy
-
-            if dy < 4:
-                color = "orange"
-            elif dy < 8:
-                color = "yellow"
-            else:
-                color = "blue"
-
-            if x < 30 and y < 30:
-                rect = patches.Rectangle((x - 0.45, y - 0.45), 0.92, 0.92,
-                                         linewidth=1, edgecolor='black',
-                                         facecolor=color, alpha=0.7, zorder=1)
-                ax.add_patch(rect)
-
-                occupazione = 0
-                if model_to_use and (x, y) in model_to_use.shelves:
-                    rack = model_to_use.shelves[(x, y)]
-                    occupazione = rack.get_occupazione_corrente()
-
-                display_text = f"{occupazione}"
-
-                ax.text(x, y, display_text,
-                        ha='center', va='center',
-                        fontsize=5.3, fontweight='bold',
-                        color='black', zorder=2)
-
-    # Quarto blocco
-    origin_x, origin_y = start_x + block_size + spacing, start_y
-    for dx in range(block_size):
-        for dy in range(0, block_size, 2):
-            x = origin_x + dx
-            y = origin_y + dy
-
-            if dy < 4:
-                color = "orange"
-            elif dy < 8:
-                color = "yellow"
-            else:
-                color = "blue"
-
-            if x < 30 and y < 30:
-                rect = patches.Rectangle((x - 0.45, y - 0.45), 0.92, 0.92,
-                                         linewidth=1, edgecolor='black',
-                                         facecolor=color, alpha=0.7, zorder=1)
-                ax.add_patch(rect)
-
-                occupazione = 0
-                if model_to_use and (x, y) in model_to_use.shelves:
-                    rack = model_to_use.shelves[(x, y)]
-                    occupazione = rack.get_occupazione_corrente()
-
-                display_text = f"{occupazione}"
-
-                ax.text(x, y, display_text,
-                        ha='center', va='center',
-                        fontsize=5.3, fontweight='bold',
-                        color='black', zorder=2)
-
-    # === TRACCE DEI MULETTI ===
-    # Disegna i percorsi che i muletti possono seguire
-
-    # Colore e stile delle tracce
-    track_color = 'gray'
-    track_width = 2
-    track_alpha = 0.6
-
-    # Corridoio orizzontale principale (tra i blocchi superiori e inferiori)
-    corridor_y = (start_y + block_size + spacing / 2) - 0.5
-    ax.plot([start_x - 2, model_to_use.width - 2], [corridor_y, corridor_y],
-            color=track_color, linewidth=track_width, alpha=track_alpha, zorder=0.5)
-
-    # Corridoio orizzontale alto
-    corridor_y = model_to_use.height - 2
-    ax.plot([start_x - 2, model_to_use.width - 2], [corridor_y, corridor_y],
-            color=track_color, linewidth=track_width, alpha=track_alpha, zorder=0.5)
-
-    # Corridoio orizzontale basso
-    corridor_y = start_y - 3
-    ax.plot([start_x - 2, model_to_use.width - 2], [corridor_y, corridor_y],
-            color=track_color, linewidth=track_width, alpha=track_alpha, zorder=0.5)
-
-    # Corridoi orizzontali all'interno dei blocchi
-    for dy in range(1, block_size, 2):  # Tracce tra le righe di rack
-        # Bloccchi superiori
-        corridor_y1 = start_y + block_size + spacing + dy
-        ax.plot([start_x - 2, model_to_use.width - 2], [corridor_y1, corridor_y1],
-                color=track_color, linewidth=1, alpha=track_alpha, zorder=0.5)
-
-        # Blocchi inferiori
-        corridor_y3 = start_y + dy
-        ax.plot([start_x - 2, model_to_use.width - 2], [corridor_y3, corridor_y3],
-                color=track_color, linewidth=1, alpha=track_alpha, zorder=0.5)
-
-    # Corridoio verticale centrale (tra i blocchi sinistri e destri)
-    corridor_x = (start_x + block_size + spacing / 2) - 0.5
-    ax.plot([corridor_x, corridor_x], [start_y - 3, model_to_use.height - 2],
-            color=track_color, linewidth=track_width, alpha=track_alpha, zorder=0.5)
-
-    # Corridoio verticale a sinistra
-    corridor_x = start_x - 2
-    ax.plot([corridor_x, corridor_x], [start_y - 3, model_to_use.height - 2],
-            color=track_color, linewidth=track_width, alpha=track_alpha, zorder=0.5)
-
-    # Corridoio verticale a destra
-    corridor_x = model_to_use.width - 2
-    ax.plot([corridor_x, corridor_x], [start_y - 3, model_to_use.height - 2],
-            color=track_color, linewidth=track_width, alpha=track_alpha, zorder=0.5)
-
-    # FINE DISCEGNO TRACCE
-
-    # Disegna Stand-by zone 3x3  in (14, 1) UNLOADING
-    square_center_x = 28
-    square_center_y = 28
-    square_size = 3  # 3x3
-    square_color = 'lightgray'
-
-    # Calcola il punto in basso a sinistra
-    bottom_left_x = square_center_x - 1
-    bottom_left_y = square_center_y - 1
-
-    # Disegna un singolo rettangolo grande
-    rect = patches.Rectangle((bottom_left_x - 0.45, bottom_left_y - 0.45),
-                             0.92 * square_size, 0.92 * square_size,
-                             linewidth=1.5, edgecolor='lightgray',
-                             facecolor=square_color, alpha=0.7, zorder=1)
-    ax.add_patch(rect)
-
-    # Disegna Stand-by zone 3x3  in (14, 1) LOADING
-    square_center_x = 14
-    square_center_y = 1
-
-    # Calcola il punto in basso a sinistra
-    bottom_left_x = square_center_x - 1
-    bottom_left_y = square_center_y - 1
-
-    # Disegna un singolo rettangolo grande
-    rect = patches.Rectangle((bottom_left_x - 0.45, bottom_left_y - 0.45),
-                             0.92 * square_size, 0.92 * square_size,
-                             linewidth=1.5, edgecolor='lightgray',
-                             facecolor=square_color, alpha=0.7, zorder=1)
-    ax.add_patch(rect)
+    # Sfondo statico (rack, tracce, standby) rasterizzato una volta per modello:
+    # ad ogni frame si aggiornano solo le etichette di occupazione cambiate
+    if model_to_use is not None:
+        mappa_magazzino(model_to_use).disegna(ax)
     ''''
     # === AGGIUNGI QUESTA SEZIONE PER I BORDI DELLE CELLE ===
     # Disegna i bordi di tutte le celle della griglia
@@ -433,117 +221,11 @@ def custom_space_component(model):
 def create_warehouse_plots(model):
     """Crea grafici per visualizzare i dati della simulazione"""
 
-    if not model.data_collector['step']:
+    if model.data_collector.rows == 0:
         return None
 
-    # Crea una figura con subplots
-    fig, axes = plt.subplots(4, 2, figsize=(15, 20))
-    fig.suptitle('Analisi Prestazioni Warehouse', fontsize=16, fontweight='bold')
-
-    steps = model.data_collector['step']
-
-    # Grafico 1: Occupazione Magazzino
-    ax1 = axes[0, 0]
-    ax1.plot(steps, model.data_collector['occupazione_totale'],
-             color='blue', linewidth=2, label='Occupazione Totale')
-    ax1.set_title('Occupazione Magazzino nel Tempo')
-    ax1.set_xlabel('Step')
-    ax1.set_ylabel('Occupazione (%)')
-    ax1.grid(True, alpha=0.3)
-    ax1.legend()
-
-    # Grafico 2: Ordini Processati
-    ax2 = axes[0, 1]
-    ax2.plot(steps, model.data_collector['ordini_carico_processati'],
-             color='green', linewidth=2, label='Ordini Carico')
-    ax2.plot(steps, model.data_collector['ordini_scarico_processati'],
-             color='red', linewidth=2, label='Ordini Scarico')
-    ax2.set_title('Ordini Processati')
-    ax2.set_xlabel('Step')
-    ax2.set_ylabel('Numero Ordini')
-    ax2.grid(True, alpha=0.3)
-    ax2.legend()
-
-    # Grafico 3: Efficienza Dock
-    ax3 = axes[1, 0]
-    dock_carico_occupati = [len(model.loading_docks) - liberi
-                            for liberi in model.data_collector['dock_carico_liberi']]
-    dock_scarico_occupati = [len(model.unloading_docks) - liberi
-                             for liberi in model.data_collector['dock_scarico_liberi']]
-
-    ax3.plot(steps, dock_carico_occupati, color='orange', linewidth=2, label='Dock Carico Occupati')
-    ax3.plot(steps, dock_scarico_occupati, color='purple', linewidth=2, label='Dock Scarico Occupati')
-    ax3.set_title('Utilizzo Dock')
-    ax3.set_xlabel('Step')
-    ax3.set_ylabel('Numero Dock Occupati')
-    ax3.grid(True, alpha=0.3)
-    ax3.legend()
-
-    # Grafico 4: Code di Attesa
-    ax4 = axes[1, 1]
-    ax4.plot(steps, model.data_collector['ordini_carico_in_coda'],
-             color='brown', linewidth=2, label='Coda Carico')
-    ax4.plot(steps, model.data_collector['ordini_scarico_in_coda'],
-             color='pink', linewidth=2, label='Coda Scarico')
-    ax4.set_title('Ordini in Coda')
-    ax4.set_xlabel('Step')
-    ax4.set_ylabel('Numero Ordini in Coda')
-    ax4.grid(True, alpha=0.3)
-    ax4.legend()
-
-    # Grafico 5: Muletti liberi
-    ax5 = axes[2, 0]
-    ax5.plot(steps, model.data_collector['muletti_carico_liberi'],
-             color='cyan', linewidth=2, label='Muletti Carico Liberi')
-    ax5.plot(steps, model.data_collector['muletti_scarico_liberi'],
-             color='magenta', linewidth=2, label='Muletti Scarico Liberi')
-    ax5.set_title('Muletti Liberi nel Tempo')
-    ax5.set_xlabel('Step')
-    ax5.set_ylabel('Numero Muletti Liberi')
-    ax5.grid(True, alpha=0.3)
-    ax5.legend()
-
-    # Grafico 6: Tempo Medio di Processamento Ordini
-    ax6 = axes[2, 1]
-    ax6.plot(steps, model.data_collector['tempo_medio_ordine_carico'],
-             color='green', linewidth=2, label='Tempo Medio Ordine_Carico')
-    ax6.plot(steps, model.data_collector['tempo_medio_ordine_scarico'],
-             color='red', linewidth=2, label='Tempo Medio Ordine_Scarico')
-
-    ax6.set_title('Tempo Medio di Processamento Ordini carico e scarico')
-    ax6.set_xlabel('Step')
-    ax6.set_ylabel('Tempo Medio (in step)')
-    ax6.grid(True, alpha=0.3)
-    ax6.legend()
-
-
-    # Grafico 7: Distribuzione dei pacchi per colore nel magazzino (con spazio vuoto)
-    ax7 = axes[3, 0]
-    distribuzioni_colori = model.data_collector.get("distribuzione_colori", [])
-    if distribuzioni_colori:
-        distribuzione_finale = distribuzioni_colori[-1]  # Ultimo step
-
-        # Rimuovi i colori con quantità 0
-        colori = [colore for colore, count in distribuzione_finale.items() if count > 0]
-        valori = [count for colore, count in distribuzione_finale.items() if count > 0]
-
-        mappa_colori = {
-            'blue': 'blue',
-            'red': 'red',
-            'green': 'green',
-            'yellow': 'gold',
-            'orange': 'orange',
-            'gray': 'lightgray'
-        }
-        colori_visuali = [mappa_colori[colore] for colore in colori]
-
-        ax7.pie(valori, labels=colori, autopct='%1.1f%%', colors=colori_visuali)
-        ax7.set_title("Distribuzione pacchi per colore (con spazio vuoto)")
-
-    ax8 = axes[3, 1]
-    ax8.axis('off')
-    plt.tight_layout()
-    return fig
+    # Figura persistente: ad ogni frame si aggiungono solo i punti nuovi, ridotti a min/max
+    return grafici_magazzino(model).fig
 
 # Componente per mostrare i grafici nella visualizzazione Solara
 def warehouse_plots_component(model):
@@ -0,0 +1,165 @@
+import csv
+from collections.abc import Mapping, Sequence
+from typing import Dict, Tuple
+
+import numpy as np
+
+from rack import COLORI_RACK
+
+# Colori della distribuzione dei pacchi: i colori dei rack più lo spazio vuoto
+COLORI_DISTRIBUZIONE = COLORI_RACK + ("gray",)
+
+# Schema fisso delle metriche raccolte ad ogni step, nell'ordine atteso da MetricsRecorder.append
+SCHEMA: Tuple[Tuple[str, type], ...] = (
+    ("step", np.int64),
+    ("occupazione_totale", np.float64),
+    ("ordini_carico_processati", np.int32),
+    ("ordini_scarico_processati", np.int32),
+    ("dock_carico_liberi", np.int32),
+    ("dock_scarico_liberi", np.int32),
+    ("muletti_carico_liberi", np.int32),
+    ("muletti_scarico_liberi", np.int32),
+    ("ordini_carico_in_coda", np.int32),
+    ("ordini_scarico_in_coda", np.int32),
+    ("tempo_medio_ordine_carico", np.float64),
+    ("tempo_medio_ordine_scarico", np.float64),
+) + tuple((f"colore_{colore}", np.int32) for colore in COLORI_DISTRIBUZIONE)
+
+# Byte occupati da ogni step registrato (88 con lo schema attuale), esclusa la capacità di riserva
+BYTES_PER_STEP = sum(np.dtype(dtype).itemsize for _, dtype in SCHEMA)
+
+
+class MetricsRecorder(Mapping):
+    """Registro colonnare delle metriche di simulazione.
+
+    Ogni metrica è una colonna NumPy tipizzata preallocata, che cresce a blocchi di
+    ``chunk_size`` righe (almeno del 50% della capacità, per avere append in O(1)
+    ammortizzato). ``recorder[nome]`` restituisce una vista senza copia sui valori
+    registrati; ``recorder['distribuzione_colori']`` espone le colonne ``colore_*``
+    come sequenza di dizionari, per compatibilità con il vecchio data_collector.
+    Ogni step registrato occupa ``BYTES_PER_STEP`` byte.
+    """
+
+    def __init__(self, chunk_size: int = 4096):
+        if chunk_size <= 0:
+            raise ValueError("La dimensione dei blocchi deve essere positiva")
+        self.chunk_size = chunk_size
+        self.names = [name for name, _ in SCHEMA]
+        self._columns = [np.empty(chunk_size, dtype=dtype) for _, dtype in SCHEMA]
+        self._capacity = chunk_size
+        self._rows = 0
+
+    def append(self, *values):
+        """Registra una riga con i valori nell'ordine dello SCHEMA"""
+        if self._rows == self._capacity:
+            self._grow(self._rows + 1)
+        row = self._rows
+        for column, value in zip(self._columns, values):
+            column[row] = value
+        self._rows = row + 1
+
+    def append_repeated(self, n: int, step: int, *values):
+        """Registra n righe con gli stessi valori (dopo step, nell'ordine dello SCHEMA);
+        la colonna step prosegue di uno per riga a partire da ``step``"""
+        if n <= 0:
+            return
+        if self._rows + n > self._capacity:
+            self._grow(self._rows + n)
+        start, stop = self._rows, self._rows + n
+        self._columns[0][start:stop] = np.arange(step, step + n)
+        for column, value in zip(self._columns[1:], values):
+            column[start:stop] = value
+        self._rows = stop
+
+    def _grow(self, min_capacity: int):
+        capacity = max(min_capacity, self._capacity + max(self.chunk_size, self._capacity // 2))
+        capacity = -(-capacity // self.chunk_size) * self.chunk_size
+        for k, column in enumerate(self._columns):
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[:self._rows] = column[:self._rows]
+            self._columns[k] = grown
+        self._capacity = capacity
+
+    # Interfaccia del vecchio dizionario di liste
+    def __getitem__(self, name: str):
+        if name == "distribuzione_colori":
+            return _DistribuzioneColori(self)
+        return self._columns[self.names.index(name)][:self._rows]
+
+    def __iter__(self):
+        yield from self.names
+        yield "distribuzione_colori"
+
+    def __len__(self) -> int:
+        return len(self.names) + 1
+
+    @property
+    def rows(self) -> int:
+        """Numero di step registrati"""
+        return self._rows
+
+    @property
+    def nbytes(self) -> int:
+        """Memoria allocata dalle colonne, inclusa la capacità di riserva"""
+        return sum(column.nbytes for column in self._columns)
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """Viste senza copia di tutte le colonne"""
+        return {name: column[:self._rows] for name, column in zip(self.names, self._columns)}
+
+    # Esportazione
+    def to_pandas(self):
+        """DataFrame pandas costruito sulle viste delle colonne, senza copiarle"""
+        import pandas as pd
+        return pd.DataFrame(self.columns(), copy=False)
+
+    def to_npz(self, path):
+        np.savez(path, **self.columns())
+
+    def to_parquet(self, path):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as exc:
+            raise ImportError("L'esportazione in Parquet richiede pyarrow") from exc
+        pq.write_table(pa.table(self.columns()), path)
+
+    def to_csv(self, path):
+        columns = [column.tolist() for column in self.columns().values()]
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(self.names)
+            writer.writerows(zip(*columns))
+
+    @classmethod
+    def from_npz(cls, path, chunk_size: int = 4096) -> "MetricsRecorder":
+        """Ricarica un registro esportato con to_npz"""
+        with np.load(path) as data:
+            return cls.from_columns({name: data[name] for name, _ in SCHEMA}, chunk_size)
+
+    @classmethod
+    def from_columns(cls, columns: Mapping, chunk_size: int = 4096) -> "MetricsRecorder":
+        """Registro con le righe date, colonna per colonna come in columns()"""
+        recorder = cls(chunk_size)
+        rows = len(columns["step"])
+        if rows > recorder._capacity:
+            recorder._grow(rows)
+        for k, name in enumerate(recorder.names):
+            recorder._columns[k][:rows] = columns[name]
+        recorder._rows = rows
+        return recorder
+
+
+class _DistribuzioneColori(Sequence):
+    """Vista delle colonne colore_* come sequenza di dizionari {colore: pacchi}"""
+
+    def __init__(self, recorder: MetricsRecorder):
+        self._columns = [recorder[f"colore_{colore}"] for colore in COLORI_DISTRIBUZIONE]
+
+    def __len__(self) -> int:
+        return len(self._columns[0])
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[k] for k in range(*i.indices(len(self)))]
+        return {colore: int(column[i]) for colore, column in zip(COLORI_DISTRIBUZIONE, self._columns)}
@@ -1,6 +1,7 @@
 import random
+from collections.abc import Mapping
 from enum import Enum
-from typing import Dict
+from typing import Dict, Iterator, Tuple
 
 
 class OrderColor(Enum):
@@ -12,56 +13,128 @@ class OrderColor(Enum):
     ARANCIONE = "orange"
 
 
+# Indice di ogni colore nel campo delle quantità di Order
+COLORI_ORDINE = tuple(OrderColor)
+INDICE_COLORE = {colore: i for i, colore in enumerate(COLORI_ORDINE)}
+
+# Quantità impacchettate in un solo intero, 16 bit per colore (colore i ai bit 16i..16i+15)
+BIT_QUANTITA = 16
+MAX_QUANTITA = (1 << BIT_QUANTITA - 1) - 1  # Il bit alto di ogni campo resta libero per i riporti
+_CAMPO = (1 << BIT_QUANTITA) - 1
+_SPOSTAMENTO = {colore: i * BIT_QUANTITA for colore, i in INDICE_COLORE.items()}
+# Sommando MAX_QUANTITA a ogni campo, il bit alto si accende solo nei campi con quantità positiva
+_RIPORTO = sum(MAX_QUANTITA << i * BIT_QUANTITA for i in range(len(COLORI_ORDINE)))
+_BIT_ALTI = sum(1 << (i + 1) * BIT_QUANTITA - 1 for i in range(len(COLORI_ORDINE)))
+
+# Tuple precalcolate dei colori presenti per ogni combinazione dei bit alti dei campi
+_COLORI_PER_BIT_ALTI = {
+    sum(1 << (i + 1) * BIT_QUANTITA - 1 for i in range(len(COLORI_ORDINE)) if maschera >> i & 1):
+        tuple(colore for i, colore in enumerate(COLORI_ORDINE) if maschera >> i & 1)
+    for maschera in range(1 << len(COLORI_ORDINE))
+}
+
+
+class CapacitaView(Mapping):
+    """Vista in sola lettura {OrderColor: quantità} sulle quantità di un ordine, senza copie"""
+
+    __slots__ = ("_ordine",)
+
+    def __init__(self, ordine: "Order"):
+        self._ordine = ordine
+
+    def __getitem__(self, colore: OrderColor) -> int:
+        return self._ordine._quantita >> _SPOSTAMENTO[colore] & _CAMPO
+
+    def __iter__(self) -> Iterator[OrderColor]:
+        return iter(COLORI_ORDINE)
+
+    def __len__(self) -> int:
+        return len(COLORI_ORDINE)
+
+    def __repr__(self) -> str:
+        return f"CapacitaView({dict(self)})"
+
+
 class Order:
+    """Ordine con capacità totale e le cinque quantità per colore impacchettate in un intero.
 
+    Ogni colore ha un campo di ``BIT_QUANTITA`` bit (quantità fino a ``MAX_QUANTITA``).
+    I colori con quantità positiva si ricavano dai bit alti dei campi con una somma e
+    una maschera, così ``colori_disponibili()`` restituisce una tupla precalcolata senza
+    allocare.
+    """
 
-    def __init__(self, capacita_totale: int):
+    __slots__ = ("_capacita_totale", "_quantita", "step_inizio", "step_fine")
+
+    def __init__(self, capacita_totale: int, rng: random.Random = None):
         self._capacita_totale = capacita_totale
-        self._capacita_per_colore = self._dividi_capacita_casualmente()
+        self._quantita = 0
+        self._dividi_capacita_casualmente(rng if rng is not None else random)
         self.step_inizio = None
         self.step_fine = None
 
-    def _dividi_capacita_casualmente(self) -> Dict[OrderColor, int]:
-        colori = list(OrderColor)
+    def _dividi_capacita_casualmente(self, rng):
+        if self._capacita_totale > MAX_QUANTITA:
+            raise ValueError(f"La capacità di un ordine non può superare {MAX_QUANTITA}")
+        quantita = 0
         capacita_rimanente = self._capacita_totale
-        divisione = {}
 
         # Assegna casualmente la capacità ai primi 4 colori
         for i in range(4):
             if capacita_rimanente > 1:
                 # Assegna un valore casuale tra 0 e la capacità rimanente
-                valore = random.randint(0, capacita_rimanente - (4 - i))
-                divisione[colori[i]] = valore
+                valore = rng.randint(0, capacita_rimanente - (4 - i))
+                quantita |= valore << i * BIT_QUANTITA
                 capacita_rimanente -= valore
-            else:
-                divisione[colori[i]] = 0
 
         # L'ultimo colore prende tutta la capacità rimanente
-        divisione[colori[4]] = capacita_rimanente
-        return divisione
+        self._quantita = quantita | capacita_rimanente << 4 * BIT_QUANTITA
+
+    def copia(self) -> "Order":
+        """Nuovo ordine con le stesse quantità, senza estrazioni casuali"""
+        ordine = Order.__new__(Order)
+        ordine._capacita_totale = self._capacita_totale
+        ordine._quantita = self._quantita
+        ordine.step_inizio = None
+        ordine.step_fine = None
+        return ordine
 
+    # Pickle (checkpoint): i quattro campi, senza passare dallo stato generico degli slot
+    def __reduce__(self):
+        return _ordine, (self._capacita_totale, self._quantita, self.step_inizio, self.step_fine)
 
     def get_capacita_totale(self) -> int:
         return self._capacita_totale
 
     def get_capacita_per_colore(self, colore: OrderColor) -> int:
-        return self._capacita_per_colore.get(colore, 0)
+        return self._quantita >> _SPOSTAMENTO[colore] & _CAMPO
 
     def get_tutte_capacita(self) -> Dict[OrderColor, int]:
-        return self._capacita_per_colore.copy()
+        quantita = self._quantita
+        return {colore: quantita >> _SPOSTAMENTO[colore] & _CAMPO for colore in COLORI_ORDINE}
+
+    def colori_disponibili(self) -> Tuple[OrderColor, ...]:
+        """Colori con quantità positiva, nell'ordine di OrderColor"""
+        return _COLORI_PER_BIT_ALTI[self._quantita + _RIPORTO & _BIT_ALTI]
+
+    def vista_capacita(self) -> CapacitaView:
+        """Vista in sola lettura delle quantità per colore, creata ad ogni chiamata"""
+        return CapacitaView(self)
 
     #Set capacità per colore passando il colore e quantità nuova
     def set_capacita_per_colore(self, colore: OrderColor, nuova_capacita: int):
         if nuova_capacita < 0:
             raise ValueError("La capacità non può essere negativa")
 
-        vecchia_capacita = self._capacita_per_colore.get(colore, 0)
-        differenza = nuova_capacita - vecchia_capacita
+        if nuova_capacita > MAX_QUANTITA:
+            raise ValueError(f"La capacità per colore non può superare {MAX_QUANTITA}")
+        spostamento = _SPOSTAMENTO[colore]
+        differenza = nuova_capacita - (self._quantita >> spostamento & _CAMPO)
 
         # Verifica che la modifica non renda la capacità totale negativa
         if self._capacita_totale + differenza < 0:
             raise ValueError("La modifica renderebbe la capacità totale negativa")
-        self._capacita_per_colore[colore] = nuova_capacita
+        self._quantita = self._quantita & ~(_CAMPO << spostamento) | nuova_capacita << spostamento
         self._capacita_totale += differenza
 
     def set_capacita_totale(self, nuova_capacita_totale: int):
@@ -75,19 +148,27 @@ class Order:
         print(f"Capacità totale: {self._capacita_totale}")
         print(f"Divisione per colori:")
 
-        for colore, capacita in self._capacita_per_colore.items():
+        for colore, capacita in self.vista_capacita().items():
             percentuale = (capacita / self._capacita_totale * 100) if self._capacita_totale > 0 else 0
             print(f"  {colore.value.capitalize()}: {capacita} ({percentuale:.1f}%)")
 
         # Verifica che la somma corrisponda alla capacità totale
-        somma = sum(self._capacita_per_colore.values())
+        somma = sum(self.vista_capacita().values())
         print(f"Verifica somma: {somma} (dovrebbe essere {self._capacita_totale})")
         print("=" * 15)
 
     def __str__(self) -> str:
-        return f"Order(capacità_totale={self._capacita_totale}, divisione={dict(self._capacita_per_colore)})"
+        return f"Order(capacità_totale={self._capacita_totale}, divisione={self.get_tutte_capacita()})"
 
     def __repr__(self) -> str:
         return self.__str__()
 
 
+def _ordine(capacita_totale: int, quantita: int, step_inizio, step_fine) -> Order:
+    """Ordine ricostruito dai suoi campi (per pickle)"""
+    ordine = Order.__new__(Order)
+    ordine._capacita_totale = capacita_totale
+    ordine._quantita = quantita
+    ordine.step_inizio = step_inizio
+    ordine.step_fine = step_fine
+    return ordine
@@ -0,0 +1,73 @@
+import time
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+
+Position = Tuple[int, int]
+Path = Optional[Tuple[Position, ...]]
+
+
+class PathCache:
+    """Cache LRU dei percorsi indicizzata per (start, goal) con statistiche di utilizzo.
+
+    I percorsi vengono salvati come tuple e restituiti senza copie: chi li riceve
+    non deve modificarli. Anche i percorsi inesistenti (None) vengono memorizzati,
+    dato che il grafo delle tracce non cambia durante la simulazione.
+    """
+
+    def __init__(self, maxsize: int = 256):
+        if maxsize <= 0:
+            raise ValueError("La dimensione della cache deve essere positiva")
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Tuple[Position, Position], Tuple[Path, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.time_saved = 0.0  # Secondi di calcolo risparmiati grazie alle hit
+
+    def get_or_compute(self, start: Position, goal: Position,
+                       compute: Callable[[Position, Position], Optional[list]]) -> Path:
+        """Ritorna il percorso in cache o lo calcola con compute e lo memorizza"""
+        key = (start, goal)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self.time_saved += entry[1]
+            return entry[0]
+
+        self.misses += 1
+        t0 = time.perf_counter()
+        path = compute(start, goal)
+        cost = time.perf_counter() - t0
+        if path is not None:
+            path = tuple(path)
+
+        self._entries[key] = (path, cost)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return path
+
+    def clear(self):
+        """Svuota la cache mantenendo le statistiche"""
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total > 0 else 0.0
+
+    def stats(self) -> dict:
+        """Statistiche utili a dimensionare la cache"""
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "evictions": self.evictions,
+            "time_saved": self.time_saved,
+        }
@@ -0,0 +1,132 @@
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from track_graph import TrackGraph
+
+
+class PathTables:
+    """Tabelle precalcolate di distanze e next-hop tra tutte le coppie di nodi del grafo delle tracce.
+
+    Le tabelle sono organizzate per destinazione: la riga ``goal`` contiene, per ogni
+    nodo, il nodo successivo sul percorso minimo verso ``goal`` e la distanza residua.
+    Una ricerca di percorso diventa quindi una semplice lettura di una riga.
+    Con ``compact=True`` le tabelle vengono salvate come array NumPy (int16 o int32).
+    """
+
+    UNREACHABLE = -1
+
+    def __init__(self, graph: TrackGraph, compact: bool = False):
+        self.nodes: List[Tuple[int, int]] = graph.nodes
+        self.index: Dict[Tuple[int, int], int] = graph.index
+        self.compact = compact
+
+        next_rows = []
+        dist_rows = []
+        for goal in range(len(self.nodes)):
+            next_row, dist_row = self._bfs(graph, goal)
+            next_rows.append(next_row)
+            dist_rows.append(dist_row)
+
+        if compact:
+            dtype = np.int16 if len(self.nodes) < np.iinfo(np.int16).max else np.int32
+            self._next = np.array(next_rows, dtype=dtype).reshape(len(self.nodes), len(self.nodes))
+            self._dist = np.array(dist_rows, dtype=dtype).reshape(len(self.nodes), len(self.nodes))
+        else:
+            self._next = next_rows
+            self._dist = dist_rows
+
+    @classmethod
+    def da_tabelle(cls, graph: TrackGraph, next_table: np.ndarray, dist_table: np.ndarray,
+                   compact: bool = False) -> "PathTables":
+        """Tabelle già calcolate (ad esempio di un layout compilato), senza ripetere le BFS.
+
+        Con ``compact`` gli array vengono usati così come sono (anche in sola lettura o
+        mappati da file), altrimenti vengono convertiti in liste; tabelle già in forma di
+        liste vengono usate senza copiarle.
+        """
+        tables = cls.__new__(cls)
+        tables.nodes = graph.nodes
+        tables.index = graph.index
+        tables.compact = compact
+        if compact:
+            tables._next, tables._dist = next_table, dist_table
+        else:
+            tables._next = next_table.tolist() if isinstance(next_table, np.ndarray) else next_table
+            tables._dist = dist_table.tolist() if isinstance(dist_table, np.ndarray) else dist_table
+        return tables
+
+    def come_array(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Tabelle dei next-hop e delle distanze come array NumPy (n x n, riga = destinazione)"""
+        if self.compact:
+            return self._next, self._dist
+        dtype = np.int16 if len(self.nodes) < np.iinfo(np.int16).max else np.int32
+        return np.array(self._next, dtype=dtype), np.array(self._dist, dtype=dtype)
+
+    def _bfs(self, graph: TrackGraph, goal: int):
+        """BFS a ritroso dalla destinazione: il nodo che scopre i è il suo next-hop verso goal"""
+        n = len(graph)
+        offsets, neighbors = graph.offsets, graph.neighbors
+        next_row = [self.UNREACHABLE] * n
+        dist_row = [self.UNREACHABLE] * n
+        next_row[goal] = goal
+        dist_row[goal] = 0
+
+        queue = deque([goal])
+        while queue:
+            current = queue.popleft()
+            d = dist_row[current] + 1
+            for k in range(offsets[current], offsets[current + 1]):
+                neighbor = neighbors[k]
+                if dist_row[neighbor] == self.UNREACHABLE:
+                    dist_row[neighbor] = d
+                    next_row[neighbor] = current
+                    queue.append(neighbor)
+        return next_row, dist_row
+
+    def distanze_verso(self, goal: int):
+        """Riga delle distanze di tutti i nodi da goal (id del nodo), senza copie"""
+        return self._dist[goal]
+
+    def __contains__(self, pos: Tuple[int, int]) -> bool:
+        return pos in self.index
+
+    def distance(self, start: Tuple[int, int], goal: Tuple[int, int]) -> Optional[int]:
+        """Distanza minima in celle tra due nodi del grafo, None se non raggiungibile"""
+        s = self.index.get(start)
+        g = self.index.get(goal)
+        if s is None or g is None:
+            return None
+        d = int(self._dist[g][s])
+        return None if d == self.UNREACHABLE else d
+
+    def get_path(self, start: Tuple[int, int], goal: Tuple[int, int]) -> Optional[List[Tuple[int, int]]]:
+        """Ricostruisce il percorso minimo seguendo la tabella dei next-hop, senza alcuna ricerca.
+
+        ``start`` deve essere un nodo del grafo; se ``goal`` non lo è il percorso non esiste.
+        """
+        if start == goal:
+            return [start]
+
+        s = self.index[start]
+        g = self.index.get(goal)
+        if g is None or int(self._dist[g][s]) == self.UNREACHABLE:
+            return None
+
+        row = self._next[g]
+        nodes = self.nodes
+        path = [start]
+        current = s
+        while current != g:
+            current = int(row[current])
+            path.append(nodes[current])
+        return path
+
+    def memory_bytes(self) -> int:
+        """Memoria occupata dalle due tabelle (solo i dati, senza gli oggetti contenitore)"""
+        if self.compact:
+            return self._next.nbytes + self._dist.nbytes
+        n = len(self.nodes)
+        # Ogni riga è una lista di puntatori a interi (piccoli interi condivisi dall'interprete)
+        return 2 * n * n * 8
@@ -27,6 +27,11 @@ def get_neighbors(model, pos: Tuple[int, int]) -> List[Tuple[int, int]]:
 def find_path(model, start: Tuple[int, int], goal: Tuple[int, int]) -> Optional[List[Tuple[int, int]]]:
 
     """Algoritmo A* per trovare il percorso più breve"""
+    # Se il modello ha il grafo compilato la ricerca lavora sugli id interi
+    track_graph = getattr(model, "track_graph", None)
+    if track_graph is not None and start in track_graph:
+        return track_graph.find_path(start, goal)
+
     if start == goal:
         return [start]
 
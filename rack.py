@@ -1,87 +1,359 @@
+import heapq
+from array import array
+from collections import deque
+from collections.abc import Mapping
+from itertools import chain
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# Colori degli scaffali, nell'ordine usato per i codici int8 e per le statistiche
+COLORI_RACK = ("blue", "red", "green", "yellow", "orange")
+
+
+class RackStore(Mapping):
+    """Inventario degli scaffali in array NumPy paralleli, indicizzati per posizione.
+
+    Per ogni rack vengono salvati un codice colore int8 e capienza, occupazione
+    corrente e occupazione temporanea int16. Si comporta come il vecchio dizionario
+    ``{(x, y): Rack}``: l'accesso per posizione passa dall'indice e restituisce una
+    vista ``Rack`` sui dati dell'array.
+
+    Per ogni colore viene mantenuto un heap dei rack con spazio libero, ordinato dal
+    rack più a destra (a parità di x vale l'ordine di inserimento). Le voci non più
+    valide (rack pieni) vengono scartate in modo pigro durante la ricerca.
+
+    Per ogni colore c'è anche una coda dei rack con merce non ancora prenotata
+    (occupazione e occupazione temporanea positive), inizialmente nell'ordine di
+    inserimento: prenotare e rilasciare un item costano O(1).
+
+    I totali di capienza e occupazione (anche per colore) sono contatori aggiornati
+    ad ogni modifica, così le statistiche non richiedono di scorrere l'inventario.
+    """
+
+    def __init__(self, positions: Iterable[Tuple[int, int]], colori: Iterable[str], capienza: int = 15):
+        # Una lista viene usata senza copiarla (ad esempio quella del layout): non va modificata
+        self.positions: List[Tuple[int, int]] = positions if isinstance(positions, list) else list(positions)
+        self.index: Dict[Tuple[int, int], int] = {pos: i for i, pos in enumerate(self.positions)}
+        self.colori: List[str] = list(COLORI_RACK)
+
+        n = len(self.positions)
+        self.colore = np.array([self.codice_colore(c) for c in colori], dtype=np.int8)
+        self.capienza = np.full(n, capienza, dtype=np.int16)
+        self.occupazione = np.zeros(n, dtype=np.int16)
+        self.occupazione_temp = np.zeros(n, dtype=np.int16)
+
+        self._views = [Rack._view(self, i) for i in range(n)]
+
+        # Contatori incrementali per le statistiche
+        self._totale_capienza = int(self.capienza.sum())
+        self._totale_occupazione = 0
+        self._occupazione_colore = [0] * len(self.colori)
+
+        self._chiave = self._chiavi()
+        self._con_spazio: List[List[int]] = [[] for _ in self.colori]
+        self._in_heap = bytearray(n)  # Codice colore + 1 dell'heap che contiene il rack, 0 se nessuno
+        self._con_merce: List[deque] = [deque() for _ in self.colori]
+        self._in_coda = bytearray(n)  # Codice colore + 1 della coda che contiene il rack, 0 se nessuna
+        self._generazione = array("q", bytes(8 * n))  # Le voci in coda con generazione diversa sono scadute
+        self.ricostruisci_indici()
+
+    def _chiavi(self) -> List[int]:
+        """Chiavi di ordinamento "più a destra prima": (max_x - x) * n + i"""
+        n = len(self.positions)
+        xs = [pos[0] if pos is not None else 0 for pos in self.positions]
+        max_x = max(xs, default=0)
+        return [(max_x - x) * n + i for i, x in enumerate(xs)]
+
+    # Pickle (checkpoint): lo stato senza le posizioni, con le code come array di interi.
+    # Viste, indice per posizione e chiavi si ricostruiscono dalle posizioni; gli heap dei
+    # rack con spazio dagli array, perché le voci scadute vengono comunque scartate
+    def stato(self) -> dict:
+        """Copia dello stato senza le posizioni e ciò che se ne ricava, con le code in array NumPy"""
+        state = self.__dict__.copy()
+        for name in ("positions", "index", "_views", "_chiave", "_in_heap"):
+            del state[name]
+        # Colonne e contatori copiati: lo stato non cambia con l'inventario
+        for name in ("colori", "colore", "capienza", "occupazione", "occupazione_temp", "_occupazione_colore",
+                     "_in_coda"):
+            state[name] = state[name].copy()
+        state["_generazione"] = self._generazione[:]
+        state["_con_spazio"] = len(self._con_spazio)
+        # Voci (rack, generazione) appiattite
+        state["_con_merce"] = [np.fromiter(chain.from_iterable(coda), dtype=np.int64, count=2 * len(coda))
+                               for coda in self._con_merce]
+        return state
+
+    @classmethod
+    def da_stato(cls, positions: List[Tuple[int, int]], state: dict) -> "RackStore":
+        """Inventario con le posizioni date e lo stato restituito da stato()"""
+        store = cls.__new__(cls)
+        store.__dict__.update(state)
+        store.positions = positions
+        store._con_merce = []
+        for coda in state["_con_merce"]:
+            voci = coda.tolist()
+            store._con_merce.append(deque(zip(voci[::2], voci[1::2])))
+        store.index = {pos: i for i, pos in enumerate(positions)}
+        store._views = [Rack._view(store, i) for i in range(len(positions))]
+        store._chiave = store._chiavi()
+
+        # Heap dei rack con spazio: una lista ordinata è già un heap
+        store._con_spazio = [[] for _ in range(state["_con_spazio"])]
+        store._in_heap = bytearray(len(positions))
+        for i in np.flatnonzero(store.occupazione < store.capienza).tolist():
+            codice = int(store.colore[i])
+            store._con_spazio[codice].append(store._chiave[i])
+            store._in_heap[i] = codice + 1
+        for heap in store._con_spazio:
+            heap.sort()
+        return store
+
+    def __reduce__(self):
+        return RackStore.da_stato, (self.positions, self.stato())
+
+    def ricostruisci_indici(self):
+        """Ricostruisce gli indici per colore seguendo l'ordine di inserimento dei rack"""
+        for heap in self._con_spazio:
+            heap.clear()
+        for coda in self._con_merce:
+            coda.clear()
+        for i in range(len(self.positions)):
+            self._in_heap[i] = 0
+            self._in_coda[i] = 0
+            self._generazione[i] += 1
+            self._aggiorna_indici(i)
+
+    # Indici per colore dei rack con spazio libero e dei rack con merce prenotabile
+    def _aggiorna_indici(self, i: int):
+        """Registra il rack negli indici del suo colore in cui deve comparire e non è già presente"""
+        codice = int(self.colore[i])
+        while len(self._con_spazio) <= codice:
+            self._con_spazio.append([])
+            self._con_merce.append(deque())
+        if self.occupazione[i] < self.capienza[i] and self._in_heap[i] != codice + 1:
+            heapq.heappush(self._con_spazio[codice], self._chiave[i])
+            self._in_heap[i] = codice + 1
+        if self.occupazione[i] > 0 and self.occupazione_temp[i] > 0 and self._in_coda[i] != codice + 1:
+            self._con_merce[codice].append((i, self._generazione[i]))
+            self._in_coda[i] = codice + 1
+
+    def _rimuovi_da_coda(self, i: int):
+        """Toglie il rack dalla coda dei rack con merce invalidandone la voce"""
+        self._in_coda[i] = 0
+        self._generazione[i] += 1
+
+    def rack_con_spazio(self, colore: str) -> Optional[Tuple[int, int]]:
+        """Posizione del rack più a destra del colore dato che ha ancora spazio libero"""
+        if colore not in self.colori:
+            return None
+        codice = self.colori.index(colore)
+        heap = self._con_spazio[codice]
+        n = len(self.positions)
+        while heap:
+            i = heap[0] % n
+            if self.colore[i] == codice and self.occupazione[i] < self.capienza[i]:
+                return self.positions[i]
+            heapq.heappop(heap)
+            if self._in_heap[i] == codice + 1:
+                self._in_heap[i] = 0
+        return None
+
+    def prenota(self, colore: str) -> Optional[Tuple[int, int]]:
+        """Prenota un item del colore dato e ritorna la posizione del rack, None se non disponibile"""
+        if colore not in self.colori:
+            return None
+        codice = self.colori.index(colore)
+        coda = self._con_merce[codice]
+        while coda:
+            i, generazione = coda[0]
+            valida = generazione == self._generazione[i] and self._in_coda[i] == codice + 1
+            if valida and self.colore[i] == codice and self.occupazione[i] > 0 and self.occupazione_temp[i] > 0:
+                self.occupazione_temp[i] -= 1
+                if self.occupazione_temp[i] == 0:
+                    coda.popleft()
+                    self._rimuovi_da_coda(i)
+                return self.positions[i]
+            coda.popleft()
+            if valida:
+                self._rimuovi_da_coda(i)
+        return None
+
+    def rilascia(self, pos: Tuple[int, int]):
+        """Annulla una prenotazione: il rack torna in fondo alla coda del suo colore"""
+        i = self.index[pos]
+        if self.occupazione_temp[i] + 1 > self.capienza[i]:
+            raise ValueError("L'occupazione non può superare la capienza massima")
+        self.occupazione_temp[i] += 1
+        self._rimuovi_da_coda(i)
+        self._aggiorna_indici(i)
+
+    def codice_colore(self, colore: str) -> int:
+        """Codice int8 del colore, registrando i colori non ancora noti"""
+        try:
+            return self.colori.index(colore)
+        except ValueError:
+            self.colori.append(colore)
+            return len(self.colori) - 1
+
+    # Modifiche di un singolo rack: aggiornano contatori e indici
+    def _imposta_occupazione(self, i: int, occupazione: int):
+        delta = occupazione - int(self.occupazione[i])
+        self.occupazione[i] = occupazione
+        self._totale_occupazione += delta
+        self._occupazione_colore[self.colore[i]] += delta
+        self._aggiorna_indici(i)
+
+    def _imposta_capienza(self, i: int, capienza: int):
+        self._totale_capienza += capienza - int(self.capienza[i])
+        self.capienza[i] = capienza
+        self._aggiorna_indici(i)
+
+    def _imposta_colore(self, i: int, colore: str):
+        codice = self.codice_colore(colore)
+        while len(self._occupazione_colore) <= codice:
+            self._occupazione_colore.append(0)
+        occupazione = int(self.occupazione[i])
+        self._occupazione_colore[self.colore[i]] -= occupazione
+        self._occupazione_colore[codice] += occupazione
+        self.colore[i] = codice
+        self._aggiorna_indici(i)
+
+    # Interfaccia del dizionario {(x, y): Rack}
+    def __getitem__(self, pos: Tuple[int, int]) -> "Rack":
+        return self._views[self.index[pos]]
+
+    def __contains__(self, pos) -> bool:
+        return pos in self.index
+
+    def __iter__(self):
+        return iter(self.positions)
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    # Statistiche, lette dai contatori in O(1)
+    def capienza_totale(self) -> int:
+        return self._totale_capienza
+
+    def occupazione_totale(self) -> int:
+        return self._totale_occupazione
+
+    def occupazione_per_colore(self) -> Dict[str, int]:
+        """Pacchi presenti per colore, più lo spazio vuoto sotto la chiave 'gray'"""
+        counts = dict(zip(self.colori, self._occupazione_colore))
+        counts['gray'] = self._totale_capienza - self._totale_occupazione
+        return counts
+
+    def verifica_contatori(self) -> bool:
+        """Confronta i contatori con le riduzioni sugli array (per il debug)"""
+        per_codice = np.bincount(self.colore, weights=self.occupazione, minlength=len(self.colori))
+        return (self._totale_capienza == int(self.capienza.sum())
+                and self._totale_occupazione == int(self.occupazione.sum())
+                and self._occupazione_colore == [int(v) for v in per_codice])
+
+
 class Rack:
+    """Vista su un singolo scaffale di un RackStore.
+
+    ``Rack(capienza, colore)`` crea uno scaffale indipendente con un proprio store.
+    """
+
+    __slots__ = ("_store", "_i")
 
     def __init__(self, capienza: int, colore: str):
-        self._capienza = capienza
-        self._colore = colore
-        self._occupazione_corrente = 0
-        self._occupazione_temp = 0
+        store = RackStore([None], [colore], capienza)
+        self._store = store
+        self._i = 0
+
+    @classmethod
+    def _view(cls, store: RackStore, i: int) -> "Rack":
+        rack = cls.__new__(cls)
+        rack._store = store
+        rack._i = i
+        return rack
 
     # Getter per capienza
     def get_capienza(self) -> int:
-        return self._capienza
+        return int(self._store.capienza[self._i])
 
     # Setter per capienza
     def set_capienza(self, nuova_capienza: int) -> None:
         if nuova_capienza < 0:
             raise ValueError("La capienza non può essere negativa")
-        self._capienza = nuova_capienza
+        self._store._imposta_capienza(self._i, nuova_capienza)
 
     def get_occupazione_temp(self) -> int:
-        return self._occupazione_temp
+        return int(self._store.occupazione_temp[self._i])
 
     def set_occupazione_temp(self, nuova_occupazione: int) -> None:
         if nuova_occupazione < 0:
             raise ValueError("L'occupazione non può essere negativa")
-        if nuova_occupazione > self._capienza:
+        if nuova_occupazione > self.get_capienza():
             raise ValueError("L'occupazione non può superare la capienza massima")
-        self._occupazione_temp = nuova_occupazione
+        self._store.occupazione_temp[self._i] = nuova_occupazione
+        self._store._aggiorna_indici(self._i)
 
     # Getter per colore
     def get_colore(self) -> str:
-        return self._colore
+        return self._store.colori[self._store.colore[self._i]]
 
     # Setter per colore
     def set_colore(self, nuovo_colore: str) -> None:
-        self._colore = nuovo_colore
+        self._store._imposta_colore(self._i, nuovo_colore)
 
     # Getter per occupazione corrente
     def get_occupazione_corrente(self) -> int:
-        return self._occupazione_corrente
+        return int(self._store.occupazione[self._i])
 
     # Setter per occupazione corrente
     def set_occupazione_corrente(self, occupazione: int) -> None:
         if occupazione < 0:
             raise ValueError("L'occupazione non può essere negativa")
-        if occupazione > self._capienza:
+        if occupazione > self.get_capienza():
             raise ValueError("L'occupazione non può superare la capienza massima")
-        self._occupazione_corrente = occupazione
+        self._store._imposta_occupazione(self._i, occupazione)
 
     # Metodi di utilità
     def get_spazio_disponibile(self) -> int:
-        return self._capienza - self._occupazione_corrente
+        return self.get_capienza() - self.get_occupazione_corrente()
 
     def get_percentuale_occupazione(self) -> float:
-        if self._capienza == 0:
+        capienza = self.get_capienza()
+        if capienza == 0:
             return 0.0
-        return (self._occupazione_corrente / self._capienza) * 100
+        return (self.get_occupazione_corrente() / capienza) * 100
 
     def is_pieno(self) -> bool:
-        return self._occupazione_corrente >= self._capienza
+        return self.get_occupazione_corrente() >= self.get_capienza()
 
     def aggiungi_items(self, quantita: int) -> bool:
         if quantita <= 0:
             return False
-        if self._occupazione_corrente + quantita <= self._capienza:
-            self._occupazione_corrente += quantita
+        occupazione = self.get_occupazione_corrente()
+        if occupazione + quantita <= self.get_capienza():
+            self._store._imposta_occupazione(self._i, occupazione + quantita)
             return True
         return False
 
     def rimuovi_items(self, quantita: int) -> bool:
         if quantita <= 0:
             return False
-        if self._occupazione_corrente >= quantita:
-            self._occupazione_corrente -= quantita
+        occupazione = self.get_occupazione_corrente()
+        if occupazione >= quantita:
+            self._store._imposta_occupazione(self._i, occupazione - quantita)
             return True
         return False
 
     def get_display_text(self) -> str:
-        return f"{self._occupazione_corrente}/{self._capienza}"
+        return f"{self.get_occupazione_corrente()}/{self.get_capienza()}"
 
     def get_display_text_short(self) -> str:
-        return str(self._occupazione_corrente)
+        return str(self.get_occupazione_corrente())
 
     def __str__(self) -> str:
-        return f"Rack(colore={self._colore}, capienza={self._capienza}, occupazione={self._occupazione_corrente})"
+        return (f"Rack(colore={self.get_colore()}, capienza={self.get_capienza()}, "
+                f"occupazione={self.get_occupazione_corrente()})")
 
     def __repr__(self) -> str:
-         return f"Rack({self._capienza}, '{self._colore}')"
\ No newline at end of file
+         return f"Rack({self.get_capienza()}, '{self.get_colore()}')"
@@ -0,0 +1,231 @@
+import heapq
+import time
+from collections import OrderedDict, deque
+from typing import Dict, List, Optional, Tuple, Union
+
+from path_tables import PathTables
+from track_graph import TrackGraph
+
+# Proprietari di una cella in un bucket: un agente, o una tupla se la cella è condivisa
+Proprietari = Union[int, Tuple[int, ...]]
+
+
+def _altri(occ: Optional[Proprietari], agente: int) -> bool:
+    """True se tra i proprietari c'è un agente diverso da agente"""
+    if occ is None:
+        return False
+    if type(occ) is int:
+        return occ != agente
+    return any(a != agente for a in occ)
+
+
+def _scambio(prima: Optional[Proprietari], dopo: Optional[Proprietari], agente: int) -> bool:
+    """True se un altro agente è tra i proprietari di entrambe le prenotazioni"""
+    if prima is None or dopo is None:
+        return False
+    prima = (prima,) if type(prima) is int else prima
+    dopo = (dopo,) if type(dopo) is int else dopo
+    return any(a != agente and a in dopo for a in prima)
+
+
+class ReservationTable:
+    """Tabella delle prenotazioni spazio-tempo (cella, step) per percorsi senza collisioni.
+
+    Le prenotazioni stanno in un anello di ``orizzonte`` bucket, uno per step: il bucket
+    ``t % orizzonte`` contiene le celle occupate allo step t e i proprietari di ognuna.
+    Ogni bucket ricorda lo step a cui appartiene, quindi quando lo step è passato il
+    bucket scade da solo e viene svuotato al primo riuso: la memoria resta limitata
+    all'orizzonte anche con centinaia di muletti.
+
+    Dopo l'arrivo il muletto tiene occupata la cella di destinazione per ``sosta`` step,
+    il tempo di un'operazione di carico o scarico.
+
+    pianifica() esegue A* nello spazio-tempo (restare fermi è una mossa) contro le
+    prenotazioni degli altri muletti, evitando sia le celle occupate sia gli scambi di
+    cella, poi prenota il percorso trovato. Le celle di partenza e di destinazione sono
+    condivise: standby, dock e fronti dei rack sono punti di servizio usati da più muletti,
+    quindi una cella può avere più proprietari nello stesso step (tutti restano prenotati
+    e contano per gli scambi).
+
+    Le distanze minime verso le destinazioni (l'euristica di A*) vengono lette dalle
+    tabelle dei percorsi se il modello le ha, altrimenti calcolate con una BFS e tenute
+    in una cache LRU di ``max_destinazioni`` righe.
+    """
+
+    def __init__(self, graph: TrackGraph, orizzonte: int = 256, margine: int = 32, sosta: int = 2,
+                 tabelle: Optional[PathTables] = None, max_destinazioni: int = 256):
+        if orizzonte <= 1:
+            raise ValueError("L'orizzonte delle prenotazioni deve essere maggiore di 1")
+        if max_destinazioni <= 0:
+            raise ValueError("La cache delle distanze deve avere almeno una riga")
+        self.graph = graph
+        self.orizzonte = orizzonte
+        self.margine = margine  # Step di attesa ammessi oltre la distanza minima
+        self.sosta = sosta  # Step in cui la destinazione resta occupata dopo l'arrivo
+        self._tempi = [-1] * orizzonte  # Step a cui appartiene ogni bucket
+        self._bucket: List[Dict[int, Proprietari]] = [{} for _ in range(orizzonte)]  # nodo -> agenti
+        self._attive: Dict[int, Tuple[List[int], int]] = {}  # agente -> (nodi, step di partenza)
+        self.tabelle = tabelle
+        self.max_destinazioni = max_destinazioni
+        self._distanze: "OrderedDict[int, List[int]]" = OrderedDict()  # LRU delle distanze per destinazione
+
+        self.pianificazioni = 0
+        self.fallimenti = 0  # Ricerche senza percorso libero entro il limite
+        self.fuori_tracce = 0  # Richieste con partenza o destinazione fuori dalle tracce, non prenotate
+        self.espansioni = 0
+        self.tempo_pianificazione = 0.0
+
+    # Prenotazioni
+    def occupanti(self, node: int, t: int) -> Tuple[int, ...]:
+        """Agenti che hanno prenotato il nodo allo step t (vuota se libero)"""
+        k = t % self.orizzonte
+        if self._tempi[k] != t:
+            return ()
+        occ = self._bucket[k].get(node)
+        if occ is None:
+            return ()
+        return (occ,) if type(occ) is int else occ
+
+    def prenota(self, agente: int, nodes: List[int], t0: int):
+        """Prenota nodes[i] allo step t0 + i, fin dove arriva l'orizzonte, e la sosta finale"""
+        self.rilascia(agente)
+        for i, node in enumerate(nodes[:self.orizzonte]):
+            t = t0 + i
+            k = t % self.orizzonte
+            if self._tempi[k] != t:
+                # Bucket scaduto: ora appartiene allo step t
+                self._bucket[k].clear()
+                self._tempi[k] = t
+            bucket = self._bucket[k]
+            occ = bucket.get(node)
+            if occ is None:
+                bucket[node] = agente
+            elif not (occ == agente if type(occ) is int else agente in occ):
+                bucket[node] = ((occ,) if type(occ) is int else occ) + (agente,)
+        self._attive[agente] = (nodes, t0)
+
+    def rilascia(self, agente: int):
+        """Cancella le prenotazioni ancora valide del percorso corrente dell'agente"""
+        attiva = self._attive.pop(agente, None)
+        if attiva is None:
+            return
+        nodes, t0 = attiva
+        for i, node in enumerate(nodes[:self.orizzonte]):
+            k = (t0 + i) % self.orizzonte
+            if self._tempi[k] != t0 + i:
+                continue
+            bucket = self._bucket[k]
+            occ = bucket.get(node)
+            if occ == agente:
+                del bucket[node]
+            elif type(occ) is tuple and agente in occ:
+                rimasti = tuple(a for a in occ if a != agente)
+                bucket[node] = rimasti[0] if len(rimasti) == 1 else rimasti
+
+    def __len__(self) -> int:
+        """Numero di bucket in uso (anche scaduti ma non ancora riusati)"""
+        return sum(1 for t in self._tempi if t >= 0)
+
+    def voci(self) -> int:
+        """Celle prenotate contenute nei bucket (una volta sola anche se condivise)"""
+        return sum(len(bucket) for bucket in self._bucket)
+
+    # Ricerca
+    def _distanze_verso(self, goal: int) -> List[int]:
+        """Distanze minime di tutti i nodi da goal, -1 se non raggiungibile"""
+        if self.tabelle is not None and not self.tabelle.compact:
+            return self.tabelle.distanze_verso(goal)
+        row = self._distanze.get(goal)
+        if row is not None:
+            self._distanze.move_to_end(goal)
+        elif self.tabelle is not None:
+            row = self.tabelle.distanze_verso(goal).tolist()
+        else:
+            offsets, neighbors = self.graph.offsets, self.graph.neighbors
+            row = [-1] * len(self.graph)
+            row[goal] = 0
+            queue = deque([goal])
+            while queue:
+                current = queue.popleft()
+                d = row[current] + 1
+                for k in range(offsets[current], offsets[current + 1]):
+                    if row[neighbors[k]] == -1:
+                        row[neighbors[k]] = d
+                        queue.append(neighbors[k])
+        if goal not in self._distanze:
+            self._distanze[goal] = row
+            if len(self._distanze) > self.max_destinazioni:
+                self._distanze.popitem(last=False)
+        return row
+
+    def pianifica(self, agente: int, start: Tuple[int, int], goal: Tuple[int, int],
+                  t0: int) -> Optional[List[Tuple[int, int]]]:
+        """Percorso da start (allo step t0) a goal senza conflitti con le prenotazioni e lo prenota.
+
+        percorso[i] è la cella occupata allo step t0 + i (celle ripetute sono attese).
+        Ritorna None se start o goal non sono tracce (contato in ``fuori_tracce``), se goal
+        non è raggiungibile o se nessun percorso libero arriva entro distanza minima +
+        margine (contati in ``fallimenti``).
+        """
+        index = self.graph.index
+        s, g = index.get(start), index.get(goal)
+        if s is None or g is None:
+            self.fuori_tracce += 1
+            self.rilascia(agente)
+            return None
+        t_inizio = time.perf_counter()
+        self.pianificazioni += 1
+        self.rilascia(agente)
+
+        dist = self._distanze_verso(g)
+        if dist[s] == -1:
+            self.fallimenti += 1
+            return None
+        limite = t0 + min(dist[s] + self.margine, self.orizzonte - 1)
+        offsets, neighbors = self.graph.offsets, self.graph.neighbors
+        orizzonte, tempi, buckets = self.orizzonte, self._tempi, self._bucket
+        vuoto: Dict[int, Proprietari] = {}
+
+        open_set = [(dist[s], dist[s], t0, s)]
+        came_from = {(s, t0): None}
+        expansions = 0
+        arrivo = None
+        while open_set:
+            _, _, t, current = heapq.heappop(open_set)
+            expansions += 1
+            if current == g:
+                arrivo = (current, t)
+                break
+            t1 = t + 1
+            # Prenotazioni degli step t e t1 (bucket scaduti = nessuna prenotazione)
+            adesso = buckets[t % orizzonte] if tempi[t % orizzonte] == t else vuoto
+            dopo = buckets[t1 % orizzonte] if tempi[t1 % orizzonte] == t1 else vuoto
+            for k in range(offsets[current], offsets[current + 1] + 1):
+                # L'ultima mossa candidata è l'attesa nella cella corrente
+                node = neighbors[k] if k < offsets[current + 1] else current
+                if (node, t1) in came_from or t1 + dist[node] > limite:
+                    continue
+                if node != g and node != s and _altri(dopo.get(node), agente):
+                    continue
+                # Scambio di cella con un altro muletto tra t e t1
+                if node != current and _scambio(adesso.get(node), dopo.get(current), agente):
+                    continue
+                came_from[(node, t1)] = (current, t)
+                heapq.heappush(open_set, (t1 - t0 + dist[node], dist[node], t1, node))
+
+        self.espansioni += expansions
+        if arrivo is None:
+            self.fallimenti += 1
+            self.tempo_pianificazione += time.perf_counter() - t_inizio
+            return None
+
+        path_nodes = []
+        state = arrivo
+        while state is not None:
+            path_nodes.append(state[0])
+            state = came_from[state]
+        path_nodes.reverse()
+        self.prenota(agente, path_nodes + [g] * self.sosta, t0)
+        self.tempo_pianificazione += time.perf_counter() - t_inizio
+        nodes = self.graph.nodes
+        return [nodes[i] for i in path_nodes]
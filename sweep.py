@@ -0,0 +1,215 @@
+"""Esplorazione parallela dello spazio dei parametri del modello.
+
+Ogni combinazione di parametri viene eseguita N volte (con seed diversi) su un pool
+di processi: ogni worker costruisce ed esegue un modello alla volta tramite headless,
+senza importare moduli grafici, e restituisce solo il riepilogo delle metriche. Se un
+worker termina in modo anomalo il pool viene ricreato e vengono rieseguite solo le
+esecuzioni non ancora concluse: quelle già iniziate al momento del crash in un processo
+dedicato, le altre di nuovo nel pool condiviso. I risultati già raccolti non vanno persi.
+
+Uso: python sweep.py --grid order_time=10,20 --grid dock_capacity=5,8 --replications 4 \\
+        --steps 2000 --output sweep.csv
+"""
+import argparse
+import csv
+import itertools
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Iterable, List, Optional
+
+import headless
+
+# Crash in un pool dedicato dopo i quali un'esecuzione viene segnata come fallita
+MAX_TENTATIVI = 2
+
+# Nei worker: flag condivisi delle esecuzioni iniziate, uno per esecuzione
+_iniziate = None
+
+
+def _inizializza(iniziate):
+    global _iniziate
+    _iniziate = iniziate
+
+
+def expand_grid(grid: Dict[str, Iterable[Any]]) -> List[Dict[str, Any]]:
+    """Prodotto cartesiano dei valori: {nome: [valori]} -> lista di insiemi di parametri"""
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def summarize(model) -> Dict[str, Any]:
+    """Riepilogo delle metriche di un'esecuzione, letto dalle colonne del data_collector"""
+    dc = model.data_collector
+    if dc.rows == 0:
+        return {"steps": 0}
+    return {
+        "steps": int(dc["step"][-1]),
+        "ordini_carico_processati": int(dc["ordini_carico_processati"][-1]),
+        "ordini_scarico_processati": int(dc["ordini_scarico_processati"][-1]),
+        "occupazione_media": float(dc["occupazione_totale"].mean()),
+        "occupazione_finale": float(dc["occupazione_totale"][-1]),
+        "coda_carico_media": float(dc["ordini_carico_in_coda"].mean()),
+        "coda_scarico_media": float(dc["ordini_scarico_in_coda"].mean()),
+        "coda_carico_max": int(dc["ordini_carico_in_coda"].max()),
+        "coda_scarico_max": int(dc["ordini_scarico_in_coda"].max()),
+        "muletti_carico_liberi_medi": float(dc["muletti_carico_liberi"].mean()),
+        "muletti_scarico_liberi_medi": float(dc["muletti_scarico_liberi"].mean()),
+        "tempo_medio_ordine_carico": float(dc["tempo_medio_ordine_carico"][-1]),
+        "tempo_medio_ordine_scarico": float(dc["tempo_medio_ordine_scarico"][-1]),
+    }
+
+
+def _run_task(task: Dict[str, Any]) -> Dict[str, Any]:
+    """Esegue una singola simulazione nel worker e ne restituisce il riepilogo"""
+    if _iniziate is not None:
+        _iniziate[task["indice"]] = 1
+    t0 = time.perf_counter()
+    params = dict(task["params"])
+    if task.get("layout_cache") is not None:
+        params["layout_cache"] = task["layout_cache"]
+    model = headless.run(params, task["steps"], task["seed"])
+    row = {"run": task["run"], "replica": task["replica"], "seed": task["seed"], **task["params"]}
+    row.update(summarize(model))
+    row["durata_s"] = time.perf_counter() - t0
+    return row
+
+
+def _error_row(task: Dict[str, Any], error: BaseException) -> Dict[str, Any]:
+    return {"run": task["run"], "replica": task["replica"], "seed": task["seed"], **task["params"],
+            "errore": f"{type(error).__name__}: {error}"}
+
+
+def _collect(futures, tasks, results, crashes, iniziate, isolated: bool) -> List[int]:
+    """Raccoglie i risultati man mano che arrivano; ritorna le esecuzioni da ripetere.
+
+    Dopo un crash del pool condiviso falliscono anche le esecuzioni ancora in coda: il
+    crash conta solo per quelle già iniziate (tutte, se il pool si è rotto prima che ne
+    iniziasse una), le altre tornano nel pool condiviso.
+    """
+    retry, broken = [], []
+    for future in as_completed(futures):
+        k = futures[future]
+        try:
+            results[k] = future.result()
+        except BrokenProcessPool as exc:
+            broken.append((k, exc))
+        except Exception as exc:
+            results[k] = _error_row(tasks[k], exc)
+    coinvolte = [k for k, _ in broken if isolated or iniziate[k]] or [k for k, _ in broken]
+    for k, exc in broken:
+        if k in coinvolte:
+            crashes[k] += 1
+            if isolated and crashes[k] > MAX_TENTATIVI:
+                results[k] = _error_row(tasks[k], exc)
+                continue
+        retry.append(k)
+    return retry
+
+
+def sweep(param_sets: Iterable[Dict[str, Any]], replications: int = 1, steps: int = 1000,
+          base_seed: int = 0, workers: Optional[int] = None,
+          layout_cache: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Esegue ogni insieme di parametri per il numero di repliche dato e ritorna una riga per esecuzione.
+
+    Le righe sono ordinate per (insieme di parametri, replica). Le esecuzioni fallite
+    hanno la colonna 'errore' al posto delle metriche. Con ``layout_cache`` i worker
+    caricano il layout compilato dalla cartella data invece di ricalcolarlo.
+    """
+    tasks = []
+    for index, params in enumerate(param_sets):
+        for replica in range(replications):
+            tasks.append({
+                "indice": len(tasks),
+                "run": index,
+                "replica": replica,
+                "seed": base_seed + index * replications + replica,
+                "params": dict(params),
+                "steps": steps,
+                "layout_cache": layout_cache,
+            })
+    workers = workers or os.cpu_count() or 1
+
+    results: Dict[int, Dict[str, Any]] = {}
+    crashes = [0] * len(tasks)
+    # Flag scritti dai worker all'inizio di ogni esecuzione, per attribuire i crash
+    iniziate = multiprocessing.Array("b", len(tasks), lock=False)
+    pending = list(range(len(tasks)))
+    while pending:
+        # Le esecuzioni già coinvolte in un crash girano in un pool dedicato: un nuovo
+        # crash è quindi attribuibile con certezza e non coinvolge le altre
+        suspects = [k for k in pending if crashes[k] > 0]
+        shared = [k for k in pending if crashes[k] == 0]
+        pending = []
+        for start in range(0, len(suspects), workers):
+            batch = suspects[start:start + workers]
+            pools = [ProcessPoolExecutor(max_workers=1) for _ in batch]
+            futures = {pool.submit(_run_task, tasks[k]): k for pool, k in zip(pools, batch)}
+            pending.extend(_collect(futures, tasks, results, crashes, iniziate, isolated=True))
+            for pool in pools:
+                pool.shutdown()
+        if shared:
+            # Un nuovo pool ad ogni giro: quello precedente è inutilizzabile dopo un crash
+            with ProcessPoolExecutor(max_workers=min(workers, len(shared)), initializer=_inizializza,
+                                     initargs=(iniziate,)) as pool:
+                futures = {pool.submit(_run_task, tasks[k]): k for k in shared}
+                pending.extend(_collect(futures, tasks, results, crashes, iniziate, isolated=False))
+        pending.sort()
+    return [results[k] for k in range(len(tasks))]
+
+
+def write_table(rows: List[Dict[str, Any]], path: str):
+    """Salva le righe del riepilogo in CSV, con l'unione delle colonne di tutte le righe"""
+    columns = []
+    for row in rows:
+        columns.extend(name for name in row if name not in columns)
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def to_pandas(rows: List[Dict[str, Any]]):
+    """Tabella pandas del riepilogo"""
+    import pandas as pd
+    return pd.DataFrame(rows)
+
+
+def _parse_grid(specs: List[str]) -> Dict[str, List[Any]]:
+    kinds = dict(headless.PARAMETRI)
+    grid = {}
+    for spec in specs:
+        name, _, values = spec.partition("=")
+        if name not in kinds or not values:
+            raise SystemExit(f"Griglia non valida: {spec} (atteso nome=v1,v2,... con nome tra {', '.join(kinds)})")
+        grid[name] = [kinds[name](value) for value in values.split(",")]
+    return grid
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--grid", action="append", default=[], help="Parametro e valori: nome=v1,v2,...")
+    parser.add_argument("--replications", type=int, default=1)
+    parser.add_argument("--steps", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0, help="Seed della prima esecuzione")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", default="sweep.csv")
+    parser.add_argument("--layout-cache", default=None,
+                        help="Cartella in cui salvare e da cui caricare i layout compilati")
+    args = parser.parse_args(argv)
+
+    param_sets = expand_grid(_parse_grid(args.grid))
+    t0 = time.perf_counter()
+    rows = sweep(param_sets, args.replications, args.steps, args.seed, args.workers, args.layout_cache)
+    elapsed = time.perf_counter() - t0
+    write_table(rows, args.output)
+
+    failed = sum(1 for row in rows if "errore" in row)
+    print(f"{len(rows)} esecuzioni ({len(param_sets)} insiemi di parametri x {args.replications} repliche) "
+          f"in {elapsed:.1f} s, {failed} fallite; riepilogo in {args.output}")
+
+
+if __name__ == "__main__":
+    main()
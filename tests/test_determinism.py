@@ -0,0 +1,24 @@
+"""Regressione del determinismo: lo stesso seed deve dare la stessa traiettoria.
+
+Uso: python -m pytest tests
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from headless import check_determinism  # noqa: E402
+
+
+@pytest.mark.parametrize("params", [
+    {},
+    {"order_time": 3, "num_loading_forkLift": 5, "num_unloading_forkLift": 5},
+    {"travel": "events", "cooperative": True, "num_loading_forkLift": 5, "num_unloading_forkLift": 5},
+])
+def test_stesso_seed_stessa_traiettoria(params):
+    # Due modelli alternati nello stesso processo e uno in un nuovo interprete
+    primo, secondo, remoto = check_determinism(params, steps=500, seed=7)
+    assert primo == secondo == remoto
+
@@ -0,0 +1,39 @@
+"""Memoria per step del registro delle metriche: BYTES_PER_STEP byte per riga, a blocchi.
+
+Uso: python -m pytest tests
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from metrics_recorder import BYTES_PER_STEP, SCHEMA, MetricsRecorder  # noqa: E402
+
+
+def test_byte_per_step():
+    assert BYTES_PER_STEP == sum(np.dtype(dtype).itemsize for _, dtype in SCHEMA) == 88
+
+
+@pytest.mark.parametrize("righe", [1, 64, 65, 1000, 5000])
+def test_crescita_a_blocchi(righe):
+    recorder = MetricsRecorder(chunk_size=64)
+    valori = [0] * (len(SCHEMA) - 1)
+    for step in range(righe):
+        recorder.append(step, *valori)
+    # Solo blocchi interi di chunk_size righe, con al massimo il 50% di capacità di riserva
+    capacita = recorder.nbytes // BYTES_PER_STEP
+    assert recorder.nbytes == capacita * BYTES_PER_STEP
+    assert capacita % recorder.chunk_size == 0
+    assert righe <= capacita <= righe * 3 // 2 + recorder.chunk_size
+    assert recorder.rows == righe and recorder["step"][-1] == righe - 1
+
+
+def test_crescita_append_repeated():
+    recorder = MetricsRecorder(chunk_size=64)
+    recorder.append_repeated(1000, 0, *[0] * (len(SCHEMA) - 1))
+    capacita = recorder.nbytes // BYTES_PER_STEP
+    assert capacita % recorder.chunk_size == 0 and 1000 <= capacita < 1000 + recorder.chunk_size
+    assert recorder["step"].tolist() == list(range(1000))
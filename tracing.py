@@ -0,0 +1,178 @@
+"""Tracciamento strutturato degli eventi della simulazione.
+
+Gli eventi sono record binari a dimensione fissa (step, tipo, livello, agente,
+posizione, colore, valore) scritti in un buffer circolare in memoria o in un file
+binario. Il modello tiene ``model.tracer = None`` quando il tracciamento è spento:
+ogni punto di emissione costa un solo confronto con None. La stampa testuale degli
+eventi è opzionale e filtrata per livello.
+"""
+from enum import IntEnum
+from typing import Optional
+
+import numpy as np
+
+from rack import COLORI_RACK
+
+
+class Livello(IntEnum):
+    """Livelli di dettaglio: un evento viene registrato se il suo livello è <= a quello del tracer"""
+    ERROR = 1
+    INFO = 2
+    DEBUG = 3
+
+
+class Evento(IntEnum):
+    """Tipi di evento registrati"""
+    RESERVATION = 1  # Item prenotato dalla divisione temporanea di un ordine
+    PICK = 2  # Item prelevato da un rack o da un dock
+    DROP = 3  # Item depositato in un rack o in un dock
+    ORDER_CREATED = 4
+    ORDER_ASSIGNED = 5
+    ORDER_QUEUED = 6
+    ORDER_COMPLETED = 7
+    FILL = 8  # Riempimento iniziale del magazzino
+    ERROR = 9
+
+
+# Livello di ogni tipo di evento
+LIVELLO_EVENTO = {
+    Evento.RESERVATION: Livello.DEBUG,
+    Evento.PICK: Livello.DEBUG,
+    Evento.DROP: Livello.DEBUG,
+    Evento.ORDER_CREATED: Livello.INFO,
+    Evento.ORDER_ASSIGNED: Livello.INFO,
+    Evento.ORDER_QUEUED: Livello.INFO,
+    Evento.ORDER_COMPLETED: Livello.INFO,
+    Evento.FILL: Livello.INFO,
+    Evento.ERROR: Livello.ERROR,
+}
+
+# Flusso a cui si riferisce l'evento
+CARICO = 1
+SCARICO = 2
+
+# Formato binario di un evento (24 byte, little endian)
+EVENT_DTYPE = np.dtype([
+    ("step", "<i8"),
+    ("tipo", "u1"),
+    ("livello", "u1"),
+    ("colore", "i1"),  # Indice in COLORI_RACK, -1 se non applicabile
+    ("flusso", "u1"),  # CARICO, SCARICO o 0 se non applicabile
+    ("agente", "<i4"),  # unique_id dell'agente, -1 se non applicabile
+    ("x", "<i2"),
+    ("y", "<i2"),
+    ("valore", "<i4"),
+])
+
+
+def codice_colore(colore) -> int:
+    """Indice del colore (stringa o OrderColor) in COLORI_RACK, -1 se assente"""
+    if colore is None:
+        return -1
+    colore = getattr(colore, "value", colore)
+    return COLORI_RACK.index(colore) if colore in COLORI_RACK else -1
+
+
+def formatta(evento) -> str:
+    """Rappresentazione testuale di un record evento"""
+    tipo = Evento(int(evento["tipo"])).name
+    testo = f"[{int(evento['step']):>7}] {tipo:<15}"
+    if evento["flusso"]:
+        testo += " carico" if evento["flusso"] == CARICO else " scarico"
+    if evento["agente"] >= 0:
+        testo += f" agente={int(evento['agente'])}"
+    if evento["x"] >= 0:
+        testo += f" pos=({int(evento['x'])}, {int(evento['y'])})"
+    if evento["colore"] >= 0:
+        testo += f" colore={COLORI_RACK[int(evento['colore'])]}"
+    return testo + f" valore={int(evento['valore'])}"
+
+
+class RingBuffer:
+    """Buffer circolare preallocato che conserva gli ultimi ``capacity`` eventi"""
+
+    def __init__(self, capacity: int = 65536):
+        if capacity <= 0:
+            raise ValueError("La capacità del buffer deve essere positiva")
+        self.data = np.zeros(capacity, dtype=EVENT_DTYPE)
+        self.written = 0  # Eventi scritti in totale, anche quelli sovrascritti
+
+    def write(self, record: tuple):
+        self.data[self.written % len(self.data)] = record
+        self.written += 1
+
+    def events(self) -> np.ndarray:
+        """Eventi conservati in ordine cronologico"""
+        capacity = len(self.data)
+        if self.written <= capacity:
+            return self.data[:self.written].copy()
+        start = self.written % capacity
+        return np.concatenate((self.data[start:], self.data[:start]))
+
+    def close(self):
+        pass
+
+
+class BinaryFileSink:
+    """Scrive gli eventi in un file binario, accumulandoli in blocchi da ``block_size`` record"""
+
+    def __init__(self, path: str, block_size: int = 4096):
+        self.path = path
+        self._file = open(path, "wb")
+        self._block = np.zeros(block_size, dtype=EVENT_DTYPE)
+        self._used = 0
+        self.written = 0
+
+    def write(self, record: tuple):
+        self._block[self._used] = record
+        self._used += 1
+        self.written += 1
+        if self._used == len(self._block):
+            self.flush()
+
+    def flush(self):
+        self._block[:self._used].tofile(self._file)
+        self._used = 0
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+
+def leggi_traccia(path: str) -> np.ndarray:
+    """Eventi salvati da BinaryFileSink"""
+    return np.fromfile(path, dtype=EVENT_DTYPE)
+
+
+class Tracer:
+    """Registra gli eventi fino al livello dato nel sink scelto (di default un RingBuffer).
+
+    Con ``stampa`` gli eventi registrati vengono anche stampati su stdout.
+    """
+
+    def __init__(self, sink=None, livello: Livello = Livello.INFO, stampa: bool = False):
+        self.sink = sink if sink is not None else RingBuffer()
+        self.livello = Livello(livello)
+        self.stampa = stampa
+        self.model = None  # Impostato dal modello, per leggere lo step corrente
+
+    def emit(self, tipo: Evento, agente=None, pos=None, colore=None, valore: int = 0, flusso: int = 0):
+        livello = LIVELLO_EVENTO[tipo]
+        if livello > self.livello:
+            return
+        step = self.model.step_counter if self.model is not None else 0
+        x, y = pos if pos is not None else (-1, -1)
+        record = (step, tipo, livello, codice_colore(colore), flusso,
+                  agente.unique_id if agente is not None else -1, x, y, valore)
+        self.sink.write(record)
+        if self.stampa:
+            print(formatta(np.array(record, dtype=EVENT_DTYPE)))
+
+    def events(self) -> Optional[np.ndarray]:
+        """Eventi in memoria (solo con RingBuffer)"""
+        return self.sink.events() if hasattr(self.sink, "events") else None
+
+    def close(self):
+        self.sink.close()
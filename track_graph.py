@@ -0,0 +1,121 @@
+import heapq
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+
+class TrackGraph:
+    """Grafo delle tracce compilato: nodi con id interi e adiacenza in formato CSR.
+
+    I nodi sono numerati secondo l'ordine delle posizioni (x, y), quindi confrontare
+    due id equivale a confrontare le rispettive tuple: le ricerche sugli interi
+    restituiscono gli stessi percorsi di quelle sulle tuple. I vicini del nodo i sono
+    ``neighbors[offsets[i]:offsets[i + 1]]``, nello stesso ordine di get_neighbors.
+    """
+
+    DIRECTIONS = [(0, 1), (0, -1), (1, 0), (-1, 0)]
+
+    def __init__(self, tracks: Iterable[Tuple[int, int]]):
+        self.nodes: List[Tuple[int, int]] = sorted(tracks)
+        self.index: Dict[Tuple[int, int], int] = {pos: i for i, pos in enumerate(self.nodes)}
+
+        self.xs = array("i", [x for x, _ in self.nodes])
+        self.ys = array("i", [y for _, y in self.nodes])
+        self.offsets = array("i", [0])
+        self.neighbors = array("i")
+        for x, y in self.nodes:
+            for dx, dy in self.DIRECTIONS:
+                j = self.index.get((x + dx, y + dy))
+                if j is not None:
+                    self.neighbors.append(j)
+            self.offsets.append(len(self.neighbors))
+
+        self.last_expansions = 0  # Nodi espansi dall'ultima ricerca
+
+    @classmethod
+    def da_array(cls, xs, ys, offsets, neighbors) -> "TrackGraph":
+        """Grafo già compilato (coordinate dei nodi ordinate e vettori CSR), senza ricalcolare i vicini"""
+        graph = cls.__new__(cls)
+        graph.xs, graph.ys = array("i", np.asarray(xs).tobytes()), array("i", np.asarray(ys).tobytes())
+        graph.offsets = array("i", np.asarray(offsets).tobytes())
+        graph.neighbors = array("i", np.asarray(neighbors).tobytes())
+        graph.nodes = list(zip(graph.xs, graph.ys))
+        graph.index = {pos: i for i, pos in enumerate(graph.nodes)}
+        graph.last_expansions = 0
+        return graph
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def __contains__(self, pos: Tuple[int, int]) -> bool:
+        return pos in self.index
+
+    def degree(self, node: int) -> int:
+        return self.offsets[node + 1] - self.offsets[node]
+
+    def adjacent(self, node: int):
+        """Id dei vicini del nodo"""
+        return self.neighbors[self.offsets[node]:self.offsets[node + 1]]
+
+    def as_numpy(self):
+        """Viste NumPy (senza copia) di offsets e neighbors"""
+        return (np.frombuffer(self.offsets, dtype=np.int32),
+                np.frombuffer(self.neighbors, dtype=np.int32))
+
+    def memory_bytes(self) -> int:
+        """Memoria dei vettori CSR e delle coordinate (esclusa la mappa posizione -> id)"""
+        return sum(a.itemsize * len(a) for a in (self.xs, self.ys, self.offsets, self.neighbors))
+
+    def astar(self, start: int, goal: int) -> Optional[List[int]]:
+        """A* sugli id interi, con euristica di Manhattan"""
+        if start == goal:
+            self.last_expansions = 0
+            return [start]
+
+        xs, ys = self.xs, self.ys
+        offsets, neighbors = self.offsets, self.neighbors
+        gx, gy = xs[goal], ys[goal]
+
+        open_set = [(0, start)]
+        came_from = {}
+        g_score = {start: 0}
+        expansions = 0
+
+        while open_set:
+            current = heapq.heappop(open_set)[1]
+            expansions += 1
+
+            if current == goal:
+                path = [current]
+                while current in came_from:
+                    current = came_from[current]
+                    path.append(current)
+                self.last_expansions = expansions
+                return path[::-1]
+
+            tentative_g_score = g_score[current] + 1
+            for k in range(offsets[current], offsets[current + 1]):
+                neighbor = neighbors[k]
+                if neighbor not in g_score or tentative_g_score < g_score[neighbor]:
+                    came_from[neighbor] = current
+                    g_score[neighbor] = tentative_g_score
+                    f = tentative_g_score + abs(xs[neighbor] - gx) + abs(ys[neighbor] - gy)
+                    heapq.heappush(open_set, (f, neighbor))
+
+        self.last_expansions = expansions
+        return None
+
+    def find_path(self, start: Tuple[int, int], goal: Tuple[int, int]) -> Optional[List[Tuple[int, int]]]:
+        """A* tra due posizioni; start deve essere un nodo del grafo"""
+        if start == goal:
+            return [start]
+        g = self.index.get(goal)
+        if g is None:
+            # Partendo da una traccia si raggiungono solo tracce
+            return None
+        path = self.astar(self.index[start], g)
+        if path is None:
+            return None
+        nodes = self.nodes
+        return [nodes[i] for i in path]
@@ -1,12 +1,20 @@
-import random
-from collections import deque
+from collections import Counter, defaultdict, deque
 from mesa.model import Model
 from mesa.space import MultiGrid
 from forkLift import ForkLift, UnloadingForkLift, LoadingForkLift
-from mesa.experimental.devs import ABMSimulator
-from dock import Dock, UnloadingDock, LoadingDock
+from mesa.experimental.devs import ABMSimulator, Priority
+from dock import Dock, DockPool, UnloadingDock, LoadingDock
 from order import Order
-from rack import Rack
+from rack import RackStore
+from pathfindingA import find_path
+from path_cache import PathCache
+from tracing import CARICO, SCARICO, Evento, Tracer
+from metrics_recorder import COLORI_DISTRIBUZIONE, MetricsRecorder
+from corridor_graph import CorridorGraph
+from reservation_table import ReservationTable
+from dispatcher import TaskDispatcher
+from layout import Layout
+from compiled_layout import compila, layout_compilato
 
 
 class WarehouseModel(Model):
@@ -23,43 +31,65 @@ class WarehouseModel(Model):
             num_unloading_forkLift=1,
             num_loading_forkLift=1,
             initial_warehouse_filling=50,  # Percentuale di riempimento iniziale
+            routing="tables",  # "tables": percorsi precalcolati, "corridor": A* sui corridoi, "astar": A* sulle celle
+            compact_path_tables=False,  # Tabelle dei percorsi come array NumPy compatti
+            path_cache_size=256,  # Numero massimo di percorsi in cache (0 per disattivarla)
+            travel="steps",  # "steps": una cella per step, "events": un solo evento di arrivo per viaggio
+            fast_forward=False,  # In run_for salta gli step senza lavoro fino al prossimo ordine
+            cooperative=False,  # Percorsi senza collisioni con la tabella delle prenotazioni spazio-tempo
+            layout: Layout = None,  # Layout o LayoutCompilato (None: layout storico con width, height e numero di dock)
+            layout_cache: str = None,  # Cartella in cui salvare e da cui caricare il layout storico compilato
             simulator: ABMSimulator = None,
+            seed=None,  # Seed del generatore casuale del modello (None: non riproducibile)
+            tracer: Tracer = None,  # Tracciamento degli eventi (None: disattivato)
 
     ):
-        # Attributi per la raccolta dati
-        self.data_collector = {
-            'step': [],
-            'occupazione_totale': [],
-            'ordini_carico_processati': [],
-            'ordini_scarico_processati': [],
-            'dock_carico_liberi': [],
-            'dock_scarico_liberi': [],
-            'muletti_carico_liberi': [],
-            'muletti_scarico_liberi': [],
-            'ordini_carico_in_coda': [],
-            'ordini_scarico_in_coda': [],
-            'tempo_medio_ordine_carico' : [],
-            'tempo_medio_ordine_scarico': [],
-        }
+        # Registro colonnare delle metriche raccolte ad ogni step
+        self.data_collector = MetricsRecorder()
         self.ordini_carico_durata_processamento = []
         self.ordini_scarico_durata_processamento = []
         self.ordini_carico_completati = 0
         self.ordini_scarico_completati = 0
-
-
-        super().__init__()
+        # Somme delle durate, per calcolare le medie senza scorrere le liste
+        self.ordini_carico_durata_totale = 0
+        self.ordini_scarico_durata_totale = 0
+        # Numero di muletti e dock liberi per tipo, aggiornato dai setter di free
+        self.agenti_liberi = Counter()
+        # Dock liberi per tipo, aggiornati dal setter di free dei dock
+        self.dock_liberi = defaultdict(DockPool)
+        # Code dei task unitari degli ordini e dei muletti liberi
+        self.dispatcher = TaskDispatcher(self)
+
+
+        # Tutta la casualità passa da self.random, seminato qui
+        super().__init__(seed=seed)
         self.simulator = simulator
         self.simulator.setup(self)
 
-        self.height = height
-        self.width = width
-        self.num_unloading = num_unloading
-        self.num_loading = num_loading
+        # Rack, tracce, dock e standby: il layout dato ne fissa anche le dimensioni e il numero di dock.
+        # Il layout compilato (grafo, accessi ai dock, tabelle dei percorsi) è condiviso in sola lettura
+        if layout is None:
+            layout = layout_compilato(layout_cache, tabelle=routing == "tables", width=width, height=height,
+                                      num_unloading=num_unloading, num_loading=num_loading,
+                                      corridoi_storici=True)
+        else:
+            layout = compila(layout)
+        self.layout_compilato = layout
+        self.layout = layout = layout.layout
+        self.height = layout.height
+        self.width = layout.width
+        self.num_unloading = len(layout.dock_scarico)
+        self.num_loading = len(layout.dock_carico)
         self.dock_capacity = dock_capacity
         self.order_time = order_time
         self.unloading_order_time = unloading_order_time
         self.initial_warehouse_filling = initial_warehouse_filling
 
+        # Tracciamento degli eventi: None quando è disattivato
+        self.tracer = tracer
+        if tracer is not None:
+            tracer.model = self
+
         # Code per gli ordini in attesa
         self.loading_order_queue = deque()  # Coda per ordini di carico
         self.unloading_order_queue = deque()  # Coda per ordini di scarico
@@ -75,210 +105,137 @@ class WarehouseModel(Model):
         self.num_unloading_forkLift = num_unloading_forkLift
         self.num_loading_forkLift = num_loading_forkLift
 
-        self.grid = MultiGrid(width, height, torus=False)
+        self.grid = MultiGrid(self.width, self.height, torus=False)
 
-        # Dizionario per tenere traccia degli scaffali
-        self.shelves = {}  # {(x, y): Rack}
+        # Inventario degli scaffali, accessibile come dizionario {(x, y): Rack}
         self._create_shelves()
         self._create_track_system()
 
-
-        self._create_layout(num_unloading, num_loading, num_unloading_forkLift, num_loading_forkLift)
+        # Grafo delle tracce compilato (id interi + CSR): il grafo non cambia più
+        self.track_graph = self.layout_compilato.track_graph
+
+        # Tabelle next-hop/distanze precalcolate o grafo dei corridoi, secondo la modalità di routing
+        if routing not in ("tables", "corridor", "astar"):
+            raise ValueError(f"Modalità di routing sconosciuta: {routing}")
+        self.routing = routing
+        self.path_tables = self.layout_compilato.path_tables(compact_path_tables) if routing == "tables" else None
+        self.corridor_graph = CorridorGraph(self.track_graph) if routing == "corridor" else None
+        # Cache LRU dei percorsi già calcolati, condivisa da tutti i muletti
+        self.path_cache = PathCache(path_cache_size) if path_cache_size > 0 else None
+        # Prenotazioni (cella, step) dei percorsi, solo con i percorsi cooperativi
+        self.reservation_table = ReservationTable(self.track_graph, tabelle=self.path_tables) if cooperative else None
+        self.fase_muletti = False  # True mentre vengono eseguiti gli step dei muletti
+
+        # Con i viaggi a eventi il muletto che parte pianifica il suo arrivo nel simulatore
+        if travel not in ("steps", "events"):
+            raise ValueError(f"Modalità di viaggio sconosciuta: {travel}")
+        self.travel = travel
+        self.viaggi_a_eventi = travel == "events"
+        self.fast_forward = fast_forward
+
+        self._create_layout(num_unloading_forkLift, num_loading_forkLift)
 
     def collect_data(self):
         """Raccoglie i dati per ogni step della simulazione"""
-        stats = self.get_warehouse_stats()
+        self.data_collector.append(self.step_counter, *self._valori_metriche())
 
-        # Conta dock liberi
-        dock_carico_liberi = sum(1 for dock in self.loading_docks if dock.free)
-        dock_scarico_liberi = sum(1 for dock in self.unloading_docks if dock.free)
-
-        # Conta muletti liberi usando la griglia invece del scheduler
-        muletti_carico_liberi = 0
-        muletti_scarico_liberi = 0
+    def _valori_metriche(self):
+        """Metriche dello step corrente (escluso il numero di step) nell'ordine dello schema del registro"""
+        stats = self.get_warehouse_stats()
 
-        # Itera attraverso tutte le posizioni della griglia per trovare gli agenti
-        for x in range(self.grid.width):
-            for y in range(self.grid.height):
-                cell_contents = self.grid.get_cell_list_contents([(x, y)])
-                for agent in cell_contents:
-                    if isinstance(agent, LoadingForkLift) and agent.free:
-                        muletti_carico_liberi += 1
-                    elif isinstance(agent, UnloadingForkLift) and agent.free:
-                        muletti_scarico_liberi += 1
+        # Dock e muletti liberi dai contatori aggiornati ad ogni cambio di stato
+        dock_carico_liberi = self.agenti_liberi[LoadingDock]
+        dock_scarico_liberi = self.agenti_liberi[UnloadingDock]
+        muletti_carico_liberi = self.agenti_liberi[LoadingForkLift]
+        muletti_scarico_liberi = self.agenti_liberi[UnloadingForkLift]
 
         if self.ordini_carico_durata_processamento:
-            media_carico = sum(self.ordini_carico_durata_processamento) / len(self.ordini_carico_durata_processamento)
+            media_carico = self.ordini_carico_durata_totale / len(self.ordini_carico_durata_processamento)
         else:
             media_carico = 0
 
         if self.ordini_scarico_durata_processamento:
-            media_scarico = sum(self.ordini_scarico_durata_processamento) / len(self.ordini_scarico_durata_processamento)
+            media_scarico = self.ordini_scarico_durata_totale / len(self.ordini_scarico_durata_processamento)
         else:
             media_scarico = 0
 
         # Conteggio pacchi per colore e spazio vuoto
-        colore_counts = {'blue': 0, 'red': 0, 'green': 0, 'yellow': 0, 'orange': 0, 'gray': 0}
-        for rack in self.shelves.values():
-            color = rack.get_colore()
-            occupato = rack.get_occupazione_corrente()
-            colore_counts[color] += occupato
-            colore_counts['gray'] += (rack.get_capienza() - occupato)
-
-        self.data_collector.setdefault('distribuzione_colori', []).append(colore_counts)
-
-        # Raccogli i dati usando le chiavi corrette
-        self.data_collector['step'].append(self.step_counter)
-        self.data_collector['occupazione_totale'].append(stats['current_percentage'])  # Usa current_percentage
-        self.data_collector['ordini_carico_processati'].append(self.ordini_carico_completati)
-        self.data_collector['ordini_scarico_processati'].append(self.ordini_scarico_completati)
-        self.data_collector['dock_carico_liberi'].append(dock_carico_liberi)
-        self.data_collector['dock_scarico_liberi'].append(dock_scarico_liberi)
-        self.data_collector['muletti_carico_liberi'].append(muletti_carico_liberi)
-        self.data_collector['muletti_scarico_liberi'].append(muletti_scarico_liberi)
-        self.data_collector['ordini_carico_in_coda'].append(len(self.loading_order_queue))
-        self.data_collector['ordini_scarico_in_coda'].append(len(self.unloading_order_queue))
-        self.data_collector['tempo_medio_ordine_carico'].append(media_carico)
-        self.data_collector['tempo_medio_ordine_scarico'].append(media_scarico)
+        colore_counts = self.shelves.occupazione_per_colore()
+
+        return (
+            stats['current_percentage'],
+            self.ordini_carico_completati,
+            self.ordini_scarico_completati,
+            dock_carico_liberi,
+            dock_scarico_liberi,
+            muletti_carico_liberi,
+            muletti_scarico_liberi,
+            len(self.loading_order_queue),
+            len(self.unloading_order_queue),
+            media_carico,
+            media_scarico,
+            *(colore_counts[colore] for colore in COLORI_DISTRIBUZIONE),
+        )
 
     def _create_shelves(self):
         """Crea gli scaffali usando la classe Rack e li riempie secondo la percentuale globale"""
-        block_size = 10
-        spacing = 3
-        start_x = 3
-        start_y = 4
-
-        # Lista temporanea per tenere traccia di tutte le posizioni dei rack
-        all_rack_positions = []
-
-        # Primo blocco (top-left)
-        origin_x, origin_y = start_x, start_y + block_size + spacing
-        for dx in range(block_size):
-            for dy in range(0, block_size, 2):  # Solo righe pari
-                x = origin_x + dx
-                y = origin_y + dy
-
-                if dy < 2:  # Prime 2 righe
-                    shelf_type = "blue"
-                elif dy < 6:  # Seconde 2 righe
-                    shelf_type = "red"
-                else:  # Ultima riga
-                    shelf_type = "green"
-
-                if x < self.width and y < self.height:
-                    nuovo_rack = Rack(capienza=15, colore=shelf_type)
-                    self.shelves[(x, y)] = nuovo_rack
-                    all_rack_positions.append((x, y))
-
-        # Secondo blocco
-        origin_x, origin_y = start_x + block_size + spacing, start_y + block_size + spacing
-        for dx in range(block_size):
-            for dy in range(0, block_size, 2):  # Solo righe pari
-                x = origin_x + dx
-                y = origin_y + dy
-
-                if dy < 2:  # Prime 2 righe
-                    shelf_type = "blue"
-                elif dy < 6:  # Seconde 2 righe
-                    shelf_type = "red"
-                else:  # Ultima riga
-                    shelf_type = "green"
-
-                if x < self.width and y < self.height:
-                    nuovo_rack = Rack(capienza=15, colore=shelf_type)
-                    self.shelves[(x, y)] = nuovo_rack
-                    all_rack_positions.append((x, y))
-
-        # Terzo blocco (bottom-left)
-        origin_x, origin_y = start_x, start_y
-        for dx in range(block_size):
-            for dy in range(0, block_size, 2):  # Solo righe pari
-                x = origin_x + dx
-                y = origin_y + dy
-
-                if dy < 4:  # Prime 2 righe
-                    shelf_type = "orange"
-                elif dy < 8:  # 2a e 3a riga
-                    shelf_type = "yellow"
-                else:  # 4a e 5a riga
-                    shelf_type = "blue"
-
-                if x < self.width and y < self.height:
-                    nuovo_rack = Rack(capienza=15, colore=shelf_type)
-                    self.shelves[(x, y)] = nuovo_rack
-                    all_rack_positions.append((x, y))
-
-        # Quarto blocco
-        origin_x, origin_y = start_x + block_size + spacing, start_y
-        for dx in range(block_size):
-            for dy in range(0, block_size, 2):  # Solo righe pari
-                x = origin_x + dx
-                y = origin_y + dy
-
-                if dy < 4:  # Prime 2 righe
-                    shelf_type = "orange"
-                elif dy < 8:  # 2a e 3a riga
-                    shelf_type = "yellow"
-                else:  # 4a e 5a riga
-                    shelf_type = "blue"
-
-                if x < self.width and y < self.height:
-                    nuovo_rack = Rack(capienza=15, colore=shelf_type)
-                    self.shelves[(x, y)] = nuovo_rack
-                    all_rack_positions.append((x, y))
+        # Copia delle posizioni: il riempimento le mescola, il layout resta invariato
+        all_rack_positions = list(self.layout.rack_positions)
+
+        # Inventario in array paralleli: self.shelves[(x, y)] restituisce una vista Rack
+        self.shelves = RackStore(self.layout.rack_positions, self.layout.rack_colors, capienza=15)
 
         # Ora riempi i rack secondo la percentuale globale
         self._fill_warehouse_by_percentage(all_rack_positions)
 
     def _create_track_system(self):
         """Crea il sistema di tracce navigabili per i muletti"""
-        self.tracks = set()  # Insieme delle posizioni navigabili
-
-        block_size = 10
-        spacing = 3
-        start_x = 3
-        start_y = 4
-
-        # Corridoio orizzontale principale
-        corridor_y = (start_y + block_size + spacing / 2)
-        for x in range(1, self.width - 1):
-            self.tracks.add((x, int(corridor_y)))
-
-        # Corridoio verticale centrale
-        corridor_x = start_x + block_size + spacing / 2
-        for y in range(1, self.height - 1):
-            self.tracks.add((int(corridor_x), y))
-
-            # Corridoi orizzontali all'interno dei blocchi (spostati in alto di 2)
-            for dy in range(1, block_size, 2):  # Solo righe dispari (1, 3, 5, 7, 9)
-                # Blocchi superiori (entrambi: sinistro e destro) - spostati in alto di 2
-                corridor_y_upper = start_y + block_size + spacing + dy - 2
-                for x in range(1, self.width - 1):
-                    self.tracks.add((x, corridor_y_upper))
-
-                # Blocchi inferiori (entrambi: sinistro e destro) - spostati in alto di 2
-                corridor_y_lower = start_y + dy - 2
-                for x in range(1, self.width - 1):
-                    self.tracks.add((x, corridor_y_lower))
-
-            # Corridoi orizzontali esterni (alto e basso)
-            corridor_y_top = self.height - 2
-            corridor_y_bottom = start_y - 3
-            for x in range(1, self.width - 1):
-                self.tracks.add((x, corridor_y_top))
-                self.tracks.add((x, corridor_y_bottom))
-
-            # Corridoi verticali esterni (sinistro e destro)
-            corridor_x_left = start_x - 2
-            corridor_x_right = self.width - 2
-            for y in range(start_y - 3, self.height - 1):
-                self.tracks.add((corridor_x_left, y))
-                self.tracks.add((corridor_x_right, y))
+        self.tracks = self.layout.tracks  # Insieme delle posizioni navigabili
+
+    # Pickle (checkpoint): le tracce si ricavano dal layout
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["tracks"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.tracks = self.layout.tracks
 
     def is_track_position(self, pos):
         """Verifica se una posizione è una traccia navigabile"""
         return pos in self.tracks
 
+    def find_path(self, start, goal):
+        """Percorso minimo tra start e goal, passando dalla cache dei percorsi se attiva"""
+        if self.path_cache is not None:
+            return self.path_cache.get_or_compute(start, goal, self._compute_path)
+        return self._compute_path(start, goal)
+
+    def find_path_cooperativo(self, agente, start, goal):
+        """Percorso che evita le celle prenotate dagli altri muletti, prenotato per l'agente.
+
+        percorso[0] è la cella dell'agente alla fine dello step precedente se il percorso
+        viene chiesto prima degli step dei muletti (dal dispatcher), altrimenti alla fine
+        di questo step. Se non esiste un percorso libero, o se start o goal non sono tracce,
+        si usa quello minimo senza prenotarlo: questi viaggi non sono esenti da collisioni
+        (sono contati in reservation_table.fallimenti e reservation_table.fuori_tracce).
+        """
+        t0 = self.steps if self.fase_muletti else self.steps - 1
+        path = self.reservation_table.pianifica(agente.unique_id, start, goal, t0)
+        if path is None:
+            return self.find_path(start, goal)
+        return path
+
+    def _compute_path(self, start, goal):
+        """Calcola il percorso secondo la modalità di routing; fuori dalle tracce usa sempre A*"""
+        if start in self.track_graph:
+            if self.path_tables is not None:
+                return self.path_tables.get_path(start, goal)
+            if self.corridor_graph is not None:
+                return self.corridor_graph.find_path(start, goal)
+        return find_path(self, start, goal)
+
 
     def _fill_warehouse_by_percentage(self, all_positions):
         """Riempie il magazzino: prima riempie completamente i rack, poi parzialmente l'ultimo se necessario"""
@@ -288,17 +245,14 @@ class WarehouseModel(Model):
         # Calcola il numero totale di items da distribuire
         total_items_to_place = int((self.initial_warehouse_filling / 100) * total_capacity)
 
-        print(f"Magazzino: {len(all_positions)} rack, capacità totale: {total_capacity}")
-        print(f"Percentuale: {self.initial_warehouse_filling}%, items da piazzare: {total_items_to_place}")
 
         # Mescola casualmente le posizioni per una distribuzione random
-        random.shuffle(all_positions)
+        self.random.shuffle(all_positions)
 
         # FASE 1: Calcola quanti rack riempire completamente e quanti items rimangono
         rack_completi = total_items_to_place // 15  # Divisione intera
         items_rimanenti = total_items_to_place % 15  # Resto della divisione
 
-        print(f"Strategia: {rack_completi} rack completi (15 items) + 1 rack parziale ({items_rimanenti} items)")
 
         items_placed = 0
 
@@ -318,18 +272,11 @@ class WarehouseModel(Model):
             rack.set_occupazione_temp(items_rimanenti)
             items_placed += items_rimanenti
 
-        print(f"Items piazzati: {items_placed}")
+        if self.tracer is not None:
+            self.tracer.emit(Evento.FILL, valore=items_placed)
 
-        # Statistiche finali per debug
-        rack_distribution = {}
-        for pos in all_positions:
-            occupancy = self.shelves[pos].get_occupazione_corrente()
-            rack_distribution[occupancy] = rack_distribution.get(occupancy, 0) + 1
-
-        print("Distribuzione rack per occupazione:")
-        for occupancy, count in sorted(rack_distribution.items()):
-            if count > 0:  # Mostra solo i valori con count > 0
-                print(f"  {occupancy} items: {count} rack")
+        # Le code dei rack con merce seguono l'ordine degli scaffali, non quello di riempimento
+        self.shelves.ricostruisci_indici()
 
 
     def add_items_to_shelf(self, pos, quantity):
@@ -354,95 +301,140 @@ class WarehouseModel(Model):
         """Controlla se la posizione contiene uno scaffale"""
         return pos in self.shelves
 
-    def _create_layout(self, num_unloading, num_loading, num_unloading_forkLift, num_loading_forkLift):
+    def _create_layout(self, num_unloading_forkLift, num_loading_forkLift):
         # Posizionamento muletti nelle zone di scarico
         for i in range(num_unloading_forkLift):
                 unloading_forklift = UnloadingForkLift(self)
-                standby_pos_unloading = (28,28)
-                self.grid.place_agent(unloading_forklift, standby_pos_unloading)
+                self.grid.place_agent(unloading_forklift, self.layout.standby_scarico)
 
         # Posizionamento muletti nelle zone di carico
         for x in range(num_loading_forkLift):
             loading_forklift = LoadingForkLift(self)
-            standby_pos_loading = (14, 1)
-            self.grid.place_agent(loading_forklift, standby_pos_loading)
+            self.grid.place_agent(loading_forklift, self.layout.standby_carico)
 
         # Posizionamento dock scarico
-        center_y = self.grid.height // 2
-        start_y = center_y - num_unloading // 2
-        for i in range(num_unloading):
-            y = start_y + i
-            if 0 <= y < self.grid.height:
-                unloading_dock = UnloadingDock(self)
-                self.unloading_docks.append(unloading_dock)  # Aggiungi alla lista
-                self.grid.place_agent(unloading_dock, (self.grid.width - 1, y))
+        for pos in self.layout.dock_scarico:
+            unloading_dock = UnloadingDock(self)
+            self.unloading_docks.append(unloading_dock)  # Aggiungi alla lista
+            self.grid.place_agent(unloading_dock, pos)
 
         # Posizionamento dock carico
-        for x in range(num_loading):
+        for pos in self.layout.dock_carico:
             loading_dock = LoadingDock(self)
             self.loading_docks.append(loading_dock)
-            self.grid.place_agent(loading_dock, (x + 1, 0))
+            self.grid.place_agent(loading_dock, pos)
 
     def generate_loading_order(self):
         """Genera un nuovo ordine di carico con capacità casuale"""
-        capacita_ordine = random.randint(5, self.dock_capacity)
-        nuovo_ordine = Order(capacita_ordine)
-        print(f"Nuovo ordine di CARICO generato con capacità: {capacita_ordine}")
+        capacita_ordine = self.random.randint(5, self.dock_capacity)
+        nuovo_ordine = Order(capacita_ordine, self.random)
+        if self.tracer is not None:
+            self.tracer.emit(Evento.ORDER_CREATED, valore=capacita_ordine, flusso=CARICO)
         return nuovo_ordine
 
     def generate_unloading_order(self):
         """Genera un nuovo ordine di scarico con capacità casuale"""
-        capacita_ordine = random.randint(5, self.dock_capacity)
-        nuovo_ordine = Order(capacita_ordine)
-        print(f"Nuovo ordine di SCARICO generato con capacità: {capacita_ordine}")
+        capacita_ordine = self.random.randint(5, self.dock_capacity)
+        nuovo_ordine = Order(capacita_ordine, self.random)
+        if self.tracer is not None:
+            self.tracer.emit(Evento.ORDER_CREATED, valore=capacita_ordine, flusso=SCARICO)
         return nuovo_ordine
 
     def assign_loading_order_to_dock(self, order):
-        """Cerca un dock di loading libero e assegna l'ordine"""
-        for dock in self.loading_docks:
-            if dock.receive_order(order):
-                print(f"Ordine di carico assegnato al dock in posizione {dock.pos}")
-                return True
-        return False
+        """Assegna l'ordine al primo dock di loading libero"""
+        dock = self.dock_liberi[LoadingDock].prendi()
+        if dock is None or not dock.receive_order(order):
+            return False
+        if self.tracer is not None:
+            self.tracer.emit(Evento.ORDER_ASSIGNED, dock, dock.pos, valore=order.get_capacita_totale(), flusso=CARICO)
+        return True
 
     def assign_unloading_order_to_dock(self, order):
-        """Cerca un dock di unloading libero e assegna l'ordine"""
-        for dock in self.unloading_docks:
-            if dock.receive_order(order):
-                print(f"Ordine di scarico assegnato al dock in posizione {dock.pos}")
-                return True
-        return False
+        """Assegna l'ordine al primo dock di unloading libero"""
+        dock = self.dock_liberi[UnloadingDock].prendi()
+        if dock is None or not dock.receive_order(order):
+            return False
+        if self.tracer is not None:
+            self.tracer.emit(Evento.ORDER_ASSIGNED, dock, dock.pos, valore=order.get_capacita_totale(), flusso=SCARICO)
+        return True
 
     def process_loading_order_queue(self):
-        """Processa la coda degli ordini di carico"""
-        orders_to_remove = []
-
-        for order in list(self.loading_order_queue):
-            if self.assign_loading_order_to_dock(order):
-                orders_to_remove.append(order)
-
-        for order in orders_to_remove:
-            self.loading_order_queue.remove(order)
-            print(f"Ordine di carico rimosso dalla coda e assegnato")
+        """Assegna gli ordini di carico in coda, in ordine FIFO, finché ci sono dock liberi"""
+        queue = self.loading_order_queue
+        while queue and self.assign_loading_order_to_dock(queue[0]):
+            queue.popleft()
 
     def process_unloading_order_queue(self):
-        """Processa la coda degli ordini di scarico"""
-        orders_to_remove = []
-
-        for order in list(self.unloading_order_queue):
-            if self.assign_unloading_order_to_dock(order):
-                orders_to_remove.append(order)
-
-        for order in orders_to_remove:
-            self.unloading_order_queue.remove(order)
-            print(f"Ordine di scarico rimosso dalla coda e assegnato")
+        """Assegna gli ordini di scarico in coda, in ordine FIFO, finché ci sono dock liberi"""
+        queue = self.unloading_order_queue
+        while queue and self.assign_unloading_order_to_dock(queue[0]):
+            queue.popleft()
 
     @property
     def order_queue(self):
         """Mantiene compatibilità - restituisce la coda di carico"""
         return self.loading_order_queue
 
+    def run_for(self, steps: int):
+        """Esegue il numero di step indicato tramite il simulatore, che processa anche gli arrivi dei muletti.
+
+        Con fast_forward gli step in cui il magazzino è fermo fino al prossimo ordine
+        vengono saltati: le metriche sono registrate come righe costanti e i rimescolamenti
+        dei muletti ripetuti sul generatore, così il risultato è identico a una run normale.
+        """
+        if not self.fast_forward:
+            self.simulator.run_for(steps)
+            return
+        fine = self.simulator.time + steps
+        while self.simulator.time < fine:
+            salto = self._step_quiescenti(fine - self.simulator.time)
+            if salto:
+                self._avanti_veloce(salto)
+            else:
+                self.simulator.run_for(1)
+
+    def _step_quiescenti(self, massimo: int) -> int:
+        """Numero di step (al più massimo) che da qui non cambierebbero nulla, 0 se c'è lavoro"""
+        if self.step_counter == 0 or self.loading_order_queue or self.unloading_order_queue:
+            return 0
+        # Il primo step che genera un ordine non si può saltare
+        salto = min(self.last_loading_order_step, self.last_unloading_order_step) + self.order_time - 1 - self.step_counter
+        if salto <= 0:
+            return 0
+        if (self.agenti_liberi[LoadingDock] != len(self.loading_docks)
+                or self.agenti_liberi[UnloadingDock] != len(self.unloading_docks)):
+            return 0
+        for forklift_type in (UnloadingForkLift, LoadingForkLift):
+            for forklift in self.agents_by_type[forklift_type]:
+                if forklift.state != "IDLE" or forklift.pos != forklift.standby_position:
+                    return 0
+        if not self.dispatcher.vuoto():
+            return 0
+        # Nel simulatore deve esserci solo il prossimo model.step
+        if len(self.simulator.event_list.peak_ahead(2)) > 1:
+            return 0
+        return min(salto, massimo)
+
+    def _avanti_veloce(self, n: int):
+        """Salta n step quiescenti"""
+        # Ogni step avrebbe rimescolato i muletti con shuffle_do: stesse estrazioni sul generatore
+        for forklift_type in (UnloadingForkLift, LoadingForkLift):
+            da_mescolare = [None] * len(self.agents_by_type[forklift_type])
+            for _ in range(n):
+                self.random.shuffle(da_mescolare)
+        primo = self.step_counter + 1
+        self.step_counter += n
+        self.steps += n
+        self.data_collector.append_repeated(n, primo, *self._valori_metriche())
+
+        # Sposta in avanti il prossimo model.step del simulatore
+        self.simulator.event_list.clear()
+        self.simulator.time += n
+        self.simulator.schedule_event_next_tick(self.step, priority=Priority.HIGH)
+
     def step(self):
+        if self.viaggi_a_eventi and self.simulator.time != self.steps:
+            raise RuntimeError("Con travel='events' il modello va eseguito tramite il simulatore (run_for)")
 
         if self.step_counter == 0:
             nuovo_ordine = self.generate_loading_order()
@@ -456,11 +448,10 @@ class WarehouseModel(Model):
         if self.step_counter - self.last_loading_order_step >= self.order_time:
             nuovo_ordine = self.generate_loading_order()
 
-            if self.assign_loading_order_to_dock(nuovo_ordine):
-                print("Ordine di carico assegnato immediatamente")
-            else:
+            if not self.assign_loading_order_to_dock(nuovo_ordine):
                 self.loading_order_queue.append(nuovo_ordine)
-                print(f"Ordine di carico aggiunto alla coda. Coda attuale: {len(self.loading_order_queue)} ordini")
+                if self.tracer is not None:
+                    self.tracer.emit(Evento.ORDER_QUEUED, valore=len(self.loading_order_queue), flusso=CARICO)
 
             self.last_loading_order_step = self.step_counter
 
@@ -468,11 +459,10 @@ class WarehouseModel(Model):
         if self.step_counter - self.last_unloading_order_step >= self.order_time:
             nuovo_ordine = self.generate_unloading_order()
 
-            if self.assign_unloading_order_to_dock(nuovo_ordine):
-                print("Ordine di scarico assegnato immediatamente")
-            else:
+            if not self.assign_unloading_order_to_dock(nuovo_ordine):
                 self.unloading_order_queue.append(nuovo_ordine)
-                print(f"Ordine di scarico aggiunto alla coda. Coda attuale: {len(self.unloading_order_queue)} ordini")
+                if self.tracer is not None:
+                    self.tracer.emit(Evento.ORDER_QUEUED, valore=len(self.unloading_order_queue), flusso=SCARICO)
 
             self.last_unloading_order_step = self.step_counter
 
@@ -483,8 +473,13 @@ class WarehouseModel(Model):
         if self.unloading_order_queue:
             self.process_unloading_order_queue()
 
+        # Assegna i task in attesa ai muletti liberi
+        self.dispatcher.dispatch()
+
+        self.fase_muletti = True
         self.agents_by_type[UnloadingForkLift].shuffle_do("step")
         self.agents_by_type[LoadingForkLift].shuffle_do("step")
+        self.fase_muletti = False
 
         # Richiamo collezione dati
         self.collect_data()
@@ -494,8 +489,8 @@ class WarehouseModel(Model):
     def get_warehouse_stats(self):
         """Ritorna statistiche del magazzino"""
         total_racks = len(self.shelves)
-        total_capacity = total_racks * 15
-        total_occupied = sum(rack.get_occupazione_corrente() for rack in self.shelves.values())
+        total_capacity = self.shelves.capienza_totale()
+        total_occupied = self.shelves.occupazione_totale()
         current_percentage = (total_occupied / total_capacity * 100) if total_capacity > 0 else 0
 
         return {
@@ -0,0 +1,221 @@
+"""Grafici delle prestazioni per la dashboard, aggiornati in modo incrementale.
+
+La figura 4x2 viene creata una sola volta per modello; ad ogni frame le serie leggono
+dal registro delle metriche solo le righe nuove e aggiornano le linee esistenti.
+Ogni serie è ridotta a bucket che conservano il minimo e il massimo (i picchi restano
+visibili): quando i bucket superano ``MAX_BUCKET`` quelli adiacenti vengono fusi a
+coppie e la larghezza raddoppia, quindi ogni frame disegna al più 2 * MAX_BUCKET punti
+per linea qualunque sia la lunghezza della run.
+"""
+import weakref
+from typing import List, Tuple
+
+import numpy as np
+from matplotlib.figure import Figure
+
+# Circa una colonna di pixel per bucket negli assi della figura 15x20 a 100 dpi
+MAX_BUCKET = 512
+
+# Colori del grafico a torta della distribuzione dei pacchi
+COLORI_TORTA = {
+    'blue': 'blue',
+    'red': 'red',
+    'green': 'green',
+    'yellow': 'gold',
+    'orange': 'orange',
+    'gray': 'lightgray'
+}
+
+# Grafici a linee: (titolo, etichetta y, [(colonna, colore, etichetta)])
+GRAFICI = (
+    ('Occupazione Magazzino nel Tempo', 'Occupazione (%)',
+     [('occupazione_totale', 'blue', 'Occupazione Totale')]),
+    ('Ordini Processati', 'Numero Ordini',
+     [('ordini_carico_processati', 'green', 'Ordini Carico'),
+      ('ordini_scarico_processati', 'red', 'Ordini Scarico')]),
+    ('Utilizzo Dock', 'Numero Dock Occupati',
+     [('dock_carico_occupati', 'orange', 'Dock Carico Occupati'),
+      ('dock_scarico_occupati', 'purple', 'Dock Scarico Occupati')]),
+    ('Ordini in Coda', 'Numero Ordini in Coda',
+     [('ordini_carico_in_coda', 'brown', 'Coda Carico'),
+      ('ordini_scarico_in_coda', 'pink', 'Coda Scarico')]),
+    ('Muletti Liberi nel Tempo', 'Numero Muletti Liberi',
+     [('muletti_carico_liberi', 'cyan', 'Muletti Carico Liberi'),
+      ('muletti_scarico_liberi', 'magenta', 'Muletti Scarico Liberi')]),
+    ('Tempo Medio di Processamento Ordini carico e scarico', 'Tempo Medio (in step)',
+     [('tempo_medio_ordine_carico', 'green', 'Tempo Medio Ordine_Carico'),
+      ('tempo_medio_ordine_scarico', 'red', 'Tempo Medio Ordine_Scarico')]),
+)
+
+# Grafici già costruiti, uno per modello
+_grafici: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+class SerieRidotta:
+    """Serie (x, y) ridotta a bucket di ``larghezza`` punti, ognuno con il suo minimo e massimo.
+
+    I bucket completi stanno in quattro array (x e y del minimo e del massimo); l'ultimo
+    bucket, ancora parziale, ha gli stessi dati più il numero di punti che contiene.
+    """
+
+    def __init__(self, max_bucket: int = MAX_BUCKET):
+        if max_bucket < 2:
+            raise ValueError("Servono almeno due bucket")
+        self.max_bucket = max_bucket
+        self.larghezza = 1
+        self.punti = 0
+        self._bucket = [np.empty(0) for _ in range(4)]  # x_min, y_min, x_max, y_max
+        self._parziale: List[float] = []  # Stesse quattro voci del bucket in corso
+        self._nel_parziale = 0
+
+    def __len__(self) -> int:
+        return len(self._bucket[0]) + (self._nel_parziale > 0)
+
+    def aggiungi(self, x: np.ndarray, y: np.ndarray):
+        """Aggiunge i nuovi punti (x crescente) ai bucket"""
+        if len(x) == 0:
+            return
+        self.punti += len(x)
+        w = self.larghezza
+        # Completa il bucket parziale
+        if self._nel_parziale:
+            n = min(w - self._nel_parziale, len(x))
+            self._parziale = _fondi_bucket(self._parziale, _bucket_di(x[:n], y[:n]))
+            self._nel_parziale += n
+            x, y = x[n:], y[n:]
+            if self._nel_parziale == w:
+                self._accoda([np.array([v]) for v in self._parziale])
+                self._parziale, self._nel_parziale = [], 0
+        # Bucket completi, in blocco
+        k = len(x) // w
+        if k:
+            xs, ys = x[:k * w].reshape(k, w), y[:k * w].reshape(k, w)
+            righe = np.arange(k)
+            i_min, i_max = ys.argmin(axis=1), ys.argmax(axis=1)
+            self._accoda([xs[righe, i_min], ys[righe, i_min], xs[righe, i_max], ys[righe, i_max]])
+        # Il resto apre un nuovo bucket parziale
+        if len(x) > k * w:
+            self._parziale = _bucket_di(x[k * w:], y[k * w:])
+            self._nel_parziale = len(x) - k * w
+        while len(self._bucket[0]) > self.max_bucket:
+            self._dimezza()
+
+    def _accoda(self, bucket: List[np.ndarray]):
+        self._bucket = [np.concatenate((vecchi, nuovi)) for vecchi, nuovi in zip(self._bucket, bucket)]
+
+    def _dimezza(self):
+        """Fonde i bucket a coppie; con un numero dispari l'ultimo diventa il parziale"""
+        n = len(self._bucket[0])
+        if n % 2:
+            ultimo = [b[-1] for b in self._bucket]
+            self._parziale = _fondi_bucket(ultimo, self._parziale) if self._nel_parziale else ultimo
+            self._nel_parziale += self.larghezza
+            self._bucket = [b[:-1] for b in self._bucket]
+        x_min, y_min, x_max, y_max = self._bucket
+        # A parità di valore vince il punto precedente
+        primo_min = y_min[0::2] <= y_min[1::2]
+        primo_max = y_max[0::2] >= y_max[1::2]
+        self._bucket = [np.where(primo_min, x_min[0::2], x_min[1::2]),
+                        np.where(primo_min, y_min[0::2], y_min[1::2]),
+                        np.where(primo_max, x_max[0::2], x_max[1::2]),
+                        np.where(primo_max, y_max[0::2], y_max[1::2])]
+        self.larghezza *= 2
+
+    def dati(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Punti da disegnare: minimo e massimo di ogni bucket nell'ordine delle x"""
+        x_min, y_min, x_max, y_max = self._bucket
+        if self._nel_parziale:
+            x_min, y_min, x_max, y_max = (np.append(b, v) for b, v in zip(self._bucket, self._parziale))
+        prima = x_min <= x_max
+        x = np.column_stack((np.where(prima, x_min, x_max), np.where(prima, x_max, x_min))).ravel()
+        y = np.column_stack((np.where(prima, y_min, y_max), np.where(prima, y_max, y_min))).ravel()
+        # Nei bucket di un solo punto minimo e massimo coincidono
+        doppio = np.zeros(len(x), dtype=bool)
+        doppio[1::2] = x_min == x_max
+        return x[~doppio], y[~doppio]
+
+
+def _bucket_di(x: np.ndarray, y: np.ndarray) -> List[float]:
+    i_min, i_max = int(y.argmin()), int(y.argmax())
+    return [x[i_min], y[i_min], x[i_max], y[i_max]]
+
+
+def _fondi_bucket(a: List[float], b: List[float]) -> List[float]:
+    """Bucket con minimo e massimo di due bucket consecutivi (a prima di b)"""
+    minimo = a[:2] if a[1] <= b[1] else b[:2]
+    massimo = a[2:] if a[3] >= b[3] else b[2:]
+    return [*minimo, *massimo]
+
+
+class GraficiMagazzino:
+    """Figura dei grafici di un modello, con linee aggiornate solo con le righe nuove"""
+
+    def __init__(self, model, max_bucket: int = MAX_BUCKET):
+        # Nessun riferimento al modello: è la chiave debole della cache
+        self.recorder = model.data_collector
+        self.dock_carico, self.dock_scarico = len(model.loading_docks), len(model.unloading_docks)
+        self.letti = 0  # Righe del registro già aggiunte alle serie
+
+        self.fig = Figure(figsize=(15, 20))
+        self.fig.suptitle('Analisi Prestazioni Warehouse', fontsize=16, fontweight='bold')
+        axes = self.fig.subplots(4, 2)
+        self.assi = [axes[i // 2, i % 2] for i in range(len(GRAFICI))]
+        self.linee = {}
+        self.serie = {}
+        for ax, (titolo, ylabel, colonne) in zip(self.assi, GRAFICI):
+            for colonna, colore, etichetta in colonne:
+                self.linee[colonna], = ax.plot([], [], color=colore, linewidth=2, label=etichetta)
+                self.serie[colonna] = SerieRidotta(max_bucket)
+            ax.set_title(titolo)
+            ax.set_xlabel('Step')
+            ax.set_ylabel(ylabel)
+            ax.grid(True, alpha=0.3)
+            ax.legend()
+        self.ax_torta = axes[3, 0]
+        axes[3, 1].axis('off')
+        self.fig.tight_layout()
+
+    def _colonne_nuove(self, inizio: int, fine: int):
+        """Colonne delle righe [inizio, fine) del registro, comprese quelle derivate"""
+        rec = self.recorder
+        colonne = {colonna: rec[colonna][inizio:fine]
+                   for _, _, serie in GRAFICI for colonna, _, _ in serie if colonna in rec.names}
+        colonne['dock_carico_occupati'] = self.dock_carico - rec['dock_carico_liberi'][inizio:fine]
+        colonne['dock_scarico_occupati'] = self.dock_scarico - rec['dock_scarico_liberi'][inizio:fine]
+        return colonne
+
+    def aggiorna(self) -> int:
+        """Aggiunge alle linee le righe registrate dall'ultimo aggiornamento e ne ritorna il numero"""
+        righe = self.recorder.rows
+        if righe <= self.letti:
+            return 0
+        steps = self.recorder['step'][self.letti:righe]
+        for colonna, valori in self._colonne_nuove(self.letti, righe).items():
+            serie = self.serie[colonna]
+            serie.aggiungi(steps, valori)
+            self.linee[colonna].set_data(*serie.dati())
+        for ax in self.assi:
+            ax.relim()
+            ax.autoscale_view()
+        self._disegna_torta()
+        nuove, self.letti = righe - self.letti, righe
+        return nuove
+
+    def _disegna_torta(self):
+        """Distribuzione dei pacchi per colore all'ultimo step (con spazio vuoto)"""
+        distribuzione = self.recorder['distribuzione_colori'][-1]
+        colori = [colore for colore, count in distribuzione.items() if count > 0]
+        valori = [count for count in distribuzione.values() if count > 0]
+        ax = self.ax_torta
+        ax.clear()
+        ax.pie(valori, labels=colori, autopct='%1.1f%%', colors=[COLORI_TORTA[colore] for colore in colori])
+        ax.set_title("Distribuzione pacchi per colore (con spazio vuoto)")
+
+
+def grafici_magazzino(model) -> GraficiMagazzino:
+    """Grafici del modello, creati al primo utilizzo e poi aggiornati ad ogni frame"""
+    grafici = _grafici.get(model)
+    if grafici is None or grafici.recorder is not model.data_collector:
+        grafici = _grafici[model] = GraficiMagazzino(model)
+    grafici.aggiorna()
+    return grafici
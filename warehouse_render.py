@@ -0,0 +1,167 @@
+"""Mappa del magazzino per la dashboard, disegnata come un'unica immagine.
+
+Lo sfondo statico (tracce, zone di standby e rack con il loro colore) viene
+rasterizzato una sola volta per modello a partire da ``model.tracks`` e
+``model.shelves``. Ad ogni frame vengono ridisegnate, sull'array dell'immagine,
+solo le celle dei rack la cui occupazione (o colore) è cambiata, usando le cifre
+prerenderizzate una volta sola. Sugli assi si aggiunge quindi un solo artista
+(``imshow``) invece di centinaia di rettangoli, testi e linee.
+"""
+import weakref
+from typing import Dict, Tuple
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.colors import to_rgb
+from matplotlib.figure import Figure
+
+from forkLift import ForkLift
+
+PIXEL_PER_CELLA = 16
+
+# Stile della mappa (come i vecchi rettangoli e linee di matplotlib)
+ALPHA_RACK = 0.7
+LATO_RACK = 0.92  # Lato del rack in frazioni di cella
+COLORE_TRACCE = "gray"
+ALPHA_TRACCE = 0.6
+SPESSORE_TRACCE = 2  # Pixel
+COLORE_STANDBY = "lightgray"
+ALPHA_STANDBY = 0.7
+DIMENSIONE_CIFRE = 0.45  # Altezza delle cifre in frazioni di cella
+
+# Mappe già costruite, una per modello
+_mappe: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def _fondi(area: np.ndarray, colore: str, alpha: float):
+    """Sovrappone un colore con trasparenza a una porzione dell'immagine (float 0-1)"""
+    area[...] = area * (1 - alpha) + np.array(to_rgb(colore)) * alpha
+
+
+def render_cifre(testo: str, lato: int) -> np.ndarray:
+    """Maschera di opacità (float 0-1, lato x lato) del testo in grassetto centrato"""
+    dpi = 100
+    fig = Figure(figsize=(lato / dpi, lato / dpi), dpi=dpi)
+    canvas = FigureCanvasAgg(fig)
+    fig.text(0.5, 0.5, testo, ha="center", va="center", fontweight="bold",
+             fontsize=DIMENSIONE_CIFRE * lato * 72 / dpi)
+    canvas.draw()
+    rgba = np.asarray(canvas.buffer_rgba())
+    # Testo nero su bianco: l'opacità è il complemento della luminosità, righe dal basso
+    return (1 - rgba[::-1, :, 0] / 255.0)[:lato, :lato]
+
+
+class MappaMagazzino:
+    """Immagine della mappa di un modello, aggiornata solo nelle celle dei rack cambiati"""
+
+    def __init__(self, model, pixel_per_cella: int = PIXEL_PER_CELLA):
+        # Nessun riferimento al modello: è la chiave debole della cache
+        self.px = pixel_per_cella
+        self.width, self.height = model.width, model.height
+        self.shelves = model.shelves
+
+        self.sfondo = self._render_sfondo(model)
+        self.frame = (self.sfondo * 255).astype(np.uint8)
+
+        self._cifre: Dict[int, np.ndarray] = {}
+        # Stato dei rack già disegnato nel frame: -1 forza il primo disegno
+        self._occupazione = np.full(len(self.shelves), -1, dtype=np.int32)
+        self._colore = self.shelves.colore.copy()
+
+    def _cella(self, pos: Tuple[int, int], lato: float = 1.0) -> Tuple[slice, slice]:
+        """Righe e colonne dell'immagine coperte dal quadrato di lato dato centrato nella cella"""
+        x, y = pos
+        margine = int(round(self.px * (1 - lato) / 2))
+        return (slice(y * self.px + margine, (y + 1) * self.px - margine),
+                slice(x * self.px + margine, (x + 1) * self.px - margine))
+
+    def _render_sfondo(self, model) -> np.ndarray:
+        px = self.px
+        img = np.ones((self.height * px, self.width * px, 3))
+
+        # Tracce: segmenti tra i centri delle celle navigabili adiacenti. Nei corridoi a
+        # due corsie si omettono i segmenti trasversali, che disegnerebbero una scala
+        tracks = model.tracks
+        meta, spessore = px // 2, SPESSORE_TRACCE
+
+        def traversale(a, b, dx, dy):
+            """Segmento a-b che attraversa un corridoio perpendicolare senza proseguire"""
+            lati = all((p[0] + s * dx, p[1] + s * dy) in tracks for p in (a, b) for s in (1, -1))
+            prosegue = ((a[0] - dy, a[1] - dx) in tracks or (b[0] + dy, b[1] + dx) in tracks)
+            return lati and not prosegue
+
+        for x, y in tracks:
+            cx, cy = x * px + meta, y * px + meta
+            righe = slice(cy - spessore // 2, cy - spessore // 2 + spessore)
+            colonne = slice(cx - spessore // 2, cx - spessore // 2 + spessore)
+            _fondi(img[righe, colonne], COLORE_TRACCE, ALPHA_TRACCE)
+            if (x + 1, y) in tracks and not traversale((x, y), (x + 1, y), 0, 1):
+                _fondi(img[righe, cx - spessore // 2 + spessore:cx + px - spessore // 2],
+                       COLORE_TRACCE, ALPHA_TRACCE)
+            if (x, y + 1) in tracks and not traversale((x, y), (x, y + 1), 1, 0):
+                _fondi(img[cy - spessore // 2 + spessore:cy + px - spessore // 2, colonne],
+                       COLORE_TRACCE, ALPHA_TRACCE)
+
+        # Zone di standby 3x3 attorno ai punti di standby dei muletti
+        standby = {agent.standby_position for agent in model.agents if isinstance(agent, ForkLift)}
+        for x, y in standby:
+            righe = slice(max((y - 1) * px, 0), min((y + 2) * px, img.shape[0]))
+            colonne = slice(max((x - 1) * px, 0), min((x + 2) * px, img.shape[1]))
+            _fondi(img[righe, colonne], COLORE_STANDBY, ALPHA_STANDBY)
+
+        self._bianco = img.copy()
+        for i, pos in enumerate(self.shelves.positions):
+            if pos is not None:
+                self._render_rack(img, i)
+        return img
+
+    def _render_rack(self, img: np.ndarray, i: int):
+        """Rack i con il suo colore e il bordo nero, senza etichetta"""
+        area = self._cella(self.shelves.positions[i])
+        img[area] = self._bianco[area]
+        interno = self._cella(self.shelves.positions[i], LATO_RACK)
+        _fondi(img[interno], self.shelves.colori[self.shelves.colore[i]], ALPHA_RACK)
+        righe, colonne = interno
+        img[righe, colonne.start] = img[righe, colonne.stop - 1] = 0
+        img[righe.start, colonne] = img[righe.stop - 1, colonne] = 0
+
+    def _maschera(self, occupazione: int) -> np.ndarray:
+        maschera = self._cifre.get(occupazione)
+        if maschera is None:
+            maschera = self._cifre[occupazione] = render_cifre(str(occupazione), self.px)[..., None]
+        return maschera
+
+    def aggiorna(self) -> int:
+        """Ridisegna nel frame i rack cambiati dall'ultimo aggiornamento e ne ritorna il numero"""
+        shelves = self.shelves
+        colore_cambiato = np.nonzero(shelves.colore != self._colore)[0]
+        for i in colore_cambiato:
+            self._render_rack(self.sfondo, i)
+        self._colore[colore_cambiato] = shelves.colore[colore_cambiato]
+        self._occupazione[colore_cambiato] = -1
+
+        cambiati = np.nonzero(shelves.occupazione != self._occupazione)[0]
+        for i in cambiati:
+            pos = shelves.positions[i]
+            if pos is None:
+                continue
+            area = self._cella(pos)
+            occupazione = int(shelves.occupazione[i])
+            # Etichetta nera sopra lo sfondo statico della cella
+            self.frame[area] = (self.sfondo[area] * (1 - self._maschera(occupazione)) * 255).astype(np.uint8)
+            self._occupazione[i] = occupazione
+        return len(cambiati)
+
+    def disegna(self, ax, zorder: float = 0.5):
+        """Aggiorna il frame e lo aggiunge agli assi come unica immagine"""
+        self.aggiorna()
+        return ax.imshow(self.frame, origin="lower", interpolation="antialiased", zorder=zorder,
+                         extent=(-0.5, self.width - 0.5, -0.5, self.height - 0.5))
+
+
+def mappa_magazzino(model) -> MappaMagazzino:
+    """Mappa del modello, costruita al primo utilizzo e poi riusata ad ogni frame"""
+    mappa = _mappe.get(model)
+    if mappa is None:
+        mappa = _mappe[model] = MappaMagazzino(model)
+    return mappa